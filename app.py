@@ -1,17 +1,27 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, File, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.responses import HTMLResponse, RedirectResponse
 from uvicorn import run as app_run
 
+import os
+import time
 from typing import Optional
 
 # Importing constants and pipeline modules from the project
 from src.constants import APP_HOST, APP_PORT
-from src.pipeline.prediction_pipeline import VehicleData, VehicleDataClassifier
-from src.pipeline.training_pipeline import TrainPipeline
+from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.input_schema import InputValidationError, VehicleInputSchema
+from src.metrics import INVALID_REQUESTS, PREDICTION_ERRORS, REGISTRY, REQUESTS_IN_FLIGHT, STAGE_LATENCY, stage_timer
+from src.pipeline.csv_scoring import CsvBatchScorer
+from src.pipeline.prediction_pipeline import VehicleData, VehicleDataBatch, VehicleDataClassifier
+from src.pipeline.micro_batcher import PredictionMicroBatcher
+from src.pipeline.model_version_poller import ModelVersionPoller
+from src.pipeline.model_warmup import ModelWarmup
+from src.pipeline.serving_executor import InferenceExecutor, ServerBusyError
+from src.pipeline.training_jobs import SharedTrainingJobManager, TrainingJobServerUnavailable
 
 # Initialize FastAPI application
 app = FastAPI()
@@ -34,6 +44,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Bounded executor keeps blocking inference off the event loop
+inference_executor = InferenceExecutor()
+
+# Training runs are queued for a background worker process, shared by all pre-fork workers
+training_jobs = SharedTrainingJobManager()
+
+# Shared micro-batcher that groups concurrent single-row predictions into one model call
+prediction_batcher = PredictionMicroBatcher(executor=inference_executor)
+
+# Gauges read from the serving components when /metrics is scraped
+REGISTRY.gauge("vehicle_inference_in_flight", "Calls queued or running on the inference executor") \
+    .set_function(lambda: inference_executor.in_flight)
+REGISTRY.gauge("vehicle_micro_batch_queue_depth", "Requests waiting for the next micro-batch") \
+    .set_function(lambda: prediction_batcher.get_metrics()["queue_depth"])
+REGISTRY.gauge("vehicle_prediction_cache_size", "Entries in the prediction cache") \
+    .set_function(lambda: VehicleDataClassifier().get_prediction_cache().get_metrics()["size"])
+REGISTRY.gauge("vehicle_training_running", "1 while a training job is running") \
+    .set_function(lambda: int(training_jobs.is_running))
+
+
+# Loads and warms the production model at startup; /ready reports not-ready until it finishes
+model_warmup = ModelWarmup()
+
+# Polls the model object's version and hot-swaps a newly pushed model without a restart
+model_version_poller = ModelVersionPoller()
+
+
+@app.on_event("startup")
+async def preload_model():
+    """
+    Starts downloading and warming the production model, and polling for new versions, in the background.
+    """
+    model_warmup.start()
+    model_version_poller.start()
+
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    """
+    Stops the model warm-up and version polling, the inference thread pool and the training worker process.
+    """
+    model_warmup.stop()
+    model_version_poller.stop()
+    inference_executor.shutdown()
+    training_jobs.shutdown()
+
 
 class DataForm:
     """
@@ -61,17 +117,49 @@ class DataForm:
         This method is asynchronous to handle form data fetching without blocking.
         """
         form = await self.request.form()
-        self.Gender = form.get("Gender")
-        self.Age = form.get("Age")
-        self.Driving_License = form.get("Driving_License")
-        self.Region_Code = form.get("Region_Code")
-        self.Previously_Insured = form.get("Previously_Insured")
-        self.Annual_Premium = form.get("Annual_Premium")
-        self.Policy_Sales_Channel = form.get("Policy_Sales_Channel")
-        self.Vintage = form.get("Vintage")
-        self.Vehicle_Age_lt_1_Year = form.get("Vehicle_Age_lt_1_Year")
-        self.Vehicle_Age_gt_2_Years = form.get("Vehicle_Age_gt_2_Years")
-        self.Vehicle_Damage_Yes = form.get("Vehicle_Damage_Yes")
+        # Coerce the raw form strings into the typed fields declared above; raises
+        # InputValidationError listing every invalid field
+        record = VehicleInputSchema.get_default().coerce_record(form)
+        self.Gender = record["Gender"]
+        self.Age = record["Age"]
+        self.Driving_License = record["Driving_License"]
+        self.Region_Code = record["Region_Code"]
+        self.Previously_Insured = record["Previously_Insured"]
+        self.Annual_Premium = record["Annual_Premium"]
+        self.Policy_Sales_Channel = record["Policy_Sales_Channel"]
+        self.Vintage = record["Vintage"]
+        self.Vehicle_Age_lt_1_Year = record["Vehicle_Age_lt_1_Year"]
+        self.Vehicle_Age_gt_2_Years = record["Vehicle_Age_gt_2_Years"]
+        self.Vehicle_Damage_Yes = record["Vehicle_Damage_Yes"]
+
+
+# Route for load balancer health checks, never blocked by inference or training
+@app.get("/health")
+async def healthRouteClient():
+    """
+    Returns immediately with the state of the inference and training executors.
+    """
+    return {"status": "ok",
+            "inference_in_flight": inference_executor.in_flight,
+            "training_running": training_jobs.is_running}
+
+
+# Liveness probe: the process is up and the event loop responds
+@app.get("/live")
+async def liveRouteClient():
+    """
+    Always returns 200 while the server can answer requests.
+    """
+    return {"status": "alive"}
+
+
+# Readiness probe: only route traffic here once the model is loaded and warmed up
+@app.get("/ready")
+async def readyRouteClient():
+    """
+    Returns 200 once the production model is loaded and warmed up, 503 until then.
+    """
+    return JSONResponse(model_warmup.as_dict(), status_code=200 if model_warmup.ready else 503)
 
 
 # Route to render the main page with the form
@@ -86,17 +174,36 @@ async def index(request: Request):
 
 # Route to trigger the model training process
 @app.get("/train")
-async def trainRouteClient():
+async def trainRouteClient(refresh_data: bool = False):
     """
-    Endpoint to initiate the model training pipeline.
+    Endpoint to enqueue a run of the model training pipeline.
+    Returns the job id immediately; a run already queued or in progress is reused.
+    /train?refresh_data=true re-exports the data even if the collection is unchanged.
     """
     try:
-        train_pipeline = TrainPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training successful!!!")
+        job, created = training_jobs.submit(refresh_data=refresh_data)
+        return JSONResponse({"job_id": job.job_id, "status": job.status, "coalesced": not created},
+                            status_code=202)
 
+    except TrainingJobServerUnavailable as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=503)
     except Exception as e:
-        return Response(f"Error Occurred! {e}")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=500)
+
+
+# Route to follow the progress of a training job
+@app.get("/train/{job_id}")
+async def trainStatusRouteClient(job_id: str):
+    """
+    Returns the status, per-stage durations and artifact paths of a training job.
+    """
+    try:
+        job = training_jobs.get_job(job_id)
+    except TrainingJobServerUnavailable as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=503)
+    if job is None:
+        return JSONResponse({"status": False, "error": f"Unknown training job {job_id}"}, status_code=404)
+    return job.as_dict()
 
 
 # Route to handle form submission and make predictions
@@ -105,9 +212,13 @@ async def predictRouteClient(request: Request):
     """
     Endpoint to receive form data, process it, and make a prediction.
     """
+    in_flight = REQUESTS_IN_FLIGHT.labels("form")
+    in_flight.inc()
+    started = time.perf_counter()
     try:
         form = DataForm(request)
-        await form.get_vehicle_data()
+        with stage_timer("form_parse"):
+            await form.get_vehicle_data()
 
         vehicle_data = VehicleData(
             Gender=form.Gender,
@@ -123,14 +234,8 @@ async def predictRouteClient(request: Request):
             Vehicle_Damage_Yes=form.Vehicle_Damage_Yes
         )
 
-        # Convert form data into a DataFrame for the model
-        vehicle_df = vehicle_data.get_vehicle_input_data_frame()
-
-        # Initialize the prediction pipeline
-        model_predictor = VehicleDataClassifier()
-
-        # Make a prediction and retrieve the result
-        value = model_predictor.predict(dataframe=vehicle_df)[0]
+        # Make a prediction through the shared micro-batcher and retrieve the result
+        value = (await prediction_batcher.predict(records=[vehicle_data.get_vehicle_record()]))[0]
 
         # Interpret the prediction result as 'Response-Yes' or 'Response-No'
         status = "Response-Yes" if value == 1 else "Response-No"
@@ -141,9 +246,156 @@ async def predictRouteClient(request: Request):
             {"request": request, "context": status},
         )
 
+    except InputValidationError as e:
+        INVALID_REQUESTS.labels("form").inc()
+        return JSONResponse({"status": False, "error": f"{e}", "errors": e.errors}, status_code=422)
+
+    except ServerBusyError as e:
+        PREDICTION_ERRORS.labels("form").inc()
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=503)
+
     except Exception as e:
+        PREDICTION_ERRORS.labels("form").inc()
         return {"status": False, "error": f"{e}"}
 
+    finally:
+        STAGE_LATENCY.labels("request_form").observe(time.perf_counter() - started)
+        in_flight.dec()
+
+
+# Route to score many records with a single vectorized model call
+@app.post("/predict/batch")
+async def predictBatchRouteClient(request: Request):
+    """
+    Endpoint to score a batch of vehicle records in one pass through the model.
+
+    Accepts a JSON body with either "records" (a list of objects) or "columns" (an object of
+    equally long lists), plus an optional "return_probabilities" flag. Predictions are returned
+    in input order. A batch with invalid values is rejected with 422 and a per-field error list.
+    """
+    in_flight = REQUESTS_IN_FLIGHT.labels("batch")
+    in_flight.inc()
+    started = time.perf_counter()
+    try:
+        with stage_timer("json_parse"):
+            payload = await request.json()
+        batch = VehicleDataBatch(records=payload.get("records", payload.get("columns", [])))
+
+        max_batch_size = VehiclePredictorConfig().max_batch_size
+        if batch.size > max_batch_size:
+            return JSONResponse(
+                {"status": False, "error": f"Batch of {batch.size} records exceeds the limit of {max_batch_size}"},
+                status_code=413,
+            )
+        if batch.size == 0:
+            return {"status": True, "predictions": []}
+
+        model_predictor = VehicleDataClassifier()
+
+        if payload.get("return_probabilities", False):
+            predictions, probabilities = await inference_executor.run(model_predictor.predict_records,
+                                                                      batch.records, True)
+            return {"status": True,
+                    "predictions": [int(value) for value in predictions],
+                    "probabilities": [float(value) for value in probabilities]}
+
+        predictions = await inference_executor.run(model_predictor.predict_records, batch.records)
+        return {"status": True, "predictions": [int(value) for value in predictions]}
+
+    except InputValidationError as e:
+        INVALID_REQUESTS.labels("batch").inc()
+        return JSONResponse({"status": False, "error": f"{e}", "errors": e.errors}, status_code=422)
+
+    except ServerBusyError as e:
+        PREDICTION_ERRORS.labels("batch").inc()
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=503)
+
+    except Exception as e:
+        PREDICTION_ERRORS.labels("batch").inc()
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=400)
+
+    finally:
+        STAGE_LATENCY.labels("request_batch").observe(time.perf_counter() - started)
+        in_flight.dec()
+
+
+# Route to score a whole CSV file, uploaded or read from S3, as a streamed CSV response
+@app.post("/predict/csv")
+async def predictCsvRouteClient(file: Optional[UploadFile] = File(None),
+                                s3_key: Optional[str] = None,
+                                bucket_name: Optional[str] = None):
+    """
+    Endpoint to score a CSV of raw vehicle records, given as a multipart upload or as an S3 key.
+
+    The file is parsed and scored in fixed-size chunks on a worker thread and the results
+    (id, prediction, probability) are streamed back as they are produced, so memory stays
+    bounded whatever the size of the file. The first chunk is scored before the response
+    starts, so a file that is not a CSV or lacks a column gets a 400, and invalid values in
+    it a 422.
+    """
+    try:
+        scorer = CsvBatchScorer()
+        if file is not None:
+            rows = await inference_executor.run(scorer.score_file, file.file)
+        elif s3_key:
+            rows = await inference_executor.run(scorer.score_s3_object, s3_key,
+                                                bucket_name or VehiclePredictorConfig().model_bucket_name)
+        else:
+            return JSONResponse({"status": False, "error": "Provide a CSV file upload or an s3_key"},
+                                status_code=400)
+
+        # A plain generator is iterated on the threadpool, keeping parsing and inference off the event loop
+        return StreamingResponse(rows, media_type="text/csv",
+                                 headers={"Content-Disposition": "attachment; filename=predictions.csv"})
+
+    except InputValidationError as e:
+        INVALID_REQUESTS.labels("csv").inc()
+        return JSONResponse({"status": False, "error": f"{e}", "errors": e.errors}, status_code=422)
+
+    except ServerBusyError as e:
+        PREDICTION_ERRORS.labels("csv").inc()
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=503)
+
+    except Exception as e:
+        PREDICTION_ERRORS.labels("csv").inc()
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=400)
+
+
+# Route for Prometheus to scrape
+@app.get("/metrics")
+async def metricsRouteClient():
+    """
+    Returns stage latency histograms, counters and gauges of this worker, labelled with its pid, in Prometheus text format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# Route to inspect how the micro-batcher is grouping requests
+@app.get("/predict/batcher/metrics")
+async def batcherMetricsRouteClient():
+    """
+    Returns batch size and queue delay statistics of the prediction micro-batcher of this worker.
+    """
+    return {**prediction_batcher.get_metrics(), "pid": os.getpid()}
+
+
+# Route to inspect the prediction cache
+@app.get("/predict/cache/metrics")
+async def predictionCacheMetricsRouteClient():
+    """
+    Returns size, hit/miss, eviction and invalidation counters of the prediction cache of this worker.
+    """
+    return {**VehicleDataClassifier().get_prediction_cache().get_metrics(), "pid": os.getpid()}
+
+
+# Route to inspect which model version is serving and when it was last checked
+@app.get("/model/version")
+async def modelVersionRouteClient():
+    """
+    Returns the serving model version and the version polling counters of this worker.
+    """
+    return {**model_version_poller.as_dict(), "pid": os.getpid()}
+
 
 # Main entry point to start the FastAPI server
 if __name__ == "__main__":
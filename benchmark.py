@@ -0,0 +1,400 @@
+"""
+Performance benchmarks for the serving and training paths.
+
+Usage:
+    python benchmark.py health-latency --url http://localhost:5000 --trigger-training
+    python benchmark.py encoder --model artifact/<timestamp>/trained_model/model.pkl
+    python benchmark.py flat-forest --model artifact/<timestamp>/trained_model/model.pkl
+    python benchmark.py import-time --module app
+    python benchmark.py model-load --model artifact/<timestamp>/trained_model/model.pkl
+    python benchmark.py export-scaling --mongodb-url mongodb://localhost:27017 --rows 1000000
+    python benchmark.py feature-store-format --rows 1000000
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+
+SAMPLE_RECORD = {
+    "Gender": "1", "Age": "44", "Driving_License": "1", "Region_Code": "28.0",
+    "Previously_Insured": "0", "Annual_Premium": "40454.0", "Policy_Sales_Channel": "26.0",
+    "Vintage": "217", "Vehicle_Age_lt_1_Year": "0", "Vehicle_Age_gt_2_Years": "1", "Vehicle_Damage_Yes": "1",
+}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def random_records(n_rows: int, seed: int = 0) -> dict:
+    """
+    Column-wise batch of plausible model inputs for benchmarking.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    vehicle_age = rng.integers(0, 3, n_rows)
+    return {
+        "Gender": rng.integers(0, 2, n_rows),
+        "Age": rng.integers(20, 85, n_rows),
+        "Driving_License": rng.integers(0, 2, n_rows),
+        "Region_Code": rng.integers(0, 53, n_rows).astype(float),
+        "Previously_Insured": rng.integers(0, 2, n_rows),
+        "Annual_Premium": rng.uniform(2630, 100000, n_rows).round(1),
+        "Policy_Sales_Channel": rng.integers(1, 164, n_rows).astype(float),
+        "Vintage": rng.integers(10, 300, n_rows),
+        "Vehicle_Age_lt_1_Year": (vehicle_age == 0).astype(int),
+        "Vehicle_Age_gt_2_Years": (vehicle_age == 2).astype(int),
+        "Vehicle_Damage_Yes": rng.integers(0, 2, n_rows),
+    }
+
+
+def time_calls(func, iterations):
+    samples_ms = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples_ms.append((time.perf_counter() - started) * 1000.0)
+    return samples_ms
+
+
+def report(name, samples_ms):
+    print(f"{name}: n={len(samples_ms)} "
+          f"p50={percentile(samples_ms, 0.50):.2f}ms "
+          f"p99={percentile(samples_ms, 0.99):.2f}ms "
+          f"max={max(samples_ms):.2f}ms "
+          f"mean={statistics.mean(samples_ms):.2f}ms")
+
+
+# ===============================
+# HEALTH CHECK LATENCY DURING TRAINING
+# ===============================
+def bench_health_latency(url: str, duration: float, interval: float, trigger_training: bool) -> None:
+    """
+    Polls /health for `duration` seconds and reports its latency, optionally while a /train
+    request runs in the background, to check that training does not stall the event loop.
+    """
+    if trigger_training:
+        threading.Thread(target=lambda: urllib.request.urlopen(f"{url}/train").read(), daemon=True).start()
+
+    samples_ms = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        urllib.request.urlopen(f"{url}/health").read()
+        samples_ms.append((time.perf_counter() - started) * 1000.0)
+        time.sleep(interval)
+
+    report("/health" + (" during training" if trigger_training else ""), samples_ms)
+
+
+# ===============================
+# PANDAS-FREE FEATURE ENCODER VS DATAFRAME PATH
+# ===============================
+def bench_encoder(model_path: str, record: dict, iterations: int) -> None:
+    """
+    Compares single-record latency of the DataFrame + ColumnTransformer path against the
+    schema-driven VehicleFeatureEncoder, after checking both produce identical features.
+    """
+    import numpy as np
+    from src.pipeline.prediction_pipeline import VehicleData
+    from src.utils.main_utils import load_object
+
+    model = load_object(model_path)
+    encoder = model.get_feature_encoder()
+
+    def dataframe_path():
+        dataframe = VehicleData(**record).get_vehicle_input_data_frame()
+        return model.trained_model_object.predict(model.preprocessing_object.transform(dataframe))
+
+    def encoder_path():
+        return model.trained_model_object.predict(encoder.encode(record))
+
+    dataframe_features = model.preprocessing_object.transform(VehicleData(**record).get_vehicle_input_data_frame())
+    encoder_features = encoder.encode(record)
+    identical = np.array_equal(np.asarray(dataframe_features, dtype=np.float64).view(np.int64),
+                               encoder_features.view(np.int64))
+    print(f"bit-identical features: {identical}, "
+          f"same prediction: {bool((dataframe_path() == encoder_path()).all())}")
+
+    report("DataFrame path (transform + predict)", time_calls(dataframe_path, iterations))
+    report("encoder path (encode + predict)", time_calls(encoder_path, iterations))
+    report("DataFrame build + transform only", time_calls(
+        lambda: model.preprocessing_object.transform(VehicleData(**record).get_vehicle_input_data_frame()), iterations))
+    report("encode only", time_calls(lambda: encoder.encode(record), iterations))
+
+
+# ===============================
+# FLAT ARRAY FOREST VS SKLEARN RANDOM FOREST
+# ===============================
+def bench_flat_forest(model_path: str, batch_sizes, iterations: int) -> None:
+    """
+    Compares RandomForestClassifier.predict with the compiled FlatForest at several batch sizes,
+    after checking both give identical probabilities.
+    """
+    import numpy as np
+    from src.entity.flat_forest import FlatForest
+    from src.utils.main_utils import load_object
+
+    model = load_object(model_path)
+    forest = model.trained_model_object
+    flat_forest = getattr(model, "compiled_model_object", None) or FlatForest.from_sklearn(forest)
+    features = model.get_feature_encoder().encode_columns(random_records(max(batch_sizes)))
+
+    identical = np.array_equal(forest.predict_proba(features), flat_forest.predict_proba(features))
+    print(f"{flat_forest}, identical probabilities: {identical}")
+
+    for batch_size in batch_sizes:
+        batch = features[:batch_size]
+        report(f"sklearn forest, batch={batch_size}", time_calls(lambda: forest.predict(batch), iterations))
+        report(f"flat forest,    batch={batch_size}", time_calls(lambda: flat_forest.predict(batch), iterations))
+
+
+# ===============================
+# PICKLED VS MEMORY-MAPPED MODEL LOADING
+# ===============================
+def bench_model_load(model_path: str, iterations: int) -> None:
+    """
+    Exports a pickled MyModel to the serving model file format next to it, then compares
+    unpickling with memory-mapping and checks both give identical probabilities.
+    """
+    import os
+    import numpy as np
+    from src.entity.model_format import load_model_file, save_model_file
+    from src.utils.main_utils import load_object
+
+    model = load_object(model_path)
+    serving_model_path = os.path.splitext(model_path)[0] + ".mmap"
+    save_model_file(model, serving_model_path)
+    print(f"pickle: {os.path.getsize(model_path) / 1e6:.1f} MB, "
+          f"serving model file: {os.path.getsize(serving_model_path) / 1e6:.1f} MB")
+
+    records = random_records(1000)
+    identical = np.array_equal(model.predict_records(records, return_probabilities=True)[1],
+                               load_model_file(serving_model_path).predict_records(records,
+                                                                                   return_probabilities=True)[1])
+    print(f"identical probabilities: {identical}")
+
+    report("load_object (dill)", time_calls(lambda: load_object(model_path), iterations))
+    report("load_model_file (mmap)", time_calls(lambda: load_model_file(serving_model_path), iterations))
+
+
+# ===============================
+# PARALLEL COLLECTION EXPORT SCALING
+# ===============================
+def random_documents(start: int, n_rows: int, seed: int = 0) -> list:
+    """
+    Raw collection documents, as stored in MongoDB, for seeding a benchmark collection.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed + start)
+    vehicle_ages = np.array(["< 1 Year", "1-2 Year", "> 2 Years"])
+    columns = {
+        "id": np.arange(start, start + n_rows) + 1,
+        "Gender": np.where(rng.integers(0, 2, n_rows) == 1, "Male", "Female"),
+        "Age": rng.integers(20, 85, n_rows),
+        "Driving_License": rng.integers(0, 2, n_rows),
+        "Region_Code": rng.integers(0, 53, n_rows).astype(float),
+        "Previously_Insured": rng.integers(0, 2, n_rows),
+        "Vehicle_Age": vehicle_ages[rng.integers(0, 3, n_rows)],
+        "Vehicle_Damage": np.where(rng.integers(0, 2, n_rows) == 1, "Yes", "No"),
+        "Annual_Premium": rng.uniform(2630, 100000, n_rows).round(1),
+        "Policy_Sales_Channel": rng.integers(1, 164, n_rows).astype(float),
+        "Vintage": rng.integers(10, 300, n_rows),
+        "Response": rng.integers(0, 2, n_rows),
+    }
+    return [{name: values[row].item() for name, values in columns.items()} for row in range(n_rows)]
+
+
+def bench_export_scaling(mongodb_url: str, collection_name: str, n_rows: int, workers, batch_size: int) -> None:
+    """
+    Seeds a collection of n_rows synthetic documents on a local MongoDB (reused when it already
+    holds n_rows documents), then times the feature store export with each worker count: the
+    single-cursor export for 1 worker, the partitioned parallel export above that.
+    """
+    import os
+    import tempfile
+    from dataclasses import replace
+    os.environ["MONGODB_URL"] = mongodb_url
+    from src.components.data_ingestion import DataIngestion
+    from src.configuration.mongo_db_connection import MongoDBClient
+    from src.constants import FILE_NAME
+    from src.entity.config_entity import DataIngestionConfig
+
+    collection = MongoDBClient().database[collection_name]
+    if collection.estimated_document_count() != n_rows:
+        collection.drop()
+        for start in range(0, n_rows, 50000):
+            collection.insert_many(random_documents(start, min(50000, n_rows - start)), ordered=False)
+        print(f"seeded {collection_name} with {n_rows} documents")
+
+    baseline_seconds = None
+    with tempfile.TemporaryDirectory() as export_dir:
+        for n_workers in workers:
+            data_ingestion_config = replace(
+                DataIngestionConfig(),
+                feature_store_file_path=os.path.join(export_dir, f"workers_{n_workers}", FILE_NAME),
+                feature_store_shard_dir=os.path.join(export_dir, f"workers_{n_workers}", "shards"),
+                collection_name=collection_name, export_workers=n_workers, export_batch_size=batch_size)
+            started = time.perf_counter()
+            exported_rows = DataIngestion(data_ingestion_config).stream_data_into_feature_store()
+            seconds = time.perf_counter() - started
+            baseline_seconds = baseline_seconds or seconds
+            print(f"workers={n_workers}: {exported_rows} rows in {seconds:.2f}s, "
+                  f"{exported_rows / seconds:,.0f} rows/s, speedup x{baseline_seconds / seconds:.2f}")
+
+
+# ===============================
+# FEATURE STORE FILE FORMAT
+# ===============================
+def bench_feature_store_format(n_rows: int, batch_size: int, iterations: int) -> None:
+    """
+    Writes n_rows synthetic feature store rows, batch by batch as ingestion does, as CSV and as
+    typed Parquet, then compares write time, file size, full reads and the projected read of
+    the model columns (everything but _id) that transformation and evaluation do.
+    """
+    import os
+    import tempfile
+    import pandas as pd
+    from src.components.data_ingestion import DataIngestion
+    from src.utils.dataset_utils import DataFrameWriter, read_dataframe
+
+    def batches():
+        for start in range(0, n_rows, batch_size):
+            batch = pd.DataFrame(random_documents(start, min(batch_size, n_rows - start))).drop(columns=["id"])
+            batch.insert(0, "_id", [f"{index:024x}" for index in range(start, start + len(batch))])
+            yield batch
+
+    data_ingestion = DataIngestion()
+    arrow_schema = data_ingestion.get_arrow_schema()
+    model_columns = [column for column in arrow_schema.names if column != "_id"]
+    frames = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for extension in ["csv", "parquet"]:
+            file_path = os.path.join(data_dir, f"data.{extension}")
+            started = time.perf_counter()
+            with DataFrameWriter(file_path, arrow_schema) as writer:
+                for batch in batches():
+                    writer.write(batch)
+            write_seconds = time.perf_counter() - started
+            print(f"{extension}: wrote {writer.n_rows} rows in {write_seconds:.2f}s, "
+                  f"{os.path.getsize(file_path) / 2 ** 20:.1f} MB")
+            report(f"{extension} full read", time_calls(lambda: read_dataframe(file_path), iterations))
+            report(f"{extension} model columns read",
+                   time_calls(lambda: read_dataframe(file_path, columns=model_columns), iterations))
+            frames[extension] = read_dataframe(file_path)
+
+    parquet_frame = frames["parquet"].astype({column: str for column in ["_id", "Gender", "Vehicle_Age",
+                                                                         "Vehicle_Damage"]})
+    csv_frame = frames["csv"].astype({"_id": str})
+    print(f"same contents: {parquet_frame.equals(csv_frame.astype(parquet_frame.dtypes.to_dict()))}")
+
+
+# ===============================
+# SERVER IMPORT TIME AND FOOTPRINT
+# ===============================
+# MODULES ONLY THE TRAINING PIPELINE NEEDS; A SERVING REPLICA SHOULD NOT IMPORT THEM AT STARTUP
+TRAINING_ONLY_MODULES = ["matplotlib", "imblearn", "pymongo", "sklearn", "dill", "src.components",
+                         "src.pipeline.training_pipeline", "src.data_access"]
+
+
+def bench_import_time(module: str, runs: int, top: int) -> None:
+    """
+    Imports `module` in fresh interpreters with `python -X importtime` and reports the total
+    import time, peak RSS, the slowest imports and any training-only modules that got pulled in.
+    """
+    totals_ms, rss_mb = [], []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c",
+             f"import resource, sys, {module}; "
+             f"print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss); print(*sys.modules, sep=' ')"],
+            capture_output=True, text=True, check=True)
+        cumulative_us = {}
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            cumulative_us[name.strip()] = int(cumulative)
+        totals_ms.append(cumulative_us[module] / 1000.0)
+        peak_rss, loaded_modules = completed.stdout.splitlines()[:2]
+        rss_mb.append(int(peak_rss) / 1024.0)
+
+    report(f"import {module}", totals_ms)
+    print(f"peak RSS after import: {statistics.mean(rss_mb):.1f} MB")
+    print("slowest imports (cumulative ms):")
+    for name, cumulative in sorted(cumulative_us.items(), key=lambda item: -item[1])[1:top + 1]:
+        print(f"    {cumulative / 1000.0:9.1f}  {name}")
+
+    loaded_modules = set(loaded_modules.split())
+    training_modules = [name for name in TRAINING_ONLY_MODULES if name in loaded_modules]
+    print(f"training-only modules imported: {training_modules or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    health = subparsers.add_parser("health-latency", help="latency of /health, optionally during a training run")
+    health.add_argument("--url", default="http://localhost:5000")
+    health.add_argument("--duration", type=float, default=30.0)
+    health.add_argument("--interval", type=float, default=0.05)
+    health.add_argument("--trigger-training", action="store_true")
+
+    encoder = subparsers.add_parser("encoder", help="pandas-free encoder vs DataFrame prediction path")
+    encoder.add_argument("--model", required=True, help="path to a locally saved MyModel pickle")
+    encoder.add_argument("--record", type=json.loads, default=SAMPLE_RECORD, help="JSON object of form fields")
+    encoder.add_argument("--iterations", type=int, default=1000)
+
+    flat_forest = subparsers.add_parser("flat-forest", help="compiled flat forest vs sklearn RandomForest")
+    flat_forest.add_argument("--model", required=True, help="path to a locally saved MyModel pickle")
+    flat_forest.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 10000])
+    flat_forest.add_argument("--iterations", type=int, default=20)
+
+    model_load = subparsers.add_parser("model-load", help="dill pickle vs memory-mapped serving model file")
+    model_load.add_argument("--model", required=True, help="path to a locally saved MyModel pickle")
+    model_load.add_argument("--iterations", type=int, default=10)
+
+    export_scaling = subparsers.add_parser("export-scaling", help="feature store export throughput vs worker count")
+    export_scaling.add_argument("--mongodb-url", default="mongodb://localhost:27017",
+                                help="local MongoDB to seed and export; never point this at production")
+    export_scaling.add_argument("--collection", default="export-benchmark")
+    export_scaling.add_argument("--rows", type=int, default=1000000)
+    export_scaling.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    export_scaling.add_argument("--batch-size", type=int, default=10000)
+
+    feature_store_format = subparsers.add_parser("feature-store-format",
+                                                 help="CSV vs Parquet feature store: size, write and read time")
+    feature_store_format.add_argument("--rows", type=int, default=1000000)
+    feature_store_format.add_argument("--batch-size", type=int, default=10000)
+    feature_store_format.add_argument("--iterations", type=int, default=5)
+
+    import_time = subparsers.add_parser("import-time", help="startup import cost of the serving entry point")
+    import_time.add_argument("--module", default="app")
+    import_time.add_argument("--runs", type=int, default=5)
+    import_time.add_argument("--top", type=int, default=15)
+
+    args = parser.parse_args()
+    if args.benchmark == "health-latency":
+        bench_health_latency(args.url, args.duration, args.interval, args.trigger_training)
+    elif args.benchmark == "encoder":
+        bench_encoder(args.model, args.record, args.iterations)
+    elif args.benchmark == "flat-forest":
+        bench_flat_forest(args.model, args.batch_sizes, args.iterations)
+    elif args.benchmark == "model-load":
+        bench_model_load(args.model, args.iterations)
+    elif args.benchmark == "export-scaling":
+        bench_export_scaling(args.mongodb_url, args.collection, args.rows, args.workers, args.batch_size)
+    elif args.benchmark == "feature-store-format":
+        bench_feature_store_format(args.rows, args.batch_size, args.iterations)
+    elif args.benchmark == "import-time":
+        bench_import_time(args.module, args.runs, args.top)
+
+
+if __name__ == "__main__":
+    main()
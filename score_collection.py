@@ -0,0 +1,41 @@
+"""
+Scores every record of the MongoDB collection with the production model, in parallel.
+
+Usage:
+    python score_collection.py --workers 8 --partitions 64
+    python score_collection.py --output-format parquet
+    python score_collection.py --run-id <run_id>    # resume a crashed run
+"""
+import argparse
+from dataclasses import replace
+
+from src.entity.config_entity import BatchScoringConfig
+from src.pipeline.batch_scoring import BatchScoringJob
+
+
+def main():
+    defaults = BatchScoringConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--run-id", help="id of an earlier run to resume")
+    parser.add_argument("--collection", default=defaults.collection_name)
+    parser.add_argument("--output-collection", default=defaults.output_collection_name)
+    parser.add_argument("--output-format", choices=["mongo", "parquet"], default=defaults.output_format)
+    parser.add_argument("--partitions", type=int, default=defaults.n_partitions)
+    parser.add_argument("--workers", type=int, default=defaults.n_workers)
+    parser.add_argument("--read-batch-size", type=int, default=defaults.read_batch_size)
+    parser.add_argument("--write-batch-size", type=int, default=defaults.write_batch_size)
+    args = parser.parse_args()
+
+    batch_scoring_config = replace(defaults,
+                                   collection_name=args.collection,
+                                   output_collection_name=args.output_collection,
+                                   output_format=args.output_format,
+                                   n_partitions=args.partitions,
+                                   n_workers=args.workers,
+                                   read_batch_size=args.read_batch_size,
+                                   write_batch_size=args.write_batch_size)
+    print(BatchScoringJob(batch_scoring_config=batch_scoring_config, run_id=args.run_id).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Scores a CSV of raw vehicle records with the production model, chunk by chunk.
+
+Usage:
+    python score_csv.py --input partners.csv --output predictions.csv
+    python score_csv.py --s3-key incoming/partners.csv --output predictions.csv
+"""
+import argparse
+import sys
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.pipeline.csv_scoring import CsvBatchScorer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="path to a local CSV file")
+    source.add_argument("--s3-key", help="key of a CSV object in S3")
+    parser.add_argument("--bucket", default=VehiclePredictorConfig().model_bucket_name,
+                        help="S3 bucket of --s3-key")
+    parser.add_argument("--output", help="path of the output CSV (defaults to stdout)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="rows parsed and scored per chunk")
+    args = parser.parse_args()
+
+    scorer = CsvBatchScorer(chunk_size=args.chunk_size)
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.input:
+            with open(args.input, "r", newline="") as input_file:
+                for text in scorer.score_file(input_file):
+                    output.write(text)
+        else:
+            for text in scorer.score_s3_object(s3_key=args.s3_key, bucket_name=args.bucket):
+                output.write(text)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
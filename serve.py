@@ -0,0 +1,41 @@
+"""
+Production server: loads the model once, then forks workers that share it copy-on-write.
+
+Usage:
+    python serve.py --workers 8
+    kill -HUP <master pid>     # recycle workers one at a time
+    kill -TERM <master pid>    # drain workers and stop
+"""
+import argparse
+from dataclasses import replace
+
+from src.entity.config_entity import ServerConfig
+from src.pipeline.prefork_server import PreforkServer
+
+
+def main():
+    defaults = ServerConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=defaults.host)
+    parser.add_argument("--port", type=int, default=defaults.port)
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--max-requests", type=int, default=defaults.max_requests,
+                        help="requests after which a worker is recycled (0 disables)")
+    parser.add_argument("--max-requests-jitter", type=int, default=defaults.max_requests_jitter)
+    parser.add_argument("--graceful-timeout", type=float, default=defaults.graceful_timeout_seconds)
+    args = parser.parse_args()
+
+    server_config = replace(defaults,
+                            host=args.host,
+                            port=args.port,
+                            workers=args.workers,
+                            max_requests=args.max_requests,
+                            max_requests_jitter=args.max_requests_jitter,
+                            graceful_timeout_seconds=args.graceful_timeout)
+
+    from app import app
+    PreforkServer(app, server_config=server_config).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import boto3
 from src.configuration.aws_connection import S3Client
 from io import StringIO
-from typing import Union,List
+from typing import Optional, Union, List
 import os,sys
 from src.logger import logging
 from mypy_boto3_s3.service_resource import Bucket
@@ -44,6 +44,32 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys)
 
+    def get_object_version(self, bucket_name: str, s3_key: str) -> str:
+        """
+        Fetches the version tag of an S3 object with a single HEAD request.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key path of the object.
+
+        Returns:
+            str: The object's ETag, suffixed with its VersionId when bucket versioning is enabled.
+        """
+        try:
+            return self.format_version(self.s3_client.head_object(Bucket=bucket_name, Key=s3_key))
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @staticmethod
+    def format_version(response: dict) -> str:
+        """
+        Builds the version tag of an object from a HEAD or GET response: the ETag, suffixed
+        with the VersionId when bucket versioning is enabled.
+        """
+        etag = response["ETag"].strip('"')
+        version_id = response.get("VersionId")
+        return f"{etag}:{version_id}" if version_id and version_id != "null" else etag
+
     @staticmethod
     def read_object(object_name: str, decode: bool = True, make_readable: bool = False) -> Union[StringIO, str]:
         """
@@ -71,6 +97,50 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def get_object_stream(self, bucket_name: str, s3_key: str):
+        """
+        Opens the specified S3 object as a file-like stream without reading it into memory.
+
+        Args:
+            bucket_name (str): The name of the S3 bucket.
+            s3_key (str): The key of the object.
+
+        Returns:
+            StreamingBody: Object body that can be read incrementally, e.g. by pandas.read_csv.
+        """
+        try:
+            return self.s3_client.get_object(Bucket=bucket_name, Key=s3_key)["Body"]
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_object_if_changed(self, bucket_name: str, s3_key: str, version: Optional[str] = None) -> Optional[dict]:
+        """
+        Conditional GET of an S3 object: the body is only sent if it changed since `version`.
+
+        Args:
+            bucket_name (str): The name of the S3 bucket.
+            s3_key (str): The key of the object.
+            version (str): Version tag of the copy the caller already has, as returned by get_object_version.
+
+        Returns:
+            dict: None if the object still has that ETag (HTTP 304), otherwise the get_object
+                  response with its version tag added under "Version".
+        """
+        try:
+            request = {"Bucket": bucket_name, "Key": s3_key, "ChecksumMode": "ENABLED"}
+            if version:
+                request["IfNoneMatch"] = f'"{version.split(":")[0]}"'
+            try:
+                response = self.s3_client.get_object(**request)
+            except ClientError as e:
+                if e.response["Error"]["Code"] in ("304", "NotModified"):
+                    return None
+                raise
+            response["Version"] = self.format_version(response)
+            return response
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def get_bucket(self, bucket_name: str) -> Bucket:
         """
         Retrieves the S3 bucket object based on the provided bucket name.
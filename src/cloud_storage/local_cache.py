@@ -0,0 +1,200 @@
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from src.exception import MyException
+from src.logger import logging
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class LocalArtifactCache:
+    """
+    Content-addressed local disk cache for artifacts downloaded from S3, such as the production model.
+
+    Every downloaded object is stored once under objects/<sha256 of its content>, and index.json
+    maps each bucket/key@version (ETag, plus VersionId on versioned buckets) to its blob and
+    remembers the latest version seen for every bucket/key. fetch() sends a conditional GET
+    with the cached ETag, so an unchanged object costs one request and no download. Blobs are
+    re-hashed before first use in a process and after any change on disk, and downloads are
+    checked against the S3 checksum. If S3 cannot be reached, the last good version is served
+    from disk.
+
+    The least recently used versions are evicted once the blobs exceed max_bytes; the latest
+    version of every object is kept. The directory can be shared by several processes (e.g.
+    pre-fork workers): downloads of one object are serialized with a file lock, so only the
+    first process downloads a new version and the others get a 304 and reuse its blob.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.locks_dir = os.path.join(cache_dir, "locks")
+        self.index_file_path = os.path.join(cache_dir, "index.json")
+        # BLOBS WHOSE CHECKSUM THIS PROCESS ALREADY VERIFIED, WITH THEIR (SIZE, MTIME) AT THAT TIME
+        self._verified: Dict[str, Tuple[int, int]] = {}
+
+    @contextmanager
+    def _lock(self, name: str):
+        os.makedirs(self.locks_dir, exist_ok=True)
+        with open(os.path.join(self.locks_dir, f"{name}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self) -> dict:
+        if not os.path.exists(self.index_file_path):
+            return {"entries": {}, "latest": {}}
+        with open(self.index_file_path, "r") as index_file:
+            return json.load(index_file)
+
+    def _write_index(self, index: dict) -> None:
+        temp_path = f"{self.index_file_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w") as index_file:
+            json.dump(index, index_file)
+        os.replace(temp_path, self.index_file_path)
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256)
+
+    def _verify(self, entry: dict) -> bool:
+        path = self.blob_path(entry["sha256"])
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self._verified.get(path) == signature:
+            return True
+        if stat.st_size != entry["size"]:
+            return False
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as blob:
+            for chunk in iter(lambda: blob.read(READ_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != entry["sha256"]:
+            return False
+        self._verified[path] = signature
+        return True
+
+    def _download(self, response: dict) -> Tuple[str, int]:
+        """
+        Streams a GET response body into the objects directory and returns its sha256 and size.
+        """
+        os.makedirs(self.objects_dir, exist_ok=True)
+        temp_path = os.path.join(self.objects_dir, f"{uuid.uuid4().hex}.download")
+        sha256, md5, size = hashlib.sha256(), hashlib.md5(), 0
+        try:
+            with open(temp_path, "wb") as blob:
+                for chunk in iter(lambda: response["Body"].read(READ_CHUNK_SIZE), b""):
+                    blob.write(chunk)
+                    sha256.update(chunk)
+                    md5.update(chunk)
+                    size += len(chunk)
+
+            if "ContentLength" in response and size != response["ContentLength"]:
+                raise ValueError(f"Downloaded {size} bytes, expected {response['ContentLength']}")
+            # FULL-OBJECT SHA256 IF THE OBJECT WAS UPLOADED WITH ONE, ELSE THE ETAG WHEN IT IS THE
+            # CONTENT MD5 (SINGLE-PART UPLOAD WITHOUT KMS ENCRYPTION)
+            checksum = response.get("ChecksumSHA256")
+            etag = response["ETag"].strip('"')
+            if checksum and "-" not in checksum:
+                if base64.b64encode(sha256.digest()).decode() != checksum:
+                    raise ValueError("Downloaded object does not match its S3 SHA256 checksum")
+            elif "-" not in etag and response.get("ServerSideEncryption") != "aws:kms":
+                if md5.hexdigest() != etag:
+                    raise ValueError("Downloaded object does not match its S3 ETag")
+
+            sha256 = sha256.hexdigest()
+            os.replace(temp_path, self.blob_path(sha256))
+            return sha256, size
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _evict(self, index: dict) -> None:
+        latest = {f"{object_key}@{version}" for object_key, version in index["latest"].items()}
+        blob_sizes = {entry["sha256"]: entry["size"] for entry in index["entries"].values()}
+        total_bytes = sum(blob_sizes.values())
+
+        for entry_key, entry in sorted(index["entries"].items(), key=lambda item: item[1]["last_used"]):
+            if total_bytes <= self.max_bytes:
+                break
+            if entry_key in latest:
+                continue
+            del index["entries"][entry_key]
+            if all(other["sha256"] != entry["sha256"] for other in index["entries"].values()):
+                total_bytes -= entry["size"]
+                self._verified.pop(self.blob_path(entry["sha256"]), None)
+                if os.path.exists(self.blob_path(entry["sha256"])):
+                    os.remove(self.blob_path(entry["sha256"]))
+                logging.info(f"Evicted {entry_key} from the local artifact cache")
+
+    def _record(self, object_key: str, version: str, sha256: Optional[str] = None,
+                size: Optional[int] = None) -> None:
+        with self._lock("index"):
+            index = self._read_index()
+            entry_key = f"{object_key}@{version}"
+            entry = index["entries"].setdefault(entry_key, {"version": version})
+            if sha256 is not None:
+                entry.update(sha256=sha256, size=size)
+            entry["last_used"] = time.time()
+            index["latest"][object_key] = version
+            self._evict(index)
+            self._write_index(index)
+
+    def fetch(self, s3, bucket_name: str, s3_key: str) -> Tuple[str, str]:
+        """
+        Returns the local path and version of the current S3 object, downloading it only if
+        the cache does not have that version yet.
+
+        :param s3: SimpleStorageService used for the conditional GET
+        :return: (path of the cached blob, version tag of the object)
+        """
+        try:
+            object_key = f"{bucket_name}/{s3_key}"
+            with self._lock(hashlib.sha1(object_key.encode()).hexdigest()):
+                with self._lock("index"):
+                    index = self._read_index()
+                version = index["latest"].get(object_key)
+                entry = index["entries"].get(f"{object_key}@{version}") if version else None
+                if entry is not None and not self._verify(entry):
+                    logging.warning(f"Cached copy of s3://{object_key} at version [{version}] is corrupt, "
+                                    f"downloading it again")
+                    entry = None
+
+                try:
+                    response = s3.get_object_if_changed(bucket_name=bucket_name, s3_key=s3_key,
+                                                        version=entry["version"] if entry else None)
+                except Exception as e:
+                    if entry is None:
+                        raise
+                    logging.warning(f"S3 unreachable, serving last good version [{version}] of "
+                                    f"s3://{object_key} from the local cache: {e}")
+                    self._record(object_key, version)
+                    return self.blob_path(entry["sha256"]), version
+
+                if response is None:
+                    logging.info(f"s3://{object_key} unchanged at version [{version}], using the local cache")
+                    self._record(object_key, version)
+                    return self.blob_path(entry["sha256"]), version
+
+                sha256, size = self._download(response)
+                self._verified[self.blob_path(sha256)] = (size, os.stat(self.blob_path(sha256)).st_mtime_ns)
+                self._record(object_key, response["Version"], sha256, size)
+                logging.info(f"Downloaded s3://{object_key} at version [{response['Version']}] "
+                             f"({size} bytes) into the local cache")
+                return self.blob_path(sha256), response["Version"]
+        except Exception as e:
+            raise MyException(e, sys) from e
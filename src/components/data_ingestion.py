@@ -1,14 +1,58 @@
+import math
 import os
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from datetime import datetime
+from typing import Dict, List, Optional
 
+import numpy as np
 from pandas import DataFrame
 from sklearn.model_selection import train_test_split
 
+from src.constants import DATABASE_NAME, SCHEMA_FILE_PATH
 from src.entity.config_entity import DataIngestionConfig
 from src.entity.artifact_entity import DataIngestionArtifact
 from src.exception import MyException
 from src.logger import logging
+from src.data_access.feature_store import PersistentFeatureStore
+from src.data_access.ingestion_cache import IngestionCache
 from src.data_access.proj1_data import ProjectData
+from src.utils.dataset_utils import DataFrameWriter, get_arrow_schema, iter_dataframe_batches, read_dataframe, \
+    write_dataframe
+from src.utils.main_utils import read_yaml_file
+
+
+def _and_query(*queries: Optional[Dict]) -> Dict:
+    queries = [query for query in queries if query]
+    if len(queries) > 1:
+        return {"$and": queries}
+    return queries[0] if queries else {}
+
+
+def _export_partition(partition: Dict, data_ingestion_config: DataIngestionConfig, shard_file_path: str,
+                      columns: List[str], arrow_schema, query: Optional[Dict] = None) -> int:
+    """
+    Streams one key range of the collection into its feature store shard. Runs inside a worker
+    process, which opens its own Mongo client; returns the number of rows written.
+
+    Failures are re-raised as RuntimeError: MyException cannot be unpickled in the parent, where
+    it would surface as a BrokenProcessPool instead of its cause.
+    """
+    try:
+        return ProjectData().export_collection_to_file(
+            collection_name=data_ingestion_config.collection_name,
+            file_path=shard_file_path,
+            columns=columns,
+            batch_size=data_ingestion_config.export_batch_size,
+            query=_and_query(ProjectData.partition_filter(partition, data_ingestion_config.export_partition_key),
+                             query),
+            arrow_schema=arrow_schema
+        )
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}")
+
 
 class DataIngestion:
 
@@ -44,10 +88,30 @@ class DataIngestion:
         except Exception as e:
             raise MyException(e, sys)
 
+    def get_projection(self) -> List[str]:
+        """
+        Fields read from the collection: _id and the schema columns, without the `id` column that
+        ingestion drops anyway.
+        """
+        schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+        return ["_id"] + [name for column in schema_config["columns"] for name in column if name != "id"]
+
+    def get_arrow_schema(self):
+        """
+        Column types of the feature store and train/test Parquet files, from config/schema.yaml.
+        """
+        return get_arrow_schema(read_yaml_file(file_path=SCHEMA_FILE_PATH), self.get_projection())
+
+    def get_file_extension(self) -> str:
+        """
+        Extension, and so format, of every dataset file ingestion writes: that of the feature store file.
+        """
+        return os.path.splitext(self.data_ingestion_config.feature_store_file_path)[1]
+
     def export_data_into_feature_store(self) -> DataFrame:
         """
         Method Name :   export_data_into_feature_store
-        Description :   This method exports data from MongoDB collection to a local CSV file (feature store).
+        Description :   This method exports data from MongoDB collection to a local Parquet (or CSV) file (feature store).
 
         Output      :   DataFrame containing the full dataset extracted from MongoDB.
         On Failure  :   Raises a MyException with traceback info.
@@ -56,15 +120,17 @@ class DataIngestion:
         ------
         1. Fetch data from MongoDB using Proj1Data().
         2. Log the shape of the dataset.
-        3. Create the directory for saving the CSV file (if it doesn't exist).
-        4. Save the dataframe as a CSV at the feature store location.
+        3. Create the directory for saving the feature store file (if it doesn't exist).
+        4. Save the dataframe as Parquet (or CSV) at the feature store location.
         """
         try:
             logging.info("Exporting data from Mongo-DB")
             project_data_object = ProjectData()
 
             dataframe = project_data_object.export_collection_as_dataframe(
-                collection_name=self.data_ingestion_config.collection_name
+                collection_name=self.data_ingestion_config.collection_name,
+                columns=self.get_projection(),
+                batch_size=self.data_ingestion_config.export_batch_size
             )
             logging.info(f"Data successfully fetched with shape: {dataframe.shape}")
 
@@ -75,21 +141,249 @@ class DataIngestion:
 
             logging.info(f"Saving exported data to feature store path: {feature_store_file_path}")
 
-            # Saving the data to a CSV file
-            dataframe.to_csv(feature_store_file_path, index=False, header=True)
+            # Saving the data to a Parquet (or CSV) file
+            write_dataframe(dataframe, feature_store_file_path, self.get_arrow_schema())
 
             return dataframe
 
         except Exception as e:
             raise MyException(e, sys)
 
+    def stream_data_into_feature_store(self, query: Optional[Dict] = None, output_dir: Optional[str] = None) -> int:
+        """
+        Method Name :   stream_data_into_feature_store
+        Description :   This method streams the MongoDB collection (or the documents matching
+                        query) into the feature store file in batches of export_batch_size
+                        documents, with a server-side projection. With output_dir, the data is
+                        written there as part-* shards instead.
+
+        Output      :   Number of rows written to the feature store.
+        On Failure  :   Raises a MyException with traceback info.
+
+        Only one batch is in memory at a time, so peak memory is bounded by the batch size and
+        not by the size of the collection. With more than one export worker the collection is
+        exported in parallel instead, see export_partitions_in_parallel.
+        """
+        try:
+            if self.data_ingestion_config.export_workers > 1:
+                return self.export_partitions_in_parallel(query=query, shard_dir=output_dir)
+
+            logging.info("Streaming data from Mongo-DB into the feature store")
+            feature_store_file_path = os.path.join(output_dir, f"part-00000{self.get_file_extension()}") \
+                if output_dir else self.data_ingestion_config.feature_store_file_path
+            n_rows = ProjectData().export_collection_to_file(
+                collection_name=self.data_ingestion_config.collection_name,
+                file_path=feature_store_file_path,
+                columns=self.get_projection(),
+                batch_size=self.data_ingestion_config.export_batch_size,
+                query=query,
+                arrow_schema=self.get_arrow_schema()
+            )
+            logging.info(f"Streamed {n_rows} rows to feature store path: {feature_store_file_path}")
+            return n_rows
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def export_partitions_in_parallel(self, query: Optional[Dict] = None, shard_dir: Optional[str] = None) -> int:
+        """
+        Method Name :   export_partitions_in_parallel
+        Description :   This method splits the collection into export_partitions ranges of
+                        export_partition_key and streams them (restricted to query, if given)
+                        concurrently on a pool of export_workers processes, each partition into
+                        its own shard <shard_dir>/part-<index>. shard_dir defaults to
+                        feature_store_shard_dir.
+
+        Output      :   Total number of rows written to the shards.
+        On Failure  :   Raises a MyException with traceback info.
+
+        Reading, BSON decoding and file writing of a single cursor are bound to one core; here
+        every worker runs its own cursor, so they scale with the number of workers until the
+        database or the disk becomes the bottleneck. There are more partitions than workers so
+        uneven ranges still balance out.
+        """
+        try:
+            project_data_object = ProjectData()
+            partitions = project_data_object.get_id_partitions(
+                collection_name=self.data_ingestion_config.collection_name,
+                n_partitions=self.data_ingestion_config.export_partitions,
+                key=self.data_ingestion_config.export_partition_key
+            )
+            columns = self.get_projection()
+            arrow_schema = self.get_arrow_schema()
+
+            shard_dir = shard_dir or self.data_ingestion_config.feature_store_shard_dir
+            shutil.rmtree(shard_dir, ignore_errors=True)
+            os.makedirs(shard_dir, exist_ok=True)
+            n_workers = min(self.data_ingestion_config.export_workers, len(partitions))
+            logging.info(f"Exporting {len(partitions)} partitions of Mongo-DB collection "
+                         f"[{self.data_ingestion_config.collection_name}] with {n_workers} workers")
+
+            n_rows = 0
+            # SPAWNED WORKERS OPEN THEIR OWN MONGO CLIENTS; PYMONGO CLIENTS ARE NOT FORK SAFE
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=get_context("spawn")) as executor:
+                futures = {executor.submit(_export_partition, partition, self.data_ingestion_config,
+                                           os.path.join(shard_dir, f"part-{partition['index']:05d}"
+                                                                   f"{self.get_file_extension()}"),
+                                           columns, arrow_schema, query): partition
+                           for partition in partitions}
+                for future in as_completed(futures):
+                    try:
+                        rows = future.result()
+                    except Exception as e:
+                        # THE SHARDS ARE INCOMPLETE EITHER WAY: DON'T START THE PARTITIONS STILL QUEUED
+                        for pending in futures:
+                            pending.cancel()
+                        raise RuntimeError(f"Export of partition {futures[future]['index']} failed: {e}") from e
+                    n_rows += rows
+                    logging.info(f"Partition {futures[future]['index']} exported: {rows} rows")
+
+            logging.info(f"Exported {n_rows} rows to feature store shards in: {shard_dir}")
+            return n_rows
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_persistent_feature_store(self) -> PersistentFeatureStore:
+        return PersistentFeatureStore(os.path.join(self.data_ingestion_config.persistent_feature_store_dir,
+                                                   self.data_ingestion_config.collection_name),
+                                      file_extension=self.get_file_extension())
+
+    def get_refresh_reason(self, project_data_object: ProjectData, feature_store: PersistentFeatureStore,
+                           watermark: Optional[Dict], columns: List[str]) -> Optional[str]:
+        """
+        Checks the fingerprint saved with the watermark against the collection and returns why
+        the feature store needs a full refresh, or None if an incremental update is safe.
+
+        The fingerprint is the configuration (including the file format) the store was built with and the number of
+        documents with an _id up to the watermark. Deletions, or documents inserted with an _id
+        below the watermark (ObjectIds from several clients are only roughly ordered), change
+        that count, and neither can be picked up by fetching newer documents. In-place updates
+        are only fetched through update_field, so without one the store is rebuilt on every run
+        unless the collection is declared append_only.
+        """
+        if watermark is None:
+            return "no feature store yet"
+        if self.data_ingestion_config.update_field is None and not self.data_ingestion_config.append_only:
+            return "no update field to detect in-place updates, and the collection is not declared append-only"
+        if (watermark["collection_name"], watermark["columns"], watermark["update_field"],
+                watermark.get("file_extension")) != (self.data_ingestion_config.collection_name, columns,
+                                                     self.data_ingestion_config.update_field, feature_store.file_extension):
+            return "collection, columns, update field or file format changed"
+        if watermark["last_id"] is None:
+            return "feature store is empty"
+        id_count = project_data_object.count_documents(self.data_ingestion_config.collection_name,
+                                                       {"_id": {"$lte": watermark["last_id"]}})
+        if id_count != watermark["id_count"]:
+            return f"{id_count} documents up to the watermark, {watermark['id_count']} when it was saved"
+        if feature_store.count_delta_shards() >= self.data_ingestion_config.max_delta_shards:
+            return f"{self.data_ingestion_config.max_delta_shards} incremental updates since the last full export"
+        return None
+
+    def sync_persistent_feature_store(self) -> int:
+        """
+        Method Name :   sync_persistent_feature_store
+        Description :   This method brings the persistent feature store up to date with the
+                        collection: only documents with an _id above the watermark (and, with
+                        update_field set, documents updated since the watermark) are fetched
+                        into a new delta shard, and older copies of updated documents are
+                        removed from the store. If the fingerprint does not match, or neither
+                        update_field nor append_only is set, the store is rebuilt with a full
+                        export instead.
+
+        Output      :   Number of rows in the feature store.
+        On Failure  :   Raises a MyException with traceback info.
+
+        Call it while holding the store lock.
+        """
+        try:
+            collection_name = self.data_ingestion_config.collection_name
+            update_field = self.data_ingestion_config.update_field
+            feature_store = self.get_persistent_feature_store()
+            project_data_object = ProjectData()
+            columns = self.get_projection()
+            watermark = feature_store.read_watermark()
+            refresh_reason = self.get_refresh_reason(project_data_object, feature_store, watermark, columns)
+
+            # THE NEW WATERMARK IS READ BEFORE EXPORTING AND BOUNDS THE EXPORT QUERIES, SO DOCUMENTS
+            # WRITTEN WHILE THE EXPORT RUNS ARE LEFT FOR THE NEXT RUN INSTEAD OF BEING FETCHED TWICE
+            last_id = project_data_object.get_max_value(collection_name, "_id")
+            last_updated = project_data_object.get_max_value(collection_name, update_field) if update_field else None
+            id_query = {"_id": {"$lte": last_id}} if last_id is not None else None
+            new_watermark = {
+                "collection_name": collection_name,
+                "columns": columns,
+                "update_field": update_field,
+                "file_extension": feature_store.file_extension,
+                "last_id": last_id,
+                "id_count": project_data_object.count_documents(collection_name, id_query) if id_query else 0,
+                "last_updated": last_updated,
+                "synced_at": datetime.now().isoformat(),
+            }
+
+            if refresh_reason is not None:
+                logging.info(f"Full refresh of the feature store in {feature_store.store_dir}: {refresh_reason}")
+                with feature_store.refresh() as staging_dir:
+                    n_rows = self.stream_data_into_feature_store(query=id_query, output_dir=staging_dir)
+                    feature_store.write_watermark(staging_dir, dict(new_watermark, sequence=0, rows=n_rows))
+                return n_rows
+
+            delta_query = {"_id": {"$gt": watermark["last_id"], "$lte": last_id}}
+            if last_updated is not None:
+                updated_range = {"$lte": last_updated}
+                if watermark["last_updated"] is not None:
+                    updated_range["$gt"] = watermark["last_updated"]
+                delta_query = {"$or": [delta_query, {update_field: updated_range}]}
+
+            sequence = watermark["sequence"] + 1
+            delta_shard_path = feature_store.delta_shard_path(sequence)
+            delta_rows = project_data_object.export_collection_to_file(
+                collection_name=collection_name,
+                file_path=delta_shard_path,
+                columns=columns,
+                batch_size=self.data_ingestion_config.export_batch_size,
+                query=delta_query,
+                arrow_schema=self.get_arrow_schema()
+            )
+
+            removed_rows = 0
+            if delta_rows == 0:
+                os.remove(delta_shard_path)
+                sequence = watermark["sequence"]
+            elif update_field:
+                changed_ids = set(read_dataframe(delta_shard_path, columns=["_id"])["_id"].astype(str))
+                removed_rows = feature_store.remove_ids(changed_ids, self.data_ingestion_config.export_batch_size,
+                                                        keep=delta_shard_path)
+
+            n_rows = watermark["rows"] - removed_rows + delta_rows
+            feature_store.write_watermark(feature_store.store_dir, dict(new_watermark, sequence=sequence, rows=n_rows))
+            logging.info(f"Incremental update of the feature store in {feature_store.store_dir}: "
+                         f"{delta_rows} new or changed rows, {removed_rows} replaced, {n_rows} rows in total")
+            return n_rows
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_feature_store_files(self) -> List[str]:
+        """
+        Files of the feature store, in order: the shards of the persistent store in incremental
+        mode, of a parallel export, else the single feature store file.
+        """
+        if self.data_ingestion_config.streaming_export and self.data_ingestion_config.incremental:
+            return self.get_persistent_feature_store().get_shard_files()
+        if self.data_ingestion_config.export_workers > 1:
+            shard_dir = self.data_ingestion_config.feature_store_shard_dir
+            return [os.path.join(shard_dir, file_name) for file_name in sorted(os.listdir(shard_dir))
+                    if file_name.endswith(self.get_file_extension())]
+        return [self.data_ingestion_config.feature_store_file_path]
+
 
     def split_data_as_train_test(self, dataframe: DataFrame) ->None:
         """
         Method Name :   split_data_as_train_test
         Description :   This method splits the dataset into training and testing sets based on a given ratio.
 
-        Output      :   Saves train.csv and test.csv in specified paths.
+        Output      :   Saves the train and test files (Parquet or CSV) in specified paths.
         On Failure  :   Raises MyException on error.
 
         Steps:
@@ -113,22 +407,158 @@ class DataIngestion:
 
             logging.info(f"Exporting train and test datasets to files...")
 
-            # Save train and test datasets to CSV
+            # Save train and test datasets to Parquet (or CSV)
+            arrow_schema = self.get_arrow_schema()
+            write_dataframe(TRAIN, self.data_ingestion_config.training_data_file_path, arrow_schema)
+            write_dataframe(TEST, self.data_ingestion_config.testing_data_file_path, arrow_schema)
+
+            logging.info("Successfully saved train and test datasets.")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def split_feature_store_as_train_test(self, n_rows: int) -> None:
+        """
+        Method Name :   split_feature_store_as_train_test
+        Description :   Streaming counterpart of split_data_as_train_test: reads the feature store
+                        (or its shards) in batches and appends every row to the train or test file.
+
+        Output      :   Saves the train and test files (Parquet or CSV) in specified paths.
+        On Failure  :   Raises MyException on error.
+
+        The test set is a uniformly random subset of exactly ceil(n_rows * split ratio) rows, the
+        same size train_test_split picks. Each batch draws how many of the remaining test rows
+        it holds from a hypergeometric distribution, then picks that many of its rows at random,
+        so no index over the whole dataset is ever built. Rows are copied unchanged (CSV rows as
+        text, Parquet rows with their types) and keep their feature store order within each file.
+        """
+        logging.info("Entered split_feature_store_as_train_test method of DataIngestion class")
+
+        try:
+            rng = np.random.default_rng()
+            remaining_rows = n_rows
+            remaining_test_rows = math.ceil(n_rows * self.data_ingestion_config.train_test_split_ratio)
+
+            dir_path = os.path.dirname(self.data_ingestion_config.testing_data_file_path)
+            os.makedirs(dir_path, exist_ok=True)
 
-            TRAIN.to_csv(self.data_ingestion_config.training_data_file_path, index=False, header=True)
-            TEST.to_csv(self.data_ingestion_config.testing_data_file_path, index=False, header=True)
+            arrow_schema = self.get_arrow_schema()
+            with DataFrameWriter(self.data_ingestion_config.training_data_file_path, arrow_schema) as train_writer, \
+                    DataFrameWriter(self.data_ingestion_config.testing_data_file_path, arrow_schema) as test_writer:
+                batches = (batch for file_path in self.get_feature_store_files()
+                           for batch in iter_dataframe_batches(file_path, self.data_ingestion_config.export_batch_size))
+                for batch in batches:
+                    n_test = int(rng.hypergeometric(remaining_test_rows, remaining_rows - remaining_test_rows,
+                                                    len(batch))) if remaining_test_rows else 0
+                    is_test = np.zeros(len(batch), dtype=bool)
+                    is_test[rng.choice(len(batch), size=n_test, replace=False)] = True
+
+                    train_writer.write(batch[~is_test])
+                    test_writer.write(batch[is_test])
+                    remaining_rows -= len(batch)
+                    remaining_test_rows -= n_test
 
             logging.info("Successfully saved train and test datasets.")
         except Exception as e:
             raise MyException(e, sys)
 
 
+    def get_ingestion_cache(self) -> IngestionCache:
+        return IngestionCache(self.data_ingestion_config.cache_dir,
+                              max_entries=self.data_ingestion_config.cache_max_entries,
+                              max_age_seconds=self.data_ingestion_config.cache_max_age_seconds)
+
+    def get_collection_fingerprint(self) -> Dict:
+        """
+        Method Name :   get_collection_fingerprint
+        Description :   This method fingerprints the source collection and the settings that shape
+                        the train/test files, for the ingestion cache.
+
+        Output      :   Dict that changes whenever the ingested data would.
+        On Failure  :   Raises MyException on error.
+
+        The document count and the largest _id (ObjectIds grow with insertion time) catch
+        inserts and deletes from the indexes alone. An in-place update is only caught through
+        the largest update_field, if configured, or through the server-side dbHash of the
+        whole collection when cache_hash_collection is on; with neither, the cache is only used
+        for a collection declared append_only (see can_detect_updates).
+        """
+        try:
+            project_data_object = ProjectData()
+            collection_name = self.data_ingestion_config.collection_name
+            fingerprint = {
+                "database_name": DATABASE_NAME,
+                "collection_name": collection_name,
+                "arrow_schema": self.get_arrow_schema().to_string(),
+                "file_extension": self.get_file_extension(),
+                "train_test_split_ratio": self.data_ingestion_config.train_test_split_ratio,
+                "count": project_data_object.count_documents(collection_name, {}),
+                "max_id": project_data_object.get_max_value(collection_name, "_id"),
+            }
+            if self.data_ingestion_config.update_field is not None:
+                fingerprint["update_field"] = self.data_ingestion_config.update_field
+                fingerprint["max_updated"] = project_data_object.get_max_value(
+                    collection_name, self.data_ingestion_config.update_field)
+            if self.data_ingestion_config.cache_hash_collection:
+                fingerprint["hash"] = project_data_object.get_collection_hash(collection_name)
+            return fingerprint
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def can_detect_updates(self) -> bool:
+        """
+        True if the collection fingerprint changes on an in-place update, or if the collection
+        is declared append_only and has none.
+        """
+        return self.data_ingestion_config.update_field is not None \
+            or self.data_ingestion_config.cache_hash_collection or self.data_ingestion_config.append_only
+
+    def export_and_split(self) -> None:
+        """
+        Method Name :   export_and_split
+        Description :   This method calls:
+                        1. sync_persistent_feature_store in incremental mode, else
+                           stream_data_into_feature_store (export_data_into_feature_store
+                           when streaming_export is off)
+                        2. split_feature_store_as_train_test (split_data_as_train_test)
+
+        On Failure  :   Raises MyException on error.
+        """
+        try:
+            # THE SPLIT FILES OF AN EARLIER RUN MAY BE HARD LINKS INTO THE INGESTION CACHE: NEVER WRITE THROUGH THEM
+            for file_path in (self.data_ingestion_config.training_data_file_path,
+                              self.data_ingestion_config.testing_data_file_path):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+            # Step-01 :- Extracting data from Mongo-DB and Saving locally
+            # Step-02 :- Splitting into Train and Test
+            if self.data_ingestion_config.streaming_export and self.data_ingestion_config.incremental:
+                feature_store = self.get_persistent_feature_store()
+                with feature_store.lock():
+                    n_rows = self.sync_persistent_feature_store()
+                    logging.info("Synced the feature store with Mongo-DB")
+                    self.split_feature_store_as_train_test(n_rows)
+            elif self.data_ingestion_config.streaming_export:
+                n_rows = self.stream_data_into_feature_store()
+                logging.info("Fetched data from Mongo-DB")
+                self.split_feature_store_as_train_test(n_rows)
+            else:
+                dataframe = self.export_data_into_feature_store()
+                logging.info("Fetched data from Mongo-DB")
+                self.split_data_as_train_test(dataframe)
+            logging.info("Completed train-test split")
+        except Exception as e:
+            raise MyException(e, sys)
+
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         """
         Method Name :   initiate_data_ingestion
-        Description :   This method acts as the orchestrator that calls:
-                        1. export_data_into_feature_store
-                        2. split_data_as_train_test
+        Description :   This method acts as the orchestrator: it reuses the train/test split of
+                        an earlier run from the ingestion cache when the collection fingerprint
+                        is unchanged, else calls export_and_split and caches its result.
+                        use_cache=False bypasses the cache (the result is still stored). The
+                        cache is not used at all when an in-place update would leave the
+                        fingerprint unchanged (see can_detect_updates).
 
         Output      :   Returns DataIngestionArtifact containing paths to train and test files.
         On Failure  :   Raises MyException with detailed trace.
@@ -140,13 +570,32 @@ class DataIngestion:
         logging.info("Entered initiate_data_ingestion method of DataIngestion class")
 
         try:
-            # Step-01 :- Extracting data from Mongo-DB and Saving locally
-            dataframe = self.export_data_into_feature_store()
-            logging.info("Fetched data from Mongo-DB")
-
-            # Step-02 :- Splitting into Train and Test
-            self.split_data_as_train_test(dataframe)
-            logging.info("Completed train-test split")
+            split_files = {"train": self.data_ingestion_config.training_data_file_path,
+                           "test": self.data_ingestion_config.testing_data_file_path}
+            fingerprint = None
+            if not self.can_detect_updates():
+                logging.info("Ingesting without the cache: set update_field, cache_hash_collection or append_only "
+                             "so that in-place updates of the collection are detected")
+            else:
+                try:
+                    fingerprint = self.get_collection_fingerprint()
+                except Exception as e:
+                    logging.warning(f"Could not fingerprint the collection, ingesting without the cache: {e}")
+
+            if fingerprint is None:
+                self.export_and_split()
+            else:
+                ingestion_cache = self.get_ingestion_cache()
+                cache_key = ingestion_cache.get_key(fingerprint)
+                with ingestion_cache.lock(cache_key):
+                    if self.data_ingestion_config.use_cache and ingestion_cache.restore(cache_key, split_files):
+                        logging.info(f"Collection unchanged since an earlier run, reused the train-test split "
+                                     f"{cache_key} from the ingestion cache")
+                    else:
+                        self.export_and_split()
+                        # A COLLECTION THAT CHANGED DURING THE EXPORT MAY NOT MATCH ITS FINGERPRINT
+                        if self.get_collection_fingerprint() == fingerprint:
+                            ingestion_cache.store(cache_key, fingerprint, split_files)
 
             # Step-03 :- Package output paths into an artifact object
             data_ingestion_artifact = DataIngestionArtifact(
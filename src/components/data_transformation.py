@@ -3,7 +3,6 @@ import sys
 import os
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from imblearn.combine import SMOTEENN
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
@@ -14,6 +13,7 @@ from src.entity.config_entity import DataTransformationConfig
 from src.entity.artifact_entity import DataTransformationArtifact, DataIngestionArtifact, DataValidationArtifact
 from src.exception import MyException
 from src.logger import logging
+from src.utils.dataset_utils import read_dataframe
 from src.utils.main_utils import save_object, save_numpy_array_data, read_yaml_file
 
 
@@ -30,12 +30,17 @@ class DataTransformation:
             raise MyException(e, sys)
 
     @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    def read_data(file_path, columns=None) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return read_dataframe(file_path, columns=columns)
         except Exception as e:
             raise MyException(e, sys)
 
+    def get_model_columns(self) -> list:
+        # ONLY THE SCHEMA COLUMNS ARE READ FROM THE TRAIN/TEST FILES (PARQUET SKIPS _id ON DISK), IN FILE
+        # ORDER, WHICH FIXES THE ORDER OF THE MODEL INPUT COLUMNS
+        return [name for column in self.schema_config["columns"] for name in column if name != "id"]
+
 
     def get_data_transformer_object(self) -> Pipeline:
 
@@ -108,8 +113,10 @@ class DataTransformation:
                 raise Exception(self.data_validation_artifact.message)
 
             # LOAD TRAIN AND TEST DATA
-            train_df = self.read_data(file_path=self.data_ingestion_artifact.trained_file_path)
-            test_df = self.read_data(file_path=self.data_ingestion_artifact.test_file_path)
+            train_df = self.read_data(file_path=self.data_ingestion_artifact.trained_file_path,
+                                      columns=self.get_model_columns())
+            test_df = self.read_data(file_path=self.data_ingestion_artifact.test_file_path,
+                                     columns=self.get_model_columns())
             logging.info("Train-Test data loaded")
 
             input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
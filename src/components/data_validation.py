@@ -2,12 +2,12 @@ import json
 import os
 import sys
 
-import pandas as pd
 from pandas import DataFrame
 
 from src.exception import MyException
 from src.logger import logging
 from src.entity.artifact_entity import DataValidationArtifact, DataIngestionArtifact
+from src.utils.dataset_utils import read_dataframe
 from src.utils.main_utils import read_yaml_file
 from src.entity.config_entity import DataValidationConfig
 from src.constants import SCHEMA_FILE_PATH
@@ -71,7 +71,7 @@ class DataValidation:
     def read_data(file_path) -> DataFrame:
 
         try:
-            return pd.read_csv(file_path)
+            return read_dataframe(file_path)
         except Exception as e:
             raise MyException(e, sys)
 
@@ -3,9 +3,10 @@ from src.entity.artifact_entity import (ModelTrainerArtifact,
                                         DataIngestionArtifact,
                                         ModelEvaluationArtifact)
 from src.exception import MyException
-from src.constants import TARGET_COLUMN
+from src.constants import TARGET_COLUMN, SCHEMA_FILE_PATH
 from src.logger import logging
-from src.utils.main_utils import load_object
+from src.utils.dataset_utils import read_dataframe
+from src.utils.main_utils import load_object, read_yaml_file
 from src.entity.s3_estimator import Proj1Estimator
 
 from sklearn.metrics import f1_score
@@ -91,7 +92,10 @@ class ModelEvaluation:
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
+            schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+            test_df = read_dataframe(self.data_ingestion_artifact.test_file_path,
+                                     columns=[name for column in schema_config["columns"]
+                                              for name in column if name != "id"])
             x, y = test_df.drop(TARGET_COLUMN, axis=1), test_df[TARGET_COLUMN]
 
             logging.info("Test data loaded and now transforming it for prediction.")
@@ -144,6 +148,7 @@ class ModelEvaluation:
                 is_model_accepted=evaluate_model_response.is_model_accepted,
                 s3_model_path = s3_model_path,
                 trained_model_path=self.model_trainer_artifact.trained_model_file_path,
+                serving_model_path=self.model_trainer_artifact.serving_model_file_path,
                 changed_accuracy=evaluate_model_response.difference
             )
 
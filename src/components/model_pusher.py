@@ -38,8 +38,22 @@ class ModelPusher:
 
             logging.info("Uploading new model to S3 bucket.... ")
             self.proj1_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
+            # NO CACHE TO INVALIDATE HERE: THIS RUNS IN THE TRAINING WORKER PROCESS, AND THE SERVING
+            # PROCESSES PICK UP THE NEW OBJECT VERSION THROUGH THEIR ModelVersionPoller
+
+            # THE MEMORY-MAPPABLE COPY IS WHAT THE PREDICTION SERVICE LOADS
+            s3_serving_model_path = None
+            if self.model_evaluation_artifact.serving_model_path:
+                logging.info("Uploading serving model file to S3 bucket.... ")
+                self.s3.upload_file(self.model_evaluation_artifact.serving_model_path,
+                                    to_filename=self.model_pusher_config.s3_serving_model_key_path,
+                                    bucket_name=self.model_pusher_config.bucket_name,
+                                    remove=False)
+                s3_serving_model_path = self.model_pusher_config.s3_serving_model_key_path
+
             model_pusher_artifact = ModelPusherArtifact(bucket_name=self.model_pusher_config.bucket_name,
-                                                        s3_model_path=self.model_pusher_config.s3_model_key_path)
+                                                        s3_model_path=self.model_pusher_config.s3_model_key_path,
+                                                        s3_serving_model_path=s3_serving_model_path)
             logging.info("Uploaded artifacts folder to s3 bucket")
             logging.info(f"Model pusher artifact: [{model_pusher_artifact}]")
             logging.info("Exited initiate_model_pusher method of ModelTrainer class")
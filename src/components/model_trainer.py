@@ -4,6 +4,7 @@ import sys
 from typing import Tuple
 
 import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
 
@@ -13,6 +14,8 @@ from src.utils.main_utils import load_numpy_array_data, load_object, save_object
 from src.entity.config_entity import ModelTrainerConfig
 from src.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact
 from src.entity.estimator import MyModel
+from src.entity.flat_forest import FlatForest
+from src.entity.model_format import save_model_file
 
 class ModelTrainer:
     def __init__(self, data_transformation_artifact: DataTransformationArtifact,
@@ -69,6 +72,59 @@ class ModelTrainer:
             raise MyException(e, sys)
 
 
+    def compile_model(self, trained_model: RandomForestClassifier, test: np.array) -> FlatForest:
+        """
+            Method Name :   compile_model
+            Description :   This function flattens the trained forest into contiguous NumPy arrays
+                            and checks that it reproduces the forest's probabilities on the test set
+
+            Output      :   Returns the FlatForest used for inference
+            On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            logging.info("Compiling trained forest into flat arrays")
+            flat_forest = FlatForest.from_sklearn(trained_model)
+
+            x_test = test[:, :-1]
+            if not np.array_equal(flat_forest.predict_proba(x_test), trained_model.predict_proba(x_test)):
+                raise Exception("Compiled forest does not reproduce the trained model's probabilities")
+            logging.info(f"Compiled forest verified on test data: {flat_forest}")
+            return flat_forest
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def fold_preprocessing(self, my_model: MyModel) -> None:
+        """
+            Method Name :   fold_preprocessing
+            Description :   This function folds the preprocessor's scaling into the compiled forest's
+                            thresholds and checks the folded model against the two-step path
+                            (preprocessing_object.transform followed by the compiled forest) on
+                            inputs sitting exactly on, and just above, every split threshold
+
+            Output      :   Sets folded_model_object on my_model
+            On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            logging.info("Folding preprocessing into the compiled forest thresholds")
+            folded_model = my_model.fold_preprocessing()
+            input_columns = my_model.get_feature_encoder().input_columns
+
+            split_nodes = np.flatnonzero(folded_model.left != np.arange(len(folded_model.left)))
+            thresholds = folded_model.threshold[split_nodes]
+            boundary_values = np.concatenate([thresholds, np.nextafter(thresholds, np.inf)])
+            boundary_inputs = np.zeros((boundary_values.size, len(input_columns)))
+            boundary_inputs[np.arange(boundary_values.size), np.tile(folded_model.feature[split_nodes], 2)] = boundary_values
+
+            two_step_proba = my_model.compiled_model_object.predict_proba(
+                my_model.preprocessing_object.transform(pd.DataFrame(boundary_inputs, columns=input_columns)))
+            if not np.array_equal(folded_model.predict_proba(boundary_inputs), two_step_proba):
+                raise Exception("Folded forest does not reproduce the preprocessing + forest path")
+            logging.info(f"Folded forest verified on {boundary_values.size} threshold boundary inputs")
+
+        except Exception as e:
+            raise MyException(e, sys)
+
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         logging.info("Entered initiate_model_trainer method of ModelTrainer class")
         """
@@ -100,16 +156,28 @@ class ModelTrainer:
                 logging.info("No model found with score above the base score")
                 raise Exception("No model found with score above the base score")
 
+            # Export the forest as flat arrays for faster inference
+            compiled_model = None
+            if self.model_trainer_config.compile_model:
+                compiled_model = self.compile_model(trained_model=trained_model, test=test_arr)
+
             # Save the final model object that includes both preprocessing and the trained model
             logging.info("Saving new model as performance is better than previous one.")
-            my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model)
+            my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model,
+                               compiled_model_object=compiled_model)
+            if compiled_model is not None and self.model_trainer_config.fold_preprocessing:
+                self.fold_preprocessing(my_model)
             save_object(self.model_trainer_config.trained_model_file_path, my_model)
             logging.info("Saved final model object that includes both preprocessing and the trained model")
 
+            # Export the memory-mappable copy the prediction service loads
+            save_model_file(my_model, self.model_trainer_config.serving_model_file_path)
+
             # Create and return the ModelTrainerArtifact
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path=self.model_trainer_config.trained_model_file_path,
                 metric_artifact=metric_artifact,
+                serving_model_file_path=self.model_trainer_config.serving_model_file_path,
             )
             logging.info(f"Model trainer artifact: {model_trainer_artifact}")
             return model_trainer_artifact
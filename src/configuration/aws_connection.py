@@ -31,4 +31,17 @@ class S3Client:
                                                   aws_secret_access_key=secret_access_key,
                                                   region_name=region_name)
         self.s3_resource = S3Client.s3_resource
-        self.s3_client = S3Client.s3_client
\ No newline at end of file
+        self.s3_client = S3Client.s3_client
+
+    @staticmethod
+    def reset() -> None:
+        """
+        Drops the shared client and resource, so the next S3Client builds new ones. A forked
+        process must not reuse the parent's, whose pooled connections are shared sockets.
+        """
+        S3Client.s3_client = None
+        S3Client.s3_resource = None
+
+
+# THE PRE-FORK MASTER CREATES THE CLIENT WHILE PRELOADING THE MODEL; EVERY WORKER OPENS ITS OWN
+os.register_at_fork(after_in_child=S3Client.reset)
@@ -13,15 +13,24 @@ PIPELINE_NAME: str = ""
 ARTIFACT_DIR: str = "artifact"
 
 MODEL_FILE_NAME = "model.pkl"
+# MEMORY-MAPPABLE COPY OF THE MODEL LOADED BY THE SERVING PATH (SEE src/entity/model_format.py)
+SERVING_MODEL_FILE_NAME = "model.mmap"
+# LOCAL DISK CACHE OF MODELS DOWNLOADED FROM S3; MOUNT IT ON A VOLUME TO KEEP IT ACROSS CONTAINER RESTARTS
+MODEL_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "model_cache")
+MODEL_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
 
 TARGET_COLUMN = "Response"
 CURRENT_YEAR = date.today().year
 PREPROCESSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 
 # DATASET RELATED CONSTANTS
-FILE_NAME: str = "data.csv"
-TRAIN_DATA_FILE_NAME: str = "train.csv"
-TEST_DATA_FILE_NAME: str = "test.csv"
+# FORMAT OF THE FEATURE STORE AND TRAIN/TEST FILES: "parquet" (TYPED, COMPRESSED, COLUMNAR) OR "csv"
+DATA_FILE_FORMAT: str = "parquet"
+DATA_FILE_COMPRESSION: str = "zstd"
+DATA_FILE_ROW_GROUP_SIZE: int = 100000
+FILE_NAME: str = f"data.{DATA_FILE_FORMAT}"
+TRAIN_DATA_FILE_NAME: str = f"train.{DATA_FILE_FORMAT}"
+TEST_DATA_FILE_NAME: str = f"test.{DATA_FILE_FORMAT}"
 SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
 
 # AWS RELATED CONSTANTS
@@ -40,6 +49,31 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.25
+# STREAM THE COLLECTION TO DISK IN BATCHES INSTEAD OF LOADING IT INTO ONE DATAFRAME
+DATA_INGESTION_STREAMING_EXPORT: bool = True
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = 10000
+# STREAMING EXPORT WITH MORE THAN ONE WORKER READS _id RANGES OF THE COLLECTION ON A PROCESS POOL,
+# EACH PARTITION WRITTEN TO ITS OWN SHARD OF THE FEATURE STORE
+DATA_INGESTION_FEATURE_STORE_SHARD_DIR: str = "shards"
+DATA_INGESTION_EXPORT_WORKERS: int = 4
+DATA_INGESTION_EXPORT_PARTITIONS: int = 16
+DATA_INGESTION_EXPORT_PARTITION_KEY: str = "_id"
+# INCREMENTAL INGESTION: KEEP A FEATURE STORE ACROSS RUNS AND ONLY FETCH DOCUMENTS ADDED (OR, WITH AN
+# UPDATE FIELD SUCH AS "updated_at", CHANGED) SINCE THE LAST RUN. WITHOUT AN UPDATE FIELD AN IN-PLACE
+# UPDATE CANNOT BE SEEN, SO EVERY RUN IS A FULL EXPORT UNLESS THE COLLECTION IS DECLARED APPEND-ONLY
+DATA_INGESTION_INCREMENTAL: bool = True
+DATA_INGESTION_PERSISTENT_FEATURE_STORE_DIR: str = os.path.join(ARTIFACT_DIR, "feature_store")
+DATA_INGESTION_UPDATE_FIELD = None
+DATA_INGESTION_APPEND_ONLY: bool = False
+DATA_INGESTION_MAX_DELTA_SHARDS: int = 50
+# INGESTION RESULT CACHE: REUSE THE TRAIN/TEST SPLIT OF AN EARLIER RUN WHEN THE COLLECTION FINGERPRINT
+# (DOCUMENT COUNT, MAX _id, MAX UPDATE FIELD AND, OPTIONALLY, THE SERVER-SIDE dbHash) IS UNCHANGED. ONLY
+# USED WHEN AN IN-PLACE UPDATE CHANGES THE FINGERPRINT (UPDATE FIELD OR dbHash) OR THE COLLECTION IS APPEND-ONLY
+DATA_INGESTION_USE_CACHE: bool = True
+DATA_INGESTION_CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "ingestion_cache")
+DATA_INGESTION_CACHE_HASH_COLLECTION: bool = False
+DATA_INGESTION_CACHE_MAX_ENTRIES: int = 5
+DATA_INGESTION_CACHE_MAX_AGE_SECONDS: int = 7 * 24 * 60 * 60
 
 # =================================
 # DATA VALIDATION RELATED CONSTANTS
@@ -68,6 +102,8 @@ MODEL_TRAINER_MIN_SAMPLES_LEAF: int = 6
 MIN_SAMPLE_SPLIT_MAX_DEPTH: int = 10
 MIN_SAMPLE_SPLIT_CRITERION: str = "entropy"
 MIN_SAMPLES_SPLIT_RANDOM_STATE: int = 101
+MODEL_TRAINER_COMPILE_FOREST: bool = True
+MODEL_TRAINER_FOLD_PREPROCESSING: bool = False
 
 # ==================================
 # MODEL EVALUATION RELATED CONSTANTS
@@ -76,7 +112,43 @@ MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02
 MODEL_BUCKET_NAME = "vehicle-insurance-prediction-mlops"
 MODEL_PUSHER_S3_KEY = "model-registry"
 
+# ====================================
+# PREDICTION SERVING RELATED CONSTANTS
+# ====================================
+PREDICTION_MAX_BATCH_SIZE: int = 10000
+MICRO_BATCH_MAX_SIZE: int = 64
+MICRO_BATCH_MAX_WAIT_MS: float = 5.0
+INFERENCE_MAX_WORKERS: int = 4
+INFERENCE_MAX_IN_FLIGHT: int = 256
+PREDICTION_CACHE_MAX_SIZE: int = 100000
+PREDICTION_CACHE_TTL_SECONDS: float = 3600.0
+CSV_SCORING_CHUNK_SIZE: int = 50000
+MODEL_PRELOAD_ON_STARTUP: bool = True
+MODEL_PRELOAD_RETRY_SECONDS: float = 10.0
+MODEL_VERSION_POLL_SECONDS: float = 30.0
+
+# ================================
+# BATCH SCORING RELATED CONSTANTS
+# ================================
+BATCH_SCORING_DIR_NAME: str = "batch_scoring"
+BATCH_SCORING_OUTPUT_COLLECTION_NAME: str = "Vehicle-Insurance-Predictions"
+BATCH_SCORING_OUTPUT_FORMAT: str = "mongo"
+BATCH_SCORING_N_PARTITIONS: int = 32
+BATCH_SCORING_N_WORKERS: int = 4
+BATCH_SCORING_READ_BATCH_SIZE: int = 10000
+BATCH_SCORING_WRITE_BATCH_SIZE: int = 1000
+
 
 APP_HOST = "0.0.0.0"
 APP_PORT = 5000
 
+# ====================================
+# PRE-FORK SERVER RELATED CONSTANTS
+# ====================================
+SERVER_WORKERS: int = os.cpu_count() or 1
+SERVER_MAX_REQUESTS: int = 100000
+SERVER_MAX_REQUESTS_JITTER: int = 10000
+SERVER_GRACEFUL_TIMEOUT_SECONDS: float = 30.0
+# SET BY THE PRE-FORK MASTER FOR ITS WORKERS: ADDRESS OF THE PROCESS THAT OWNS THE TRAINING JOBS
+TRAINING_JOBS_ADDRESS_ENV_KEY = "TRAINING_JOBS_ADDRESS"
+
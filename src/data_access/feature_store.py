@@ -0,0 +1,125 @@
+import fcntl
+import os
+import shutil
+import sys
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set
+
+from bson import json_util
+
+from src.exception import MyException
+from src.logger import logging
+from src.utils.dataset_utils import (DataFrameWriter, is_parquet_file, iter_dataframe_batches, read_arrow_schema,
+                                     temp_file_path)
+
+FULL_EXPORT_SHARD_PREFIX = "part-"
+DELTA_SHARD_PREFIX = "delta-"
+
+
+class PersistentFeatureStore:
+    """
+    Feature store kept across training runs, so ingestion only fetches what changed in MongoDB.
+
+    The store directory holds the rows of the collection as dataset files (Parquet or CSV, given
+    by file_extension): part-* shards written by a full export, then one delta-<sequence> shard
+    per incremental run. watermark.json records how far the store is in sync (the last _id and
+    update timestamp included, see DataIngestion) and the fingerprint checked before the next
+    incremental run.
+
+    A full refresh is written into a staging directory that replaces the store only once it is
+    complete, watermark included. A delta shard is named after the sequence number of the run
+    that writes it, so a run that crashed before saving its watermark is simply redone and
+    overwrites its own shard. Runs sharing the store are serialized with a file lock.
+    """
+
+    def __init__(self, store_dir: str, file_extension: str = ".parquet"):
+        self.store_dir = store_dir
+        self.file_extension = file_extension
+        self.watermark_file_path = os.path.join(store_dir, "watermark.json")
+        self.lock_file_path = f"{store_dir}.lock"
+
+    @contextmanager
+    def lock(self):
+        os.makedirs(os.path.dirname(self.lock_file_path) or ".", exist_ok=True)
+        with open(self.lock_file_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read_watermark(self) -> Optional[Dict]:
+        if not os.path.exists(self.watermark_file_path):
+            return None
+        with open(self.watermark_file_path, "r") as watermark_file:
+            return json_util.loads(watermark_file.read())
+
+    @staticmethod
+    def write_watermark(store_dir: str, watermark: Dict) -> None:
+        # WRITE-THEN-RENAME SO A CRASH NEVER LEAVES A HALF WRITTEN WATERMARK
+        watermark_file_path = os.path.join(store_dir, "watermark.json")
+        temp_path = f"{watermark_file_path}.tmp"
+        with open(temp_path, "w") as watermark_file:
+            watermark_file.write(json_util.dumps(watermark))
+        os.replace(temp_path, watermark_file_path)
+
+    def get_shard_files(self) -> List[str]:
+        if not os.path.isdir(self.store_dir):
+            return []
+        return [os.path.join(self.store_dir, file_name) for file_name in sorted(os.listdir(self.store_dir))
+                if file_name.endswith(self.file_extension)
+                and file_name.startswith((FULL_EXPORT_SHARD_PREFIX, DELTA_SHARD_PREFIX))]
+
+    def count_delta_shards(self) -> int:
+        return sum(os.path.basename(file_path).startswith(DELTA_SHARD_PREFIX) for file_path in self.get_shard_files())
+
+    def delta_shard_path(self, sequence: int) -> str:
+        return os.path.join(self.store_dir, f"{DELTA_SHARD_PREFIX}{sequence:06d}{self.file_extension}")
+
+    @contextmanager
+    def refresh(self):
+        """
+        Yields an empty staging directory for a full export; on success it replaces the store.
+        """
+        staging_dir = f"{self.store_dir}.refresh"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        try:
+            yield staging_dir
+            retired_dir = f"{self.store_dir}.retired"
+            shutil.rmtree(retired_dir, ignore_errors=True)
+            if os.path.exists(self.store_dir):
+                os.replace(self.store_dir, retired_dir)
+            os.replace(staging_dir, self.store_dir)
+            shutil.rmtree(retired_dir, ignore_errors=True)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def remove_ids(self, ids: Set[str], batch_size: int, keep: Optional[str] = None) -> int:
+        """
+        Deletes the rows whose _id is in ids from every shard but `keep`, streaming each shard
+        through in batches and rewriting only the shards that held one of them.
+
+        :return: number of rows removed
+        """
+        try:
+            removed = 0
+            for file_path in self.get_shard_files() if ids else []:
+                if file_path == keep:
+                    continue
+                n_matches = sum(int(batch["_id"].isin(ids).sum())
+                                for batch in iter_dataframe_batches(file_path, batch_size, columns=["_id"]))
+                if n_matches == 0:
+                    continue
+
+                temp_path = temp_file_path(file_path)
+                arrow_schema = read_arrow_schema(file_path) if is_parquet_file(file_path) else None
+                with DataFrameWriter(temp_path, arrow_schema) as shard_writer:
+                    for batch in iter_dataframe_batches(file_path, batch_size):
+                        shard_writer.write(batch[~batch["_id"].isin(ids)])
+                os.replace(temp_path, file_path)
+                removed += n_matches
+            logging.info(f"Removed {removed} superseded rows from the feature store in {self.store_dir}")
+            return removed
+        except Exception as e:
+            raise MyException(e, sys)
@@ -0,0 +1,178 @@
+import fcntl
+import hashlib
+import os
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from bson import json_util
+
+from src.exception import MyException
+from src.logger import logging
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as data_file:
+        for chunk in iter(lambda: data_file.read(READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source_path: str, target_path: str) -> None:
+    # A HARD LINK COSTS NO COPY WHEN BOTH PATHS ARE ON THE SAME FILE SYSTEM; THE TARGET IS
+    # REPLACED ATOMICALLY EITHER WAY
+    os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+    temp_path = os.path.join(os.path.dirname(target_path) or ".", f".tmp-{os.path.basename(target_path)}")
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    try:
+        os.link(source_path, temp_path)
+    except OSError:
+        shutil.copyfile(source_path, temp_path)
+    os.replace(temp_path, target_path)
+
+
+class IngestionCache:
+    """
+    Local cache of ingestion results (the train/test split), keyed on a fingerprint of the
+    source collection and of the ingestion settings, so a training run on unchanged data
+    skips the MongoDB export and the split.
+
+    Every entry lives in <cache_dir>/<key>/, where key is the sha256 of the fingerprint, with
+    its files and a manifest.json recording the fingerprint and the sha256 of every file.
+    Files are checked against the manifest before they are reused, and hard linked (copied
+    across file systems) into place. A run holds the lock of its key while it ingests, so
+    concurrent runs on the same data ingest once and the others reuse the result.
+
+    Entries older than max_age_seconds are evicted, then the least recently used ones beyond
+    max_entries.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int, max_age_seconds: float):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.locks_dir = os.path.join(cache_dir, "locks")
+
+    @staticmethod
+    def get_key(fingerprint: Dict) -> str:
+        return hashlib.sha256(json_util.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    @contextmanager
+    def lock(self, key: str):
+        os.makedirs(self.locks_dir, exist_ok=True)
+        with open(os.path.join(self.locks_dir, f"{key}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_manifest(self, key: str) -> Optional[Dict]:
+        manifest_file_path = os.path.join(self.entry_dir(key), "manifest.json")
+        if not os.path.exists(manifest_file_path):
+            return None
+        with open(manifest_file_path, "r") as manifest_file:
+            return json_util.loads(manifest_file.read())
+
+    @staticmethod
+    def _write_manifest(entry_dir: str, manifest: Dict) -> None:
+        manifest_file_path = os.path.join(entry_dir, "manifest.json")
+        temp_path = f"{manifest_file_path}.tmp"
+        with open(temp_path, "w") as manifest_file:
+            manifest_file.write(json_util.dumps(manifest))
+        os.replace(temp_path, manifest_file_path)
+
+    def restore(self, key: str, targets: Dict[str, str]) -> bool:
+        """
+        Puts the cached files of an entry at the target paths, e.g. {"train": path, "test": path}.
+        Call under lock(key).
+
+        :return: False, leaving the targets alone, if there is no complete and intact entry
+        """
+        try:
+            manifest = self._read_manifest(key)
+            if manifest is None or set(manifest["files"]) != set(targets):
+                return False
+            entry_dir = self.entry_dir(key)
+            for name, cached_file in manifest["files"].items():
+                file_path = os.path.join(entry_dir, cached_file["file_name"])
+                if not os.path.exists(file_path) or os.path.getsize(file_path) != cached_file["size"] \
+                        or _sha256(file_path) != cached_file["sha256"]:
+                    logging.warning(f"Ingestion cache entry {key} is corrupt, removing it")
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                    return False
+
+            for name, cached_file in manifest["files"].items():
+                _link_or_copy(os.path.join(entry_dir, cached_file["file_name"]), targets[name])
+            manifest["last_used"] = time.time()
+            self._write_manifest(entry_dir, manifest)
+            return True
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def store(self, key: str, fingerprint: Dict, files: Dict[str, str]) -> None:
+        """
+        Adds the files of a finished ingestion under key, then applies the retention limits.
+        Call under lock(key).
+        """
+        try:
+            entry_dir = self.entry_dir(key)
+            staging_dir = f"{entry_dir}.staging"
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            os.makedirs(staging_dir)
+            try:
+                manifest = {"fingerprint": fingerprint, "created_at": time.time(), "last_used": time.time(),
+                            "files": {}}
+                for name, file_path in files.items():
+                    file_name = f"{name}{os.path.splitext(file_path)[1]}"
+                    _link_or_copy(file_path, os.path.join(staging_dir, file_name))
+                    manifest["files"][name] = {"file_name": file_name, "size": os.path.getsize(file_path),
+                                               "sha256": _sha256(file_path)}
+                self._write_manifest(staging_dir, manifest)
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(staging_dir, entry_dir)
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            logging.info(f"Stored ingestion result in the ingestion cache as {key}")
+            self.evict(keep=key)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Removes expired entries, then the least recently used ones beyond max_entries. Entries
+        locked by another run are left for a later eviction.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            manifest = self._read_manifest(key) if key != "locks" else None
+            if manifest is not None:
+                entries.append((manifest["last_used"], manifest["created_at"], key))
+
+        now = time.time()
+        n_kept = 0
+        for last_used, created_at, key in sorted(entries, reverse=True):
+            if key == keep or (n_kept < self.max_entries and now - created_at <= self.max_age_seconds):
+                n_kept += 1
+                continue
+            with open(os.path.join(self.locks_dir, f"{key}.lock"), "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                try:
+                    shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+                    logging.info(f"Evicted {key} from the ingestion cache")
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -1,11 +1,17 @@
+import os
 import sys
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import Dict, Iterator, List, Optional
 
 from src.configuration.mongo_db_connection import  MongoDBClient
-from src.constants import DATABASE_NAME
+from src.constants import DATABASE_NAME, DATA_INGESTION_EXPORT_BATCH_SIZE
 from src.exception import MyException
+from src.logger import logging
+from src.utils.dataset_utils import DataFrameWriter, temp_file_path
+
+# RANDOM DOCUMENTS SAMPLED PER PARTITION TO PLACE THE SPLIT POINTS OF get_id_partitions
+PARTITION_SAMPLES_PER_SPLIT = 100
 
 class ProjectData:
 
@@ -16,30 +22,176 @@ class ProjectData:
         except Exception as e:
             raise MyException(e, sys)
 
-    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None) -> pd.DataFrame:
+    def get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        # ACCESSING SPECIFIED COLLECTION FROM THE DEFAULT OR SPECIFIED DATABASE
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
 
-        # EXPORTS AN ENTIRE MONGODB COLLECTION AS A PANDAS DATAFRAME.
+    @staticmethod
+    def _clean_batch(documents: List[dict], columns: Optional[List[str]]) -> pd.DataFrame:
+        df = pd.DataFrame(documents, columns=columns)
+        if "id" in df.columns.to_list():
+            df = df.drop(columns=["id"], axis=1)
+        return df.replace({"na": np.nan})
 
+    def get_max_value(self, collection_name: str, field: str, database_name: Optional[str] = None):
+        """
+        Largest value of `field` in the collection, read from its index, or None if no document has it.
+        """
         try:
-            # ACCESSING SPECIFIED COLLECTION FROM THE DEFAULT OR SPECIFIED DATABASE
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
+            collection = self.get_collection(collection_name, database_name)
+            document = next(collection.find({field: {"$exists": True}}, {field: 1}).sort(field, -1).limit(1), None)
+            return document[field] if document is not None else None
+        except Exception as e:
+            raise MyException(e, sys)
 
-            # CONVERTING COLLECTED DATA TO DATAFRAME
-            print("Fetching data from Mongo-DB")
-            df = pd.DataFrame(list(collection.find()))
-            print(f"Data fetched with len: {len(df)}")
+    def count_documents(self, collection_name: str, query: Dict, database_name: Optional[str] = None) -> int:
+        try:
+            return self.get_collection(collection_name, database_name).count_documents(query)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_collection_hash(self, collection_name: str, database_name: Optional[str] = None) -> Optional[str]:
+        """
+        md5 of the whole collection content computed by the server (dbHash command), or None if
+        the collection does not exist. It reads every document, on the server only, and needs
+        the dbHash privilege.
+        """
+        try:
+            database = self.mongo_client.database if database_name is None else self.mongo_client.client[database_name]
+            return database.command("dbHash", collections=[collection_name])["collections"].get(collection_name)
+        except Exception as e:
+            raise MyException(e, sys)
 
+    def get_id_partitions(self, collection_name: str, n_partitions: int, database_name: Optional[str] = None,
+                          key: str = "_id") -> List[Dict]:
+        """
+        Splits a collection into at most n_partitions contiguous ranges of `key` holding roughly
+        the same number of documents.
 
-            if "id" in df.columns.to_list():
-                df = df.drop(columns=["id"], axis=1)
-            df.replace({"na": np.nan}, inplace=True)
-            return df
+        The split points are quantiles of a $sample of PARTITION_SAMPLES_PER_SPLIT documents per
+        partition, sorted by the server, so the collection is never scanned. The first and the
+        last range are open-ended and together the ranges cover every document, including
+        documents inserted after sampling. `key` should be indexed (the _id index always is).
+
+        :return: list of {"index", "lower", "upper"} dicts, see partition_filter
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            samples = [document[key] for document in collection.aggregate(
+                [{"$sample": {"size": n_partitions * PARTITION_SAMPLES_PER_SPLIT}},
+                 {"$match": {key: {"$exists": True}}},
+                 {"$project": {key: 1}},
+                 {"$sort": {key: 1}}], allowDiskUse=True)]
+
+            boundaries = []
+            for index in range(1, n_partitions):
+                if not samples:
+                    break
+                split_point = samples[index * len(samples) // n_partitions]
+                if not boundaries or split_point != boundaries[-1]:
+                    boundaries.append(split_point)
+
+            edges = [None] + boundaries + [None]
+            return [{"index": index, "lower": edges[index], "upper": edges[index + 1]}
+                    for index in range(len(edges) - 1)]
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def partition_filter(partition: Dict, key: str = "_id") -> Dict:
+        """
+        Query selecting the documents of one range returned by get_id_partitions.
+        """
+        key_range = {}
+        if partition["lower"] is not None:
+            key_range["$gte"] = partition["lower"]
+        if partition["upper"] is not None:
+            key_range["$lt"] = partition["upper"]
+        return {key: key_range} if key_range else {}
+
+    def iter_collection_batches(self, collection_name: str, database_name: Optional[str] = None,
+                                columns: Optional[List[str]] = None,
+                                batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                query: Optional[Dict] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streams a collection, or the documents matching query, as DataFrames of at most
+        batch_size rows.
+
+        The cursor fetches batch_size documents per round trip and, when columns is given, only
+        those fields are sent by the server. Only one batch of documents is held in memory at a
+        time, so memory stays bounded by the batch size however large the collection is.
+
+        :param columns: fields to project on the server; every batch has exactly these columns
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            projection = {column: 1 for column in columns} if columns is not None else None
+            cursor = collection.find(query or {}, projection, batch_size=batch_size)
+            try:
+                documents = []
+                for document in cursor:
+                    documents.append(document)
+                    if len(documents) == batch_size:
+                        yield self._clean_batch(documents, columns)
+                        documents = []
+                if documents:
+                    yield self._clean_batch(documents, columns)
+            finally:
+                cursor.close()
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def export_collection_to_file(self, collection_name: str, file_path: str, database_name: Optional[str] = None,
+                                  columns: Optional[List[str]] = None,
+                                  batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                  query: Optional[Dict] = None, arrow_schema=None) -> int:
+        """
+        Streams a collection into a dataset file one batch at a time and returns the number of rows.
 
+        A .parquet file_path is written as Parquet typed by arrow_schema (see
+        src.utils.dataset_utils), anything else as CSV. Without columns, the columns of the first
+        batch define the file and later batches are aligned to them. The file is written under a
+        temporary name and renamed when complete, so an interrupted export never leaves a partial
+        file at file_path.
+        """
+        try:
+            temp_path = temp_file_path(file_path)
+            header = None
+            try:
+                with DataFrameWriter(temp_path, arrow_schema) as writer:
+                    for df in self.iter_collection_batches(collection_name, database_name, columns, batch_size,
+                                                           query):
+                        if header is None:
+                            header = df.columns.to_list()
+                        writer.write(df.reindex(columns=header))
+                    if header is None and columns is not None:
+                        writer.write(self._clean_batch([], columns))
+                os.replace(temp_path, file_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+            logging.info(f"Exported {writer.n_rows} rows of collection [{collection_name}] to {file_path}")
+            return writer.n_rows
         except Exception as e:
             raise MyException(e, sys)
 
+    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None,
+                                       columns: Optional[List[str]] = None,
+                                       batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE) -> pd.DataFrame:
 
+        # EXPORTS AN ENTIRE MONGODB COLLECTION AS A PANDAS DATAFRAME, BUILT FROM BATCHES OF DOCUMENTS
+        # SO THE WHOLE COLLECTION IS NEVER HELD AS A LIST OF DICTS. USE export_collection_to_file WHEN
+        # THE COLLECTION MAY NOT FIT IN MEMORY.
 
+        try:
+            print("Fetching data from Mongo-DB")
+            batches = list(self.iter_collection_batches(collection_name, database_name, columns, batch_size))
+            df = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame(columns=columns)
+            print(f"Data fetched with len: {len(df)}")
+            return df
+
+        except Exception as e:
+            raise MyException(e, sys)
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class DataIngestionArtifact:
@@ -27,6 +28,7 @@ class ClassificationMetricArtifact:
 class ModelTrainerArtifact:
     trained_model_file_path: str
     metric_artifact: ClassificationMetricArtifact
+    serving_model_file_path: Optional[str] = None
 
 @dataclass
 class ModelEvaluationArtifact:
@@ -34,8 +36,21 @@ class ModelEvaluationArtifact:
     changed_accuracy: float
     s3_model_path: str
     trained_model_path: str
+    serving_model_path: Optional[str] = None
 
 @dataclass
 class ModelPusherArtifact:
     bucket_name: str
-    s3_model_path: str
\ No newline at end of file
+    s3_model_path: str
+    s3_serving_model_path: Optional[str] = None
+
+@dataclass
+class BatchScoringArtifact:
+    run_id: str
+    run_dir: str
+    output_location: str
+    total_partitions: int
+    scored_partitions: int
+    skipped_partitions: int
+    scored_rows: int
+    rejected_rows: int
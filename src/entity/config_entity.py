@@ -1,8 +1,9 @@
 import os
 
 from src.constants import *
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, replace
 from datetime import datetime
+from typing import Optional
 
 TIMESTAMP: str = datetime.now().strftime("%m_%d_%Y_%H_%M_%S")
 
@@ -16,14 +17,45 @@ class TrainingPipeLineConfig:
 training_pipeline_config: TrainingPipeLineConfig = TrainingPipeLineConfig()
 
 
+def with_artifact_dir(config, artifact_dir: str):
+    """
+    Returns a copy of a stage config with every path under the default artifact directory
+    moved under artifact_dir, so several pipeline runs in one process get separate artifacts.
+    """
+    default_dir = training_pipeline_config.artifact_dir
+    changes = {}
+    for config_field in fields(config):
+        value = getattr(config, config_field.name)
+        if isinstance(value, str) and value.startswith(default_dir):
+            changes[config_field.name] = artifact_dir + value[len(default_dir):]
+    return replace(config, **changes)
+
+
 @dataclass
 class DataIngestionConfig:
     data_ingestion_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_INGESTION_DIR_NAME)
     feature_store_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR, FILE_NAME)
+    feature_store_shard_dir: str = os.path.join(data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR,
+                                                DATA_INGESTION_FEATURE_STORE_SHARD_DIR)
     training_data_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TRAIN_DATA_FILE_NAME)
     testing_data_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TEST_DATA_FILE_NAME)
     train_test_split_ratio: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
     collection_name: str = DATA_INGESTION_COLLECTION_NAME
+    streaming_export: bool = DATA_INGESTION_STREAMING_EXPORT
+    export_batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE
+    export_workers: int = DATA_INGESTION_EXPORT_WORKERS
+    export_partitions: int = DATA_INGESTION_EXPORT_PARTITIONS
+    export_partition_key: str = DATA_INGESTION_EXPORT_PARTITION_KEY
+    incremental: bool = DATA_INGESTION_INCREMENTAL
+    persistent_feature_store_dir: str = DATA_INGESTION_PERSISTENT_FEATURE_STORE_DIR
+    update_field: Optional[str] = DATA_INGESTION_UPDATE_FIELD
+    append_only: bool = DATA_INGESTION_APPEND_ONLY
+    max_delta_shards: int = DATA_INGESTION_MAX_DELTA_SHARDS
+    use_cache: bool = DATA_INGESTION_USE_CACHE
+    cache_dir: str = DATA_INGESTION_CACHE_DIR
+    cache_hash_collection: bool = DATA_INGESTION_CACHE_HASH_COLLECTION
+    cache_max_entries: int = DATA_INGESTION_CACHE_MAX_ENTRIES
+    cache_max_age_seconds: int = DATA_INGESTION_CACHE_MAX_AGE_SECONDS
 
 @dataclass
 class DataValidationConfig:
@@ -37,11 +69,11 @@ class DataTransformationConfig:
                                                 )
     transform_train_file_path: str = os.path.join(data_transformation_dir,
                                                   DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
-                                                  TRAIN_DATA_FILE_NAME.replace("csv", "npy")
+                                                  TRAIN_DATA_FILE_NAME.replace(DATA_FILE_FORMAT, "npy")
                                                   )
     transform_test_file_path: str = os.path.join(data_transformation_dir,
                                                  DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
-                                                 TEST_DATA_FILE_NAME.replace("csv", "npy")
+                                                 TEST_DATA_FILE_NAME.replace(DATA_FILE_FORMAT, "npy")
                                                  )
     transformed_object_file_path: str = os.path.join(data_transformation_dir,
                                                      DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
@@ -53,8 +85,11 @@ class DataTransformationConfig:
 class ModelTrainerConfig:
     model_trainer_dir: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_TRAINER_DIR_NAME)
     trained_model_file_path: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_FILE_NAME)
+    serving_model_file_path: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, SERVING_MODEL_FILE_NAME)
     expected_accuracy: float = MODEL_TRAINER_EXPECTED_SCORE
     model_config_file_path: str = MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
+    compile_model: bool = MODEL_TRAINER_COMPILE_FOREST
+    fold_preprocessing: bool = MODEL_TRAINER_FOLD_PREPROCESSING
     _n_estimators = MODEL_TRAINER_N_ESTIMATORS
     _min_samples_split = MODEL_TRAINER_MIN_SAMPLES_SPLIT
     _min_samples_leaf = MODEL_TRAINER_MIN_SAMPLES_LEAF
@@ -94,11 +129,45 @@ class ModelEvaluationConfig:
 class ModelPusherConfig:
     bucket_name: str = MODEL_BUCKET_NAME
     s3_model_key_path: str = MODEL_FILE_NAME
+    s3_serving_model_key_path: str = SERVING_MODEL_FILE_NAME
 
 @dataclass
 class VehiclePredictorConfig:
-    model_file_path: str = MODEL_FILE_NAME
+    model_file_path: str = SERVING_MODEL_FILE_NAME
     model_bucket_name: str = MODEL_BUCKET_NAME
+    max_batch_size: int = PREDICTION_MAX_BATCH_SIZE
+    micro_batch_max_size: int = MICRO_BATCH_MAX_SIZE
+    micro_batch_max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS
+    inference_max_workers: int = INFERENCE_MAX_WORKERS
+    inference_max_in_flight: int = INFERENCE_MAX_IN_FLIGHT
+    prediction_cache_max_size: int = PREDICTION_CACHE_MAX_SIZE
+    prediction_cache_ttl_seconds: float = PREDICTION_CACHE_TTL_SECONDS
+    csv_chunk_size: int = CSV_SCORING_CHUNK_SIZE
+    preload_model: bool = MODEL_PRELOAD_ON_STARTUP
+    preload_retry_seconds: float = MODEL_PRELOAD_RETRY_SECONDS
+    version_poll_seconds: float = MODEL_VERSION_POLL_SECONDS
+
+
+@dataclass
+class ServerConfig:
+    host: str = APP_HOST
+    port: int = APP_PORT
+    workers: int = SERVER_WORKERS
+    max_requests: int = SERVER_MAX_REQUESTS
+    max_requests_jitter: int = SERVER_MAX_REQUESTS_JITTER
+    graceful_timeout_seconds: float = SERVER_GRACEFUL_TIMEOUT_SECONDS
+
+
+@dataclass
+class BatchScoringConfig:
+    collection_name: str = DATA_INGESTION_COLLECTION_NAME
+    output_collection_name: str = BATCH_SCORING_OUTPUT_COLLECTION_NAME
+    output_format: str = BATCH_SCORING_OUTPUT_FORMAT
+    batch_scoring_dir: str = os.path.join(ARTIFACT_DIR, BATCH_SCORING_DIR_NAME)
+    n_partitions: int = BATCH_SCORING_N_PARTITIONS
+    n_workers: int = BATCH_SCORING_N_WORKERS
+    read_batch_size: int = BATCH_SCORING_READ_BATCH_SIZE
+    write_batch_size: int = BATCH_SCORING_WRITE_BATCH_SIZE
 
 
 
@@ -1,12 +1,22 @@
 import logging
 import sys
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
-from sklearn.pipeline import Pipeline
 
+from src.constants import SCHEMA_FILE_PATH
+from src.entity.feature_encoder import VehicleFeatureEncoder
+from src.entity.flat_forest import FlatForest
 from src.exception import MyException
 from src.logger import logging
+from src.metrics import PREDICTION_ROWS, stage_timer
+from src.utils.main_utils import read_yaml_file
+
+if TYPE_CHECKING:
+    # SKLEARN IS ONLY NEEDED ONCE A MODEL IS UNPICKLED, NOT TO IMPORT THE SERVING PATH
+    from sklearn.pipeline import Pipeline
 
 class TargetValueMapping:
     def __init__(self):
@@ -20,36 +30,144 @@ class TargetValueMapping:
 
 
 class MyModel:
-    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object):
+    def __init__(self, preprocessing_object: "Pipeline", trained_model_object: object,
+                 compiled_model_object: Optional[FlatForest] = None,
+                 folded_model_object: Optional[FlatForest] = None):
         """
             :param preprocessing_object: Input Object of preprocesser
             :param trained_model_object: Input Object of trained model
+            :param compiled_model_object: Optional array-backed copy of the trained forest used for inference
+            :param folded_model_object: Optional compiled forest with the scaling folded into its
+                                        thresholds, which takes raw inputs and skips preprocessing
         """
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
+        self.compiled_model_object = compiled_model_object
+        self.folded_model_object = folded_model_object
+
+    def get_classifier(self):
+        """
+            Returns the forest used for inference: folded, then compiled, then the trained sklearn model.
+        """
+        for attribute in ("folded_model_object", "compiled_model_object"):
+            model_object = getattr(self, attribute, None)
+            if model_object is not None:
+                return model_object
+        return self.trained_model_object
+
+    def is_folded(self) -> bool:
+        return getattr(self, "folded_model_object", None) is not None
+
+    def fold_preprocessing(self) -> FlatForest:
+        """
+            Finalizes the model for serving by folding the affine scaling of the preprocessor
+            into the compiled forest's split thresholds.
+        """
+        try:
+            if getattr(self, "compiled_model_object", None) is None:
+                raise ValueError("Preprocessing can only be folded into a compiled forest")
+            self.folded_model_object = self.compiled_model_object.fold_preprocessing(self.get_feature_encoder())
+            return self.folded_model_object
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _get_features(self, dataframe: pd.DataFrame) -> np.ndarray:
+        with stage_timer("preprocess"):
+            if self.is_folded():
+                return dataframe[self.get_feature_encoder().input_columns].to_numpy(dtype=np.float64)
+            if self.preprocessing_object is None:
+                # MODELS LOADED FROM A SERVING MODEL FILE CARRY THE ENCODER INSTEAD OF THE SKLEARN PREPROCESSOR
+                encoder = self.get_feature_encoder()
+                return encoder.transform_raw(dataframe[encoder.input_columns].to_numpy(dtype=np.float64))
+            return self.preprocessing_object.transform(dataframe)
+
+    def _predict_features(self, features: np.ndarray, return_probabilities: bool = False):
+        classifier = self.get_classifier()
+        PREDICTION_ROWS.inc(len(features))
+        if not return_probabilities:
+            with stage_timer("model_predict"):
+                return classifier.predict(features)
+
+        with stage_timer("model_predict"):
+            probabilities = classifier.predict_proba(features)
+        classes = classifier.classes_
+        predictions = classes.take(np.argmax(probabilities, axis=1))
+        positive_index = list(classes).index(1)
+        return predictions, probabilities[:, positive_index]
 
     def predict(self, dataframe: pd.DataFrame) -> DataFrame:
         """
             Function accepts preprocessed inputs (with all custom transformations already applied),
             applies scaling using preprocessing_object, and performs prediction on transformed features.
+            A folded model reads the raw columns directly and skips the preprocessing object.
         """
         try:
             logging.info("Starting prediction process.")
 
             # Step 1: Applying scaling transformation using the pre-trained preprocessing object
-            transformed_feature = self.preprocessing_object.transform(dataframe)
+            transformed_feature = self._get_features(dataframe)
 
             # Step 2: Preform prediction using the trained model
             logging.info("Using the trained model to get prediction")
-            predictions = self.trained_model_object.predict(transformed_feature)
+            predictions = self._predict_features(transformed_feature)
 
             return predictions
         except Exception as e:
             logging.error("Error occurred in predict method", exc_info=True)
             raise MyException(e, sys)
 
+    def predict_with_proba(self, dataframe: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            Same inputs as predict, returns the predictions together with the probability of a
+            positive response for every row, using a single transformation and forest pass.
+        """
+        try:
+            logging.info("Starting prediction process with probabilities.")
+            return self._predict_features(self._get_features(dataframe), return_probabilities=True)
+        except Exception as e:
+            logging.error("Error occurred in predict_with_proba method", exc_info=True)
+            raise MyException(e, sys)
+
+    def get_feature_encoder(self) -> VehicleFeatureEncoder:
+        """
+            Returns the pandas-free encoder for this model's preprocessor, building it on first use.
+        """
+        encoder = getattr(self, "_feature_encoder", None)
+        if encoder is None:
+            encoder = VehicleFeatureEncoder(self.preprocessing_object, read_yaml_file(SCHEMA_FILE_PATH))
+            self._feature_encoder = encoder
+        return encoder
+
+    def predict_records(self, records: Union[List[Dict], Dict[str, List]], return_probabilities: bool = False):
+        """
+            Fast path for serving: accepts raw field values either row-wise (list of dicts) or
+            column-wise (dict of lists), encodes them without building a DataFrame and predicts.
+            Returns predictions, or (predictions, probabilities) if return_probabilities is set.
+        """
+        try:
+            encoder = self.get_feature_encoder()
+            with stage_timer("parse"):
+                if isinstance(records, dict):
+                    raw_feature = encoder.parse_columns(records)
+                else:
+                    raw_feature = encoder.parse_records(records)
+
+            with stage_timer("preprocess"):
+                features = raw_feature if self.is_folded() else encoder.transform_raw(raw_feature)
+            return self._predict_features(features, return_probabilities=return_probabilities)
+        except Exception as e:
+            logging.error("Error occurred in predict_records method", exc_info=True)
+            raise MyException(e, sys)
+
+    @property
+    def model_name(self) -> str:
+        """
+            Class name of the trained model, also known for models loaded without the sklearn object.
+        """
+        return getattr(self, "_model_name", None) or type(self.trained_model_object).__name__
+
     def __repr__(self):
-        return f"{type(self.trained_model_object).__name__}()"
+        return f"{self.model_name}()"
 
     def __str__(self):
-        return f"{type(self.trained_model_object).__name__}()"
\ No newline at end of file
+        return f"{self.model_name}()"
\ No newline at end of file
@@ -0,0 +1,247 @@
+import math
+import sys
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from src.exception import MyException
+
+
+class VehicleFeatureEncoder:
+    """
+    Encodes prediction inputs straight into the model's feature matrix without pandas.
+
+    Built once from the `model_input_columns` of config/schema.yaml and the fitted
+    preprocessing pipeline. Fields are parsed into a float64 array laid out in the order the
+    ColumnTransformer emits its output, then the StandardScaler/MinMaxScaler steps are applied
+    with the same in-place arithmetic sklearn uses, so the result is bit-identical to
+    preprocessing_object.transform(DataFrame) for integer-valued passthrough fields.
+    """
+
+    def __init__(self, preprocessing_object, schema_config: dict):
+        try:
+            # IMPORTED HERE SO THE SERVING PATH DOES NOT LOAD SKLEARN BEFORE A MODEL IS UNPICKLED
+            from sklearn.compose import ColumnTransformer
+            from sklearn.pipeline import Pipeline
+
+            column_transformer = preprocessing_object
+            if isinstance(preprocessing_object, Pipeline):
+                if len(preprocessing_object.steps) != 1:
+                    raise ValueError("Only single-step preprocessing pipelines can be encoded")
+                column_transformer = preprocessing_object.steps[0][1]
+            if not isinstance(column_transformer, ColumnTransformer):
+                raise ValueError(f"Unsupported preprocessing object: {type(column_transformer).__name__}")
+
+            self.field_types: Dict[str, str] = {}
+            for column in schema_config["model_input_columns"]:
+                self.field_types.update(column)
+
+            self.input_columns: List[str] = [str(name) for name in column_transformer.feature_names_in_]
+            if set(self.input_columns) != set(self.field_types):
+                raise ValueError(f"Schema model_input_columns {sorted(self.field_types)} do not match "
+                                 f"the fitted preprocessor columns {sorted(self.input_columns)}")
+            self.integer_columns = [name for name in self.input_columns if self.field_types[name] == "int"]
+
+            # OUTPUT LAYOUT: ONE SLICE PER FITTED TRANSFORMER, IN COLUMN TRANSFORMER ORDER
+            self.output_columns: List[str] = []
+            self.steps = []
+            for _, transformer, columns in column_transformer.transformers_:
+                if isinstance(transformer, str) and transformer == "drop":
+                    continue
+                names = [self.input_columns[column] if isinstance(column, (int, np.integer)) else column
+                         for column in columns]
+                if not names:
+                    continue
+                start = len(self.output_columns)
+                self.output_columns.extend(names)
+                self.steps.append((self._affine_step(transformer), slice(start, len(self.output_columns))))
+
+            self.input_columns_by_output = [self.input_columns.index(name) for name in self.output_columns]
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def to_arrays(self) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """
+        Returns the column layout and the fitted scaling parameters, for the serving model file.
+        """
+        steps, arrays = [], {}
+        for index, (step, columns) in enumerate(self.steps):
+            step_metadata = {"kind": None if step is None else step[0], "start": columns.start, "stop": columns.stop}
+            if step is not None and step[0] == "standard":
+                for name, values in (("mean", step[1]), ("scale", step[2])):
+                    if values is not None:
+                        arrays[f"step{index}.{name}"] = values
+            elif step is not None:
+                arrays[f"step{index}.scale"], arrays[f"step{index}.min"] = step[1], step[2]
+                step_metadata["clip"] = None if step[3] is None else [float(bound) for bound in step[3]]
+            steps.append(step_metadata)
+
+        metadata = {"field_types": self.field_types,
+                    "input_columns": self.input_columns,
+                    "integer_columns": self.integer_columns,
+                    "output_columns": self.output_columns,
+                    "input_columns_by_output": self.input_columns_by_output,
+                    "steps": steps}
+        return metadata, arrays
+
+    @classmethod
+    def from_arrays(cls, metadata: dict, arrays: Dict[str, np.ndarray]) -> "VehicleFeatureEncoder":
+        """
+        Rebuilds an encoder from to_arrays output, without sklearn or the fitted preprocessor.
+        """
+        encoder = cls.__new__(cls)
+        encoder.field_types = dict(metadata["field_types"])
+        encoder.input_columns = list(metadata["input_columns"])
+        encoder.integer_columns = list(metadata["integer_columns"])
+        encoder.output_columns = list(metadata["output_columns"])
+        encoder.input_columns_by_output = list(metadata["input_columns_by_output"])
+        encoder.steps = []
+        for index, step_metadata in enumerate(metadata["steps"]):
+            columns = slice(step_metadata["start"], step_metadata["stop"])
+            if step_metadata["kind"] is None:
+                step = None
+            elif step_metadata["kind"] == "standard":
+                step = ("standard", arrays.get(f"step{index}.mean"), arrays.get(f"step{index}.scale"))
+            else:
+                clip = step_metadata.get("clip")
+                step = ("minmax", arrays[f"step{index}.scale"], arrays[f"step{index}.min"],
+                        tuple(clip) if clip is not None else None)
+            encoder.steps.append((step, columns))
+        return encoder
+
+    @staticmethod
+    def _affine_step(transformer):
+        from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, StandardScaler
+
+        if (isinstance(transformer, str) and transformer == "passthrough") or \
+                (isinstance(transformer, FunctionTransformer) and transformer.func is None):
+            return None
+        if isinstance(transformer, StandardScaler):
+            return ("standard", transformer.mean_, transformer.scale_)
+        if isinstance(transformer, MinMaxScaler):
+            clip = transformer.feature_range if transformer.clip else None
+            return ("minmax", transformer.scale_, transformer.min_, clip)
+        raise ValueError(f"Unsupported transformer in preprocessor: {type(transformer).__name__}")
+
+    def _parse_value(self, record: Mapping, name: str, row: int) -> float:
+        if name not in record or record[name] is None or record[name] == "":
+            raise ValueError(f"Record {row}: missing value for '{name}'")
+        try:
+            value = float(record[name])
+        except (TypeError, ValueError):
+            raise ValueError(f"Record {row}: '{name}' must be numeric, got {record[name]!r}")
+        if not math.isfinite(value):
+            raise ValueError(f"Record {row}: '{name}' must be finite, got {record[name]!r}")
+        if self.field_types[name] == "int" and not value.is_integer():
+            raise ValueError(f"Record {row}: '{name}' must be an integer, got {record[name]!r}")
+        return value
+
+    def _scale(self, features: np.ndarray) -> np.ndarray:
+        for step, columns in self.steps:
+            if step is None:
+                continue
+            # BASIC SLICING GIVES A VIEW, SO THE IN-PLACE OPERATIONS BELOW UPDATE features
+            block = features[:, columns]
+            if step[0] == "standard":
+                _, mean, scale = step
+                if mean is not None:
+                    block -= mean
+                if scale is not None:
+                    block /= scale
+            else:
+                _, scale, minimum, clip = step
+                block *= scale
+                block += minimum
+                if clip is not None:
+                    np.clip(block, clip[0], clip[1], out=block)
+        return features
+
+    def scale_output_column(self, values: np.ndarray, output_column: int) -> np.ndarray:
+        """
+        Applies the fitted scaling of one output column to raw values, with the same arithmetic as _scale.
+        """
+        values = np.array(values, dtype=np.float64)
+        for step, columns in self.steps:
+            if not columns.start <= output_column < columns.stop:
+                continue
+            if step is None:
+                return values
+            position = output_column - columns.start
+            if step[0] == "standard":
+                _, mean, scale = step
+                if mean is not None:
+                    values -= mean[position]
+                if scale is not None:
+                    values /= scale[position]
+            else:
+                _, scale, minimum, clip = step
+                values *= scale[position]
+                values += minimum[position]
+                if clip is not None:
+                    np.clip(values, clip[0], clip[1], out=values)
+            return values
+        raise ValueError(f"Unknown output column {output_column}")
+
+    def parse_records(self, records: Sequence[Mapping]) -> np.ndarray:
+        """
+        Parses and validates a list of records into raw values, one column per input_columns entry.
+        """
+        try:
+            raw = np.empty((len(records), len(self.input_columns)), dtype=np.float64)
+            for row, record in enumerate(records):
+                for input_column, name in enumerate(self.input_columns):
+                    raw[row, input_column] = self._parse_value(record, name, row)
+            return raw
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def parse_columns(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """
+        Vectorized variant of parse_records for column-wise input (a dict of equally long lists).
+        """
+        try:
+            missing_columns = [name for name in self.input_columns if name not in columns]
+            if missing_columns:
+                raise ValueError(f"Missing columns: {missing_columns}")
+
+            n_rows = len(columns[self.input_columns[0]])
+            raw = np.empty((n_rows, len(self.input_columns)), dtype=np.float64)
+            for input_column, name in enumerate(self.input_columns):
+                try:
+                    values = np.asarray(columns[name], dtype=np.float64)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Column '{name}' must be numeric")
+                if values.shape != (n_rows,):
+                    raise ValueError(f"Column '{name}' has {values.size} values, expected {n_rows}")
+                if not np.isfinite(values).all():
+                    raise ValueError(f"Column '{name}' has missing or non-finite values")
+                if name in self.integer_columns and not np.array_equal(values, np.floor(values)):
+                    raise ValueError(f"Column '{name}' must contain integers")
+                raw[:, input_column] = values
+            return raw
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def transform_raw(self, raw: np.ndarray) -> np.ndarray:
+        """
+        Reorders raw values into the preprocessor's output layout and scales them.
+        """
+        return self._scale(raw[:, self.input_columns_by_output])
+
+    def encode_records(self, records: Sequence[Mapping]) -> np.ndarray:
+        """
+        Parses and validates a list of records into the transformed feature matrix.
+        """
+        return self.transform_raw(self.parse_records(records))
+
+    def encode(self, record: Mapping) -> np.ndarray:
+        """
+        Encodes a single record into a (1, n_features) matrix.
+        """
+        return self.encode_records([record])
+
+    def encode_columns(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """
+        Vectorized variant of encode_records for column-wise input (a dict of equally long lists).
+        """
+        return self.transform_raw(self.parse_columns(columns))
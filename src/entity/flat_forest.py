@@ -0,0 +1,224 @@
+import sys
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.exception import MyException
+
+APPLY_CHUNK_SIZE = 512
+SIGN_BIT = np.uint64(1 << 63)
+
+
+def _float_to_ordered(values: np.ndarray) -> np.ndarray:
+    # MAPS FLOAT64 VALUES TO UINT64 KEYS THAT SORT IN THE SAME ORDER AS THE FLOATS
+    bits = values.view(np.int64)
+    keys = np.where(bits >= 0, bits, -(bits & np.int64(0x7FFFFFFFFFFFFFFF)))
+    return keys.view(np.uint64) ^ SIGN_BIT
+
+
+def _ordered_to_float(keys: np.ndarray) -> np.ndarray:
+    signed = (keys ^ SIGN_BIT).view(np.int64)
+    bits = np.where(signed >= 0, signed, (-signed) | np.int64(-0x8000000000000000))
+    return bits.view(np.float64)
+
+
+class FlatForest:
+    """
+    Array-backed evaluator for a fitted RandomForestClassifier.
+
+    All trees are flattened into contiguous arrays (feature, threshold, left, right, leaf
+    value) indexed by a global node id, with each tree's root listed in `roots`. Leaves point
+    back at themselves with an infinite threshold, so a batch is evaluated by stepping every
+    (tree, sample) pair down one level at a time for max_depth steps, with no per-tree Python
+    calls, over row chunks sized to stay in cache. Inputs are compared in float32 and leaf
+    probabilities are accumulated tree by tree, exactly as sklearn does, so predictions and
+    probabilities match the original forest.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, classes: np.ndarray, max_depth: int, n_features: int,
+                 float32_inputs: bool = True, children: Optional[np.ndarray] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features
+        self.float32_inputs = float32_inputs
+        # RIGHT CHILDREN FOLLOWED BY LEFT CHILDREN: THE NEXT NODE IS children[node + go_left * n_nodes]
+        self._children = np.concatenate([right, left]) if children is None else children
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "FlatForest":
+        """
+        Flattens the trees of a fitted single-output RandomForestClassifier.
+        """
+        try:
+            n_classes = len(forest.classes_)
+            features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+            offset = 0
+            max_depth = 0
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                node_ids = np.arange(tree.node_count, dtype=np.intp) + offset
+                is_leaf = tree.children_left == -1
+
+                features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+                thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+                lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.intp))
+                rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.intp))
+
+                # SAME NORMALIZATION AS DecisionTreeClassifier.predict_proba
+                proba = tree.value[:, 0, :n_classes].astype(np.float64)
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                values.append(proba / normalizer)
+
+                roots.append(offset)
+                offset += tree.node_count
+                max_depth = max(max_depth, tree.max_depth)
+
+            return cls(feature=np.ascontiguousarray(np.concatenate(features)),
+                       threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+                       left=np.ascontiguousarray(np.concatenate(lefts)),
+                       right=np.ascontiguousarray(np.concatenate(rights)),
+                       value=np.ascontiguousarray(np.concatenate(values)),
+                       roots=np.asarray(roots, dtype=np.intp),
+                       classes=np.asarray(forest.classes_),
+                       max_depth=int(max_depth),
+                       n_features=int(forest.n_features_in_))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def to_arrays(self) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """
+        Returns the scalar attributes and the arrays of the forest, for the serving model file.
+        """
+        metadata = {"max_depth": self.max_depth,
+                    "n_features": self.n_features_in_,
+                    "float32_inputs": self.float32_inputs}
+        arrays = {"feature": self.feature, "threshold": self.threshold, "left": self.left, "right": self.right,
+                  "value": self.value, "roots": self.roots, "classes": self.classes_, "children": self._children}
+        return metadata, arrays
+
+    @classmethod
+    def from_arrays(cls, metadata: dict, arrays: Dict[str, np.ndarray]) -> "FlatForest":
+        """
+        Rebuilds a forest from to_arrays output without copying the arrays, so memory-mapped
+        arrays stay shared between processes.
+        """
+        return cls(feature=arrays["feature"],
+                   threshold=arrays["threshold"],
+                   left=arrays["left"],
+                   right=arrays["right"],
+                   value=arrays["value"],
+                   roots=arrays["roots"],
+                   classes=arrays["classes"],
+                   max_depth=int(metadata["max_depth"]),
+                   n_features=int(metadata["n_features"]),
+                   float32_inputs=bool(metadata["float32_inputs"]),
+                   children=arrays["children"])
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _prepare_input(self, X: np.ndarray) -> np.ndarray:
+        # sklearn casts inputs to float32 before comparing them with the float64 thresholds;
+        # a folded forest already accounts for that cast in its thresholds
+        return np.asarray(X, dtype=np.float32 if self.float32_inputs else np.float64)
+
+    def fold_preprocessing(self, encoder) -> "FlatForest":
+        """
+        Returns a forest that takes raw inputs, in encoder.input_columns order, instead of the
+        preprocessed features.
+
+        Each split `float32(scale(x)) <= t` on a transformed column is monotone in the raw value
+        x, so it is equivalent to `x <= T` where T is the largest float64 that still goes left.
+        T is found per node by bisection over the ordered float64 bit patterns, which makes the
+        folded forest take exactly the same branches as preprocessing followed by this forest.
+        """
+        try:
+            if not self.float32_inputs:
+                raise ValueError("Forest is already folded")
+
+            is_leaf = self.left == np.arange(len(self.left))
+            raw_feature = np.asarray(encoder.input_columns_by_output, dtype=np.intp)[self.feature]
+            raw_threshold = self.threshold.copy()
+
+            for output_column in range(len(encoder.output_columns)):
+                nodes = np.flatnonzero((self.feature == output_column) & ~is_leaf)
+                if nodes.size == 0:
+                    continue
+                thresholds = self.threshold[nodes]
+
+                def goes_left(raw_values):
+                    with np.errstate(over="ignore", invalid="ignore"):
+                        scaled = encoder.scale_output_column(raw_values, output_column)
+                        return scaled.astype(np.float32).astype(np.float64) <= thresholds
+
+                low = np.full(nodes.size, _float_to_ordered(np.array([-np.inf]))[0])
+                high = np.full(nodes.size, _float_to_ordered(np.array([np.inf]))[0])
+                for _ in range(64):
+                    middle = low + (high - low) // np.uint64(2)
+                    left_branch = goes_left(_ordered_to_float(middle))
+                    low = np.where(left_branch, middle, low)
+                    high = np.where(left_branch, high, middle)
+                raw_threshold[nodes] = _ordered_to_float(low)
+
+            return FlatForest(feature=np.where(is_leaf, 0, raw_feature),
+                              threshold=raw_threshold,
+                              left=self.left,
+                              right=self.right,
+                              value=self.value,
+                              roots=self.roots,
+                              classes=self.classes_,
+                              max_depth=self.max_depth,
+                              n_features=len(encoder.input_columns),
+                              float32_inputs=False)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns the global leaf id reached by every sample in every tree, shape (n_trees, n_samples).
+        """
+        X = self._prepare_input(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (n_samples, {self.n_features_in_}), got {X.shape}")
+
+        X = X.astype(np.float64)
+        n_nodes = len(self.feature)
+        leaves = np.empty((self.n_trees, X.shape[0]), dtype=np.intp)
+        for start in range(0, X.shape[0], APPLY_CHUNK_SIZE):
+            chunk = X[start:start + APPLY_CHUNK_SIZE]
+            flat_chunk = chunk.ravel()
+            row_offsets = np.arange(chunk.shape[0], dtype=np.intp) * chunk.shape[1]
+            nodes = np.repeat(self.roots[:, np.newaxis], chunk.shape[0], axis=1)
+            for _ in range(self.max_depth):
+                go_left = flat_chunk.take(row_offsets + self.feature.take(nodes)) <= self.threshold.take(nodes)
+                nodes = self._children.take(nodes + go_left * n_nodes)
+            leaves[:, start:start + chunk.shape[0]] = nodes
+        return leaves
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        try:
+            leaves = self.apply(X)
+            proba = np.zeros((leaves.shape[1], self.value.shape[1]), dtype=np.float64)
+            # ACCUMULATE TREE BY TREE, IN ORDER, TO REPRODUCE SKLEARN'S FLOATING POINT SUMS
+            for tree_leaves in leaves:
+                proba += self.value.take(tree_leaves, axis=0)
+            proba /= self.n_trees
+            return proba
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def __repr__(self):
+        return (f"FlatForest(n_trees={self.n_trees}, n_nodes={len(self.feature)}, max_depth={self.max_depth}, "
+                f"folded={not self.float32_inputs})")
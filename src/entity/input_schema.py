@@ -0,0 +1,221 @@
+import math
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+from pandas import DataFrame
+
+from src.constants import SCHEMA_FILE_PATH
+from src.utils.main_utils import read_yaml_file
+
+# AT MOST THIS MANY FIELD ERRORS ARE REPORTED BACK FOR ONE REQUEST
+MAX_REPORTED_ERRORS = 100
+
+FIELD_DTYPES = {"int": np.int64, "float": np.float64}
+
+CONSTRAINT_KEYS = {"values", "min", "max"}
+
+BOOL_TYPES_TUPLE = (bool, np.bool_)
+BOOL_TYPES = frozenset(BOOL_TYPES_TUPLE)
+
+# LARGEST INTEGER THAT FLOAT64, WHICH EVERY COLUMN IS PARSED AS FIRST, HOLDS EXACTLY
+MAX_EXACT_INTEGER = 2 ** 53
+
+
+class InputValidationError(ValueError):
+    """
+    Raised when prediction inputs do not match the schema. `errors` lists every problem found
+    as {"row", "field", "message", "value"} dicts; row is None for request-level problems.
+    """
+
+    def __init__(self, errors: List[Dict]):
+        self.errors = errors[:MAX_REPORTED_ERRORS]
+        first = errors[0]
+        location = f"record {first['row']}, " if first["row"] is not None else ""
+        more = f" (and {len(errors) - 1} more)" if len(errors) > 1 else ""
+        super().__init__(f"Invalid input: {location}'{first['field']}' {first['message']}{more}")
+
+
+def _error(row: Optional[int], field: Optional[str], message: str, value=None) -> Dict:
+    if isinstance(value, np.generic):
+        value = value.item()
+    if not isinstance(value, (str, int, float, bool, type(None))):
+        value = repr(value)
+    elif isinstance(value, float) and not math.isfinite(value):
+        value = str(value)
+    return {"row": row, "field": field, "message": message, "value": value}
+
+
+class VehicleInputSchema:
+    """
+    Typed request model of the prediction API, compiled once from the `model_input_columns`
+    of config/schema.yaml.
+
+    Every field is declared `int` or `float` in the schema. Inputs, row-wise (list of dicts)
+    or column-wise (dict of lists), are coerced one column at a time with a single numpy
+    conversion into contiguous int64/float64 arrays. Only a column that fails the fast
+    conversion is re-parsed value by value to find the bad rows. Missing, non-numeric,
+    boolean and non-finite values, non-integral or out of range values of int fields, and
+    values outside the `model_input_constraints` of the schema (allowed values, min/max) are
+    all collected and raised together as an InputValidationError, so a bad record is rejected
+    with per-field errors before it reaches the prediction cache or the model.
+    """
+
+    _default: Optional["VehicleInputSchema"] = None
+
+    def __init__(self, schema_config: dict):
+        self.field_types: Dict[str, str] = {}
+        for column in schema_config["model_input_columns"]:
+            self.field_types.update(column)
+        unknown_types = {kind for kind in self.field_types.values() if kind not in FIELD_DTYPES}
+        if unknown_types:
+            raise ValueError(f"Unsupported model input types in schema: {sorted(unknown_types)}")
+        self.field_names: List[str] = list(self.field_types)
+
+        self.field_constraints: Dict[str, Dict] = schema_config.get("model_input_constraints") or {}
+        for name, constraint in self.field_constraints.items():
+            if name not in self.field_types:
+                raise ValueError(f"Constraint on unknown model input '{name}' in schema")
+            if not constraint or set(constraint) - CONSTRAINT_KEYS:
+                raise ValueError(f"Constraint of '{name}' must use the keys {sorted(CONSTRAINT_KEYS)}")
+
+    @classmethod
+    def get_default(cls) -> "VehicleInputSchema":
+        """
+        Returns the schema compiled from SCHEMA_FILE_PATH, reading the file on first use only.
+        """
+        if cls._default is None:
+            cls._default = cls(read_yaml_file(SCHEMA_FILE_PATH))
+        return cls._default
+
+    def _coerce_column(self, name: str, values: Sequence, errors: List[Dict]) -> np.ndarray:
+        n_rows = len(values)
+        try:
+            parsed = np.asarray(values, dtype=np.float64)
+            if parsed.shape != (n_rows,):
+                raise ValueError(f"Column '{name}' is not a flat list of values")
+            bad_rows = np.zeros(n_rows, dtype=bool)
+        except (TypeError, ValueError):
+            # SLOW PATH, ONLY FOR A COLUMN THAT HOLDS SOMETHING NUMPY CANNOT CONVERT
+            parsed = np.full(n_rows, np.nan)
+            bad_rows = np.zeros(n_rows, dtype=bool)
+            for row, value in enumerate(values):
+                try:
+                    parsed[row] = float(value) if value is not None and value != "" else np.nan
+                except (TypeError, ValueError):
+                    bad_rows[row] = True
+
+        # NUMPY READS True/False AS 1/0; A FLAG SENT AS A JSON BOOLEAN IS STILL A TYPE ERROR
+        if not BOOL_TYPES.isdisjoint(map(type, values)):
+            for row, value in enumerate(values):
+                if isinstance(value, BOOL_TYPES_TUPLE) and not bad_rows[row]:
+                    bad_rows[row] = True
+                    errors.append(_error(row, name, "must be a number, not a boolean", value))
+                    parsed[row] = np.nan
+        for row in np.flatnonzero(bad_rows):
+            if not isinstance(values[row], BOOL_TYPES_TUPLE):
+                errors.append(_error(int(row), name, "must be a number", values[row]))
+        for row in np.flatnonzero(~np.isfinite(parsed) & ~bad_rows):
+            value = values[row]
+            missing = value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+            errors.append(_error(int(row), name, "is missing" if missing else "must be a finite number", value))
+
+        valid = np.isfinite(parsed)
+        if self.field_types[name] == "int":
+            with np.errstate(invalid="ignore"):
+                fractional = valid & (parsed != np.floor(parsed))
+                out_of_range = valid & (np.abs(parsed) > MAX_EXACT_INTEGER)
+            for row in np.flatnonzero(fractional):
+                errors.append(_error(int(row), name, "must be an integer", values[row]))
+            for row in np.flatnonzero(out_of_range):
+                errors.append(_error(int(row), name, "is out of range (at most 2**53 in absolute value)",
+                                     values[row]))
+            valid &= ~fractional & ~out_of_range
+
+        constraint = self.field_constraints.get(name)
+        if constraint is not None:
+            if "values" in constraint:
+                for row in np.flatnonzero(valid & ~np.isin(parsed, constraint["values"])):
+                    errors.append(_error(int(row), name, f"must be one of {constraint['values']}", values[row]))
+            if "min" in constraint:
+                for row in np.flatnonzero(valid & (parsed < constraint["min"])):
+                    errors.append(_error(int(row), name, f"must be at least {constraint['min']}", values[row]))
+            if "max" in constraint:
+                for row in np.flatnonzero(valid & (parsed > constraint["max"])):
+                    errors.append(_error(int(row), name, f"must be at most {constraint['max']}", values[row]))
+
+        if self.field_types[name] == "int":
+            return np.where(valid, parsed, 0).astype(np.int64)
+        return parsed
+
+    def _check_columns(self, columns: Mapping[str, Sequence]) -> None:
+        errors: List[Dict] = []
+        missing_fields = [name for name in self.field_names if name not in columns]
+        for name in missing_fields:
+            errors.append(_error(None, name, "is a required column"))
+        lengths = {len(columns[name]) for name in self.field_names if name not in missing_fields}
+        if len(lengths) > 1:
+            errors.append(_error(None, None, "all columns must have the same length"))
+        if errors:
+            raise InputValidationError(errors)
+
+    def coerce_columns(self, columns: Mapping[str, Sequence]) -> Dict[str, np.ndarray]:
+        """
+        Validates column-wise input (a dict of equally long lists) into one typed array per field.
+        """
+        self._check_columns(columns)
+        errors: List[Dict] = []
+        typed = {name: self._coerce_column(name, columns[name], errors) for name in self.field_names}
+        if errors:
+            raise InputValidationError(errors)
+        return typed
+
+    def find_invalid_rows(self, columns: Mapping[str, Sequence]) -> Dict[int, List[Dict]]:
+        """
+        Validates column-wise input like coerce_columns, but returns every error grouped by row
+        instead of raising, so bulk scoring can skip the bad rows and score the rest. Missing
+        columns still raise an InputValidationError.
+        """
+        self._check_columns(columns)
+        errors: List[Dict] = []
+        for name in self.field_names:
+            self._coerce_column(name, columns[name], errors)
+        invalid_rows: Dict[int, List[Dict]] = {}
+        for error in errors:
+            invalid_rows.setdefault(error["row"], []).append(
+                {key: value for key, value in error.items() if key != "row"})
+        return invalid_rows
+
+    def coerce_records(self, records: Sequence[Mapping]) -> Dict[str, np.ndarray]:
+        """
+        Validates row-wise input (a list of dicts) into one typed array per field.
+        """
+        errors = [_error(row, None, "must be an object", record)
+                  for row, record in enumerate(records) if not isinstance(record, Mapping)]
+        if errors:
+            raise InputValidationError(errors)
+
+        typed = {name: self._coerce_column(name, [record.get(name) for record in records], errors)
+                 for name in self.field_names}
+        if errors:
+            raise InputValidationError(errors)
+        return typed
+
+    def coerce(self, records: Union[Sequence[Mapping], Mapping[str, Sequence]]) -> Dict[str, np.ndarray]:
+        """
+        Validates row-wise or column-wise input, see coerce_records and coerce_columns.
+        """
+        if isinstance(records, Mapping):
+            return self.coerce_columns(records)
+        return self.coerce_records(records)
+
+    def coerce_record(self, record: Mapping) -> Dict[str, Union[int, float]]:
+        """
+        Validates a single record into a dict of Python ints and floats.
+        """
+        return {name: values[0].item() for name, values in self.coerce_records([record]).items()}
+
+    def to_dataframe(self, typed_columns: Mapping[str, np.ndarray]) -> DataFrame:
+        """
+        Builds a DataFrame with int64/float64 columns, in schema order, from coerced columns.
+        """
+        return DataFrame({name: typed_columns[name] for name in self.field_names})
@@ -0,0 +1,203 @@
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from src.cloud_storage.local_cache import LocalArtifactCache
+from src.constants import MODEL_CACHE_DIR, MODEL_CACHE_MAX_BYTES, MODEL_FILE_NAME, SERVING_MODEL_FILE_NAME
+from src.entity.estimator import MyModel
+from src.entity.model_format import is_model_file, load_model_file
+from src.exception import MyException
+from src.logger import logging
+from src.metrics import MODEL_LOADS, MODEL_SWAPS, stage_timer
+
+# BUCKETS PUSHED TO BEFORE SERVING MODEL FILES EXISTED ONLY HAVE THE PICKLED MODEL; IT SERVES
+# UNTIL A SERVING MODEL FILE IS PUSHED NEXT TO IT
+FALLBACK_MODEL_PATHS = {SERVING_MODEL_FILE_NAME: MODEL_FILE_NAME}
+
+
+def _is_missing_object(error: BaseException) -> bool:
+    """
+    True if the error, or one it was raised from, is S3 reporting that the key does not exist.
+    """
+    from botocore.exceptions import ClientError
+
+    while error is not None:
+        if isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in \
+                ("NoSuchKey", "404", "NotFound"):
+            return True
+        error = error.__cause__
+    return False
+
+
+@dataclass
+class CachedModel:
+    bucket_name: str
+    model_path: str
+    source_path: str
+    version: str
+    model: MyModel
+    loaded_at: datetime
+
+
+class ModelCache:
+    """
+    Process-wide cache of production models downloaded from S3.
+
+    Models are keyed by (bucket_name, model_path) and remember the ETag/VersionId they were
+    loaded from, so a prediction never touches S3 once the model is in memory. The first
+    caller for a key loads the model behind a per-key lock; concurrent callers wait for that
+    single download instead of starting their own. Use refresh() to pick up a newly pushed
+    model and invalidate() to drop cached entries.
+
+    Downloads go through a LocalArtifactCache, so a model already on disk is reused after a
+    conditional GET and the last good copy keeps serving when S3 is unreachable. Serving model
+    files are memory-mapped from the cache, so processes on the same host share one copy of
+    the arrays; older pickled models are still unpickled, and a bucket without a serving model
+    file falls back to its pickled model.
+    """
+
+    local_cache = LocalArtifactCache(cache_dir=MODEL_CACHE_DIR, max_bytes=MODEL_CACHE_MAX_BYTES)
+
+    _entries: Dict[Tuple[str, str], CachedModel] = {}
+    _locks: Dict[Tuple[str, str], threading.Lock] = {}
+    _registry_lock = threading.Lock()
+
+    @classmethod
+    def _get_lock(cls, key: Tuple[str, str]) -> threading.Lock:
+        with cls._registry_lock:
+            if key not in cls._locks:
+                cls._locks[key] = threading.Lock()
+            return cls._locks[key]
+
+    @staticmethod
+    def _load(bucket_name: str, model_path: str) -> CachedModel:
+        # BOTO3 IS IMPORTED ON FIRST LOAD, OFF THE SERVER STARTUP PATH
+        from src.cloud_storage.aws_storage import SimpleStorageService
+
+        with stage_timer("model_load"):
+            s3 = SimpleStorageService()
+            source_path = model_path
+            try:
+                local_path, version = ModelCache.local_cache.fetch(s3, bucket_name=bucket_name, s3_key=model_path)
+            except Exception as e:
+                source_path = FALLBACK_MODEL_PATHS.get(model_path)
+                if source_path is None or not _is_missing_object(e):
+                    raise
+                logging.warning(f"s3://{bucket_name}/{model_path} does not exist, "
+                                f"loading s3://{bucket_name}/{source_path} instead")
+                local_path, version = ModelCache.local_cache.fetch(s3, bucket_name=bucket_name, s3_key=source_path)
+            model = ModelCache.load_local_file(local_path)
+        MODEL_LOADS.inc()
+        logging.info(f"Cached production model s3://{bucket_name}/{source_path} at version [{version}]")
+        return CachedModel(bucket_name=bucket_name,
+                           model_path=model_path,
+                           source_path=source_path,
+                           version=version,
+                           model=model,
+                           loaded_at=datetime.now())
+
+    @staticmethod
+    def _get_remote_version(entry: CachedModel) -> str:
+        """
+        Version tag of the S3 object a reload of the entry would read. An entry loaded from the
+        fallback pickled model switches to the serving model file as soon as it is pushed.
+        """
+        from src.cloud_storage.aws_storage import SimpleStorageService
+
+        s3 = SimpleStorageService()
+        s3_key = entry.source_path
+        if s3_key != entry.model_path and s3.s3_key_path_available(entry.bucket_name, entry.model_path):
+            s3_key = entry.model_path
+        return s3.get_object_version(bucket_name=entry.bucket_name, s3_key=s3_key)
+
+    @staticmethod
+    def load_local_file(file_path: str) -> MyModel:
+        """
+        Memory-maps a serving model file, or unpickles a model saved with save_object.
+        """
+        if is_model_file(file_path):
+            return load_model_file(file_path)
+        from src.utils.main_utils import load_object
+        return load_object(file_path)
+
+    @classmethod
+    def get_entry(cls, bucket_name: str, model_path: str) -> CachedModel:
+        """
+        Returns the cached entry for the model, loading it from S3 on first use.
+        """
+        try:
+            key = (bucket_name, model_path)
+            entry = cls._entries.get(key)
+            if entry is not None:
+                return entry
+
+            with cls._get_lock(key):
+                entry = cls._entries.get(key)
+                if entry is None:
+                    entry = cls._load(bucket_name, model_path)
+                    cls._entries[key] = entry
+                return entry
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @classmethod
+    def get_model(cls, bucket_name: str, model_path: str) -> MyModel:
+        """
+        Returns the cached production model, loading it from S3 on first use.
+        """
+        return cls.get_entry(bucket_name, model_path).model
+
+    @classmethod
+    def get_version(cls, bucket_name: str, model_path: str) -> Optional[str]:
+        """
+        Returns the version tag of the cached model, or None if it has not been loaded yet.
+        """
+        entry = cls._entries.get((bucket_name, model_path))
+        return entry.version if entry is not None else None
+
+    @classmethod
+    def refresh(cls, bucket_name: str, model_path: str,
+                warm_up: Optional[Callable[[MyModel], None]] = None) -> bool:
+        """
+        Compares the cached version against the S3 object (one HEAD request) and reloads the
+        model if it changed.
+
+        The new model is downloaded and passed to warm_up while the old entry keeps serving;
+        it is then swapped in with a single dict assignment. Callers that already fetched the
+        old entry finish on it, and no caller ever waits for the reload.
+
+        :return: True if a new model was loaded, False if the cached model is still current.
+        """
+        try:
+            key = (bucket_name, model_path)
+            with cls._get_lock(key):
+                entry = cls._entries.get(key)
+                if entry is not None:
+                    remote_version = cls._get_remote_version(entry)
+                    if remote_version == entry.version:
+                        return False
+                    logging.info(f"Model version changed from [{entry.version}] to [{remote_version}]")
+                new_entry = cls._load(bucket_name, model_path)
+                if warm_up is not None:
+                    warm_up(new_entry.model)
+                cls._entries[key] = new_entry
+                MODEL_SWAPS.inc()
+                logging.info(f"Swapped in production model version [{new_entry.version}]")
+                return True
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @classmethod
+    def invalidate(cls, bucket_name: Optional[str] = None, model_path: Optional[str] = None) -> None:
+        """
+        Drops cached models. With no arguments every entry is dropped, otherwise only the
+        entries matching the given bucket and/or model path.
+        """
+        with cls._registry_lock:
+            for key in list(cls._entries):
+                if bucket_name not in (None, key[0]) or model_path not in (None, key[1]):
+                    continue
+                cls._entries.pop(key, None)
+                logging.info(f"Invalidated cached model s3://{key[0]}/{key[1]}")
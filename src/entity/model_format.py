@@ -0,0 +1,141 @@
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+
+from src.entity.estimator import MyModel
+from src.entity.feature_encoder import VehicleFeatureEncoder
+from src.entity.flat_forest import FlatForest
+from src.exception import MyException
+from src.logger import logging
+
+MODEL_FILE_MAGIC = b"VIPMODEL"
+MODEL_FILE_FORMAT_VERSION = 1
+# MAGIC, FORMAT VERSION, RESERVED, HEADER LENGTH
+MODEL_FILE_PREAMBLE = struct.Struct("<8sIIQ")
+ARRAY_ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + ARRAY_ALIGNMENT - 1) // ARRAY_ALIGNMENT * ARRAY_ALIGNMENT
+
+
+def is_model_file(file_path: str) -> bool:
+    """
+    True if the file starts with the serving model file magic, False for pickles and anything else.
+    """
+    with open(file_path, "rb") as file_obj:
+        return file_obj.read(len(MODEL_FILE_MAGIC)) == MODEL_FILE_MAGIC
+
+
+def save_model_file(model: MyModel, file_path: str) -> None:
+    """
+    Writes the serving parts of a MyModel to a memory-mappable file.
+
+    Layout: a fixed preamble (magic, format version, header length), a JSON header with the
+    scalar attributes of the forest and the feature encoder plus the dtype, shape and offset of
+    every array, then the arrays themselves as raw little-endian buffers, each aligned to 64
+    bytes. Only the forest used for inference (folded, else compiled) and the encoder are kept;
+    neither sklearn nor dill is needed to load the file back.
+    """
+    logging.info("Entered the save_model_file method of model_format")
+    try:
+        forest = model.get_classifier()
+        if not isinstance(forest, FlatForest):
+            forest = FlatForest.from_sklearn(forest)
+        forest_metadata, forest_arrays = forest.to_arrays()
+        encoder_metadata, encoder_arrays = model.get_feature_encoder().to_arrays()
+
+        arrays: Dict[str, np.ndarray] = {f"forest.{name}": array for name, array in forest_arrays.items()}
+        arrays.update({f"encoder.{name}": array for name, array in encoder_arrays.items()})
+
+        array_specs, data_size = {}, 0
+        for name, array in arrays.items():
+            array = np.asarray(array)
+            if array.dtype.hasobject:
+                raise ValueError(f"Array '{name}' has an object dtype and cannot be memory-mapped")
+            arrays[name] = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+            data_size = _align(data_size)
+            array_specs[name] = {"dtype": arrays[name].dtype.str, "shape": list(array.shape), "offset": data_size}
+            data_size += arrays[name].nbytes
+
+        header = json.dumps({"format_version": MODEL_FILE_FORMAT_VERSION,
+                             "model_name": model.model_name,
+                             "created_at": datetime.now().isoformat(),
+                             "forest": forest_metadata,
+                             "encoder": encoder_metadata,
+                             "data_size": data_size,
+                             "arrays": array_specs}).encode("utf-8")
+        data_offset = _align(MODEL_FILE_PREAMBLE.size + len(header))
+
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "wb") as file_obj:
+            file_obj.write(MODEL_FILE_PREAMBLE.pack(MODEL_FILE_MAGIC, MODEL_FILE_FORMAT_VERSION, 0, len(header)))
+            file_obj.write(header)
+            for name, array in arrays.items():
+                file_obj.seek(data_offset + array_specs[name]["offset"])
+                file_obj.write(array.tobytes())
+            file_obj.truncate(data_offset + data_size)
+        # RENAME OVER THE OLD FILE: PROCESSES THAT STILL MAP IT KEEP READING THE OLD INODE
+        os.replace(temp_path, file_path)
+        logging.info(f"Saved serving model file {file_path} ({data_offset + data_size} bytes)")
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def load_model_file(file_path: str) -> MyModel:
+    """
+    Memory-maps a file written by save_model_file and returns a MyModel whose forest and
+    encoder arrays are read-only views of the mapping.
+
+    Nothing is copied or unpickled, so loading takes about as long as reading the header, and
+    every process that maps the same file shares its pages through the OS page cache.
+    """
+    try:
+        with open(file_path, "rb") as file_obj:
+            magic, format_version, _, header_length = MODEL_FILE_PREAMBLE.unpack(
+                file_obj.read(MODEL_FILE_PREAMBLE.size))
+            if magic != MODEL_FILE_MAGIC:
+                raise ValueError(f"{file_path} is not a serving model file")
+            if format_version > MODEL_FILE_FORMAT_VERSION:
+                raise ValueError(f"{file_path} has format version {format_version}, "
+                                 f"this code reads up to version {MODEL_FILE_FORMAT_VERSION}")
+            header = json.loads(file_obj.read(header_length).decode("utf-8"))
+            buffer = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+
+        data_offset = _align(MODEL_FILE_PREAMBLE.size + header_length)
+        if len(buffer) < data_offset + header["data_size"]:
+            raise ValueError(f"{file_path} is truncated: {len(buffer)} bytes, "
+                             f"expected {data_offset + header['data_size']}")
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            count = math.prod(shape)
+            if count == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                         offset=data_offset + spec["offset"]).reshape(shape)
+
+        def section(prefix: str) -> Dict[str, np.ndarray]:
+            return {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+
+        forest = FlatForest.from_arrays(header["forest"], section("forest."))
+        model = MyModel(preprocessing_object=None,
+                        trained_model_object=None,
+                        compiled_model_object=None if not forest.float32_inputs else forest,
+                        folded_model_object=forest if not forest.float32_inputs else None)
+        model._feature_encoder = VehicleFeatureEncoder.from_arrays(header["encoder"], section("encoder."))
+        model._model_name = header["model_name"]
+        logging.info(f"Memory-mapped serving model file {file_path} (format version {format_version})")
+        return model
+    except Exception as e:
+        raise MyException(e, sys) from e
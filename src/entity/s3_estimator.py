@@ -1,6 +1,6 @@
-from src.cloud_storage.aws_storage import SimpleStorageService
 from src.exception import MyException
 from src.entity.estimator import MyModel
+from src.entity.model_cache import ModelCache
 import sys
 from pandas import DataFrame
 
@@ -15,6 +15,8 @@ class Proj1Estimator:
         :param bucket_name: Name of your model bucket
         :param model_path: Location of your model in bucket
         """
+        from src.cloud_storage.aws_storage import SimpleStorageService
+
         self.bucket_name = bucket_name
         self.s3 = SimpleStorageService()
         self.model_path = model_path
@@ -29,13 +31,16 @@ class Proj1Estimator:
 
     def load_model(self) -> MyModel:
         """
-                Load the model from the model_path
-                :return:
-                """"""
-        Load the model from the model_path
+        Load the model from the model_path, through the local disk cache: the model is only
+        downloaded if the cached copy is missing or older than the S3 object, and the last good
+        copy is used if S3 cannot be reached
         :return:
         """
-        return self.s3.load_model(self.model_path, bucket_name = self.bucket_name)
+        try:
+            local_path, _ = ModelCache.local_cache.fetch(self.s3, bucket_name=self.bucket_name, s3_key=self.model_path)
+            return ModelCache.load_local_file(local_path)
+        except Exception as e:
+            raise MyException(e, sys)
 
     def save_model(self, from_file, remove: bool=False) -> None:
         """
@@ -60,7 +65,33 @@ class Proj1Estimator:
         """
         try:
             if self.loaded_model is None:
-                self.loaded_model = self.load_model()
+                self.loaded_model = ModelCache.get_model(bucket_name=self.bucket_name, model_path=self.model_path)
             return self.loaded_model.predict(dataframe=dataframe)
         except Exception as e:
             raise MyException(e, sys)
+
+    def predict_with_proba(self, dataframe: DataFrame):
+        """
+        :param dataframe:
+        :return: predictions and the probability of a positive response for every row
+        """
+        try:
+            if self.loaded_model is None:
+                self.loaded_model = ModelCache.get_model(bucket_name=self.bucket_name, model_path=self.model_path)
+            return self.loaded_model.predict_with_proba(dataframe=dataframe)
+        except Exception as e:
+            raise MyException(e, sys)
+
+
+    def predict_records(self, records, return_probabilities: bool = False):
+        """
+        :param records: raw field values, row-wise (list of dicts) or column-wise (dict of lists)
+        :param return_probabilities: also return the probability of a positive response
+        :return: predictions, or (predictions, probabilities)
+        """
+        try:
+            if self.loaded_model is None:
+                self.loaded_model = ModelCache.get_model(bucket_name=self.bucket_name, model_path=self.model_path)
+            return self.loaded_model.predict_records(records, return_probabilities=return_probabilities)
+        except Exception as e:
+            raise MyException(e, sys)
\ No newline at end of file
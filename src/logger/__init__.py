@@ -8,13 +8,23 @@
     6. Log rotation Policy (
         - Size-based rotation(e.g. rotate after 5MB).
         - Time-based rotation(e.g. Daily).)
+    7. Log Mode (
+        - queue: callers only enqueue records, a listener thread does the formatting and I/O.
+        - sync: handlers write in the calling thread.)
+    8. Hot path limits (rate limit / sampling of INFO and DEBUG records per logger).
     """
 
 
 # Importing all necessary libraries
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 from from_root import from_root
 
@@ -22,6 +32,21 @@ from from_root import from_root
 MAX_LOG_SIZE = 5*1024*1024 # 5 MB
 BACKUP_COUNT = 3 # Number of backup log files to keep
 
+# Setting log mode ("queue" or "sync") and record format ("text" or "json")
+LOG_MODE = os.getenv("LOG_MODE", "queue")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+# Hot path limits, keyed by logger name; records of the root logger (used across src) are keyed
+# by module name. rate: records per second, burst: bucket size, sample: fraction kept.
+# WARNING and above are never dropped.
+HOT_PATH_LOG_LIMITS = {
+    "prediction_pipeline": {"rate": 5.0, "burst": 20, "sample": 1.0},
+    "estimator": {"rate": 5.0, "burst": 20, "sample": 1.0},
+    "s3_estimator": {"rate": 5.0, "burst": 20, "sample": 1.0},
+    "aws_storage": {"rate": 5.0, "burst": 20, "sample": 1.0},
+    "data_transformation": {"rate": 5.0, "burst": 20, "sample": 1.0},
+}
+
 # Setting log directory
 LOG_DIR = "logs"
 LOG_DIR_PATH = os.path.join(from_root(), LOG_DIR)
@@ -31,6 +56,88 @@ os.makedirs(LOG_DIR_PATH, exist_ok=True)
 LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 LOG_FILE_PATH = os.path.join(LOG_DIR_PATH, LOG_FILE)
 
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_record = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "suppressed", 0):
+            log_record["suppressed"] = record.suppressed
+        if record.exc_info:
+            log_record["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_record["exception"] = record.exc_text
+        return json.dumps(log_record, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token-bucket rate limit and random sampling of INFO/DEBUG records, per logger.
+
+    The number of records dropped for a key since its last emitted record is attached to the
+    next emitted one as `suppressed`, so the volume stays visible.
+    """
+
+    def __init__(self, limits: dict):
+        super().__init__()
+        self.limits = limits
+        self._buckets = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = record.name if record.name != "root" else record.module
+        limit = self.limits.get(key)
+        if limit is None:
+            return True
+        # IN SYNC MODE EVERY HANDLER RUNS THE FILTER, SO THE FIRST DECISION IS REUSED
+        decision = getattr(record, "rate_limit_decision", None)
+        if decision is not None:
+            return decision
+
+        with self._lock:
+            allowed = random.random() < limit.get("sample", 1.0)
+            if allowed and "rate" in limit:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(key, (limit.get("burst", 1), now))
+                tokens = min(limit.get("burst", 1), tokens + (now - updated) * limit["rate"])
+                allowed = tokens >= 1.0
+                self._buckets[key] = (tokens - 1.0 if allowed else tokens, now)
+
+            record.rate_limit_decision = allowed
+            if not allowed:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            record.suppressed = self._suppressed.pop(key, 0)
+            return True
+
+
+# LISTENER THREAD OF THE QUEUE MODE (NONE IN SYNC MODE)
+log_listener = None
+
+
+def stop_log_listener():
+    """
+    Flushes queued records and stops the listener; for processes that exit with os._exit.
+    """
+    if log_listener is not None and log_listener._thread is not None:
+        log_listener.stop()
+
+
 def configure_logger():
     """
     CONFIGURE_LOGGER use to configure all login steps
@@ -42,7 +149,10 @@ def configure_logger():
     logger.setLevel(logging.DEBUG)  # SET LOG LEVEL TO DEBUG TO CAPTURE ALL LEVELS
 
     # DEFINE LOG FORMATTER FOR CONSISTENT LOG OUTPUT
-    log_format = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
+    if LOG_FORMAT == "json":
+        log_format = JsonFormatter()
+    else:
+        log_format = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
 
     # ===============================
     # CONFIGURE FILE HANDLER WITH ROTATION
@@ -62,12 +172,40 @@ def configure_logger():
     console_handler.setFormatter(log_format)     # APPLY FORMATTER TO CONSOLE HANDLER
     console_handler.setLevel(logging.INFO)       # SET CONSOLE HANDLER LOG LEVEL
 
+    rate_limit_filter = RateLimitFilter(HOT_PATH_LOG_LIMITS)
+
+    if LOG_MODE == "queue":
+        # ===============================
+        # QUEUE HANDLER: CALLERS ONLY ENQUEUE, A LISTENER THREAD FORMATS AND WRITES
+        # ===============================
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(rate_limit_filter)   # DROP HOT PATH RECORDS BEFORE THEY ARE QUEUED
+        global log_listener
+        log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        log_listener.start()
+        atexit.register(stop_log_listener)           # FLUSH QUEUED RECORDS ON EXIT
+        logger.addHandler(queue_handler)
+
+        # THE LISTENER THREAD MUST NOT BE HOLDING A HANDLER OR QUEUE LOCK WHEN THE PROCESS FORKS,
+        # SO IT IS STOPPED (FLUSHING THE QUEUE) BEFORE THE FORK AND RESTARTED IN BOTH PROCESSES
+        def restart_listener():
+            global log_listener
+            log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+            log_listener.start()
+
+        os.register_at_fork(before=stop_log_listener,
+                            after_in_parent=restart_listener,
+                            after_in_child=restart_listener)
+        return
+
     # ===============================
     # ADD BOTH HANDLERS TO LOGGER
     # ===============================
+    file_handler.addFilter(rate_limit_filter)
+    console_handler.addFilter(rate_limit_filter)
     logger.addHandler(file_handler)   # ADD FILE HANDLER TO LOGGER
     logger.addHandler(console_handler)  # ADD CONSOLE HANDLER TO LOGGER
 
 # INITIALIZE THE LOGGER CONFIGURATION
 configure_logger()
-
@@ -0,0 +1,229 @@
+"""
+    Lightweight in-process metrics for the prediction path, exposed in Prometheus text format.
+
+    1. Counter   : monotonically increasing value (e.g. model loads).
+    2. Gauge     : value that goes up and down, or is read from a callback when scraped.
+    3. Histogram : cumulative bucket counts, sum and count of observations (e.g. stage latency).
+
+    Recording is a dict lookup, a bisect and a few additions under a lock, so it stays in the
+    low microseconds on the hot path. Use `with stage_timer("preprocess"):` to time a stage.
+
+    Every sample carries a pid label: under the pre-fork server each worker keeps its own
+    metrics, and Prometheus sums or compares them across pids.
+    """
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# LATENCY BUCKETS IN SECONDS, FROM 50 MICROSECONDS TO 5 SECONDS
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0)
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    pairs.append(f'pid="{os.getpid()}"')
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *label_values: str):
+        child = self._children.get(label_values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(label_values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"
+                for values, child in list(self._children.items())]
+
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._function: Optional[Callable[[], float]] = None
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Reads the gauge from `function` at scrape time instead of storing a value.
+        """
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name}{_format_labels((), ())} {_format_value(self._function())}"]
+        return super()._samples()
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Keeps every metric of the process and renders them in Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in list(self._metrics.values())) + "\n"
+
+
+# PROCESS-WIDE REGISTRY AND THE METRICS OF THE PREDICTION PATH
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY = REGISTRY.histogram("vehicle_prediction_stage_seconds",
+                                   "Time spent in each stage of the prediction path", ("stage",))
+MODEL_LOADS = REGISTRY.counter("vehicle_model_loads_total", "Production models loaded from S3")
+MODEL_SWAPS = REGISTRY.counter("vehicle_model_swaps_total", "Production models replaced by a newer version")
+PREDICTION_ROWS = REGISTRY.counter("vehicle_prediction_rows_total", "Rows scored by the model")
+PREDICTION_ERRORS = REGISTRY.counter("vehicle_prediction_errors_total", "Failed prediction requests", ("route",))
+INVALID_REQUESTS = REGISTRY.counter("vehicle_prediction_invalid_requests_total",
+                                    "Prediction requests rejected by input validation", ("route",))
+PREDICTION_CACHE_HITS = REGISTRY.counter("vehicle_prediction_cache_hits_total", "Prediction cache hits")
+PREDICTION_CACHE_MISSES = REGISTRY.counter("vehicle_prediction_cache_misses_total", "Prediction cache misses")
+REQUESTS_IN_FLIGHT = REGISTRY.gauge("vehicle_prediction_requests_in_flight",
+                                    "Prediction requests currently being handled", ("route",))
+
+
+class stage_timer:
+    """
+    Context manager recording the wall time of a block in the stage latency histogram.
+    """
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, stage: str):
+        self.histogram = STAGE_LATENCY.labels(stage)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
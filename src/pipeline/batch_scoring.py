@@ -0,0 +1,307 @@
+import os
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from bson import json_util
+from pymongo import UpdateOne
+
+from src.configuration.mongo_db_connection import MongoDBClient
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.data_access.proj1_data import ProjectData
+from src.entity.artifact_entity import BatchScoringArtifact
+from src.entity.config_entity import BatchScoringConfig, VehiclePredictorConfig
+from src.entity.model_cache import ModelCache
+from src.exception import MyException
+from src.logger import logging
+from src.pipeline.csv_scoring import CsvBatchScorer
+from src.utils.main_utils import read_yaml_file
+
+# PER-PROCESS STATE OF A SCORING WORKER, SET UP ONCE BY _init_worker
+_worker_scorer: Optional[CsvBatchScorer] = None
+_worker_model_version: Optional[str] = None
+_worker_init_error: Optional[str] = None
+
+
+def _init_worker(prediction_pipeline_config: VehiclePredictorConfig) -> None:
+    """
+    Pool initializer: loads the production model once per worker process.
+    """
+    global _worker_scorer, _worker_model_version, _worker_init_error
+    try:
+        _worker_scorer = CsvBatchScorer(prediction_pipeline_config)
+        _worker_model_version = ModelCache.get_entry(bucket_name=prediction_pipeline_config.model_bucket_name,
+                                                     model_path=prediction_pipeline_config.model_file_path).version
+    except Exception as e:
+        # A RAISING INITIALIZER BREAKS THE WHOLE POOL AND THE CAUSE NEVER REACHES THE PARENT;
+        # EVERY TASK OF THIS WORKER REPORTS IT INSTEAD
+        _worker_init_error = f"{type(e).__name__}: {e}"
+
+
+def _score_partition(partition: Dict, batch_scoring_config: BatchScoringConfig, run_id: str,
+                     projection: List[str], parquet_path: Optional[str], rejects_path: str) -> Tuple[int, int]:
+    """
+    Scores one _id range of the collection in read_batch_size chunks and writes the results.
+    Runs inside a worker process; returns the number of rows scored and rejected.
+
+    Documents with missing or invalid fields are not scored: they are written, as their _id
+    and per-field errors, one JSON object per line to rejects_path, and the partition still
+    completes.
+
+    Failures are raised as RuntimeError: MyException and InputValidationError cannot be
+    unpickled in the parent, which would then only see a BrokenProcessPool.
+    """
+    if _worker_init_error is not None:
+        raise RuntimeError(f"Scoring worker could not load the model: {_worker_init_error}")
+    try:
+        database = MongoDBClient().database
+        cursor = database[batch_scoring_config.collection_name].find(
+            ProjectData.partition_filter(partition), {column: 1 for column in projection},
+            batch_size=batch_scoring_config.read_batch_size).sort("_id", 1)
+
+        writer = None
+        rejects_file = None
+        temp_path = f"{parquet_path}.tmp" if parquet_path else None
+        rejects_temp_path = f"{rejects_path}.tmp"
+        rows, rejected_rows = 0, 0
+        try:
+            documents = []
+            for document in cursor:
+                documents.append(document)
+                if len(documents) < batch_scoring_config.read_batch_size:
+                    continue
+                writer, rejects = _write_results(documents, batch_scoring_config, run_id, temp_path, writer)
+                rejects_file = _write_rejects(rejects, rejects_temp_path, rejects_file)
+                rows += len(documents) - len(rejects)
+                rejected_rows += len(rejects)
+                documents = []
+            if documents:
+                writer, rejects = _write_results(documents, batch_scoring_config, run_id, temp_path, writer)
+                rejects_file = _write_rejects(rejects, rejects_temp_path, rejects_file)
+                rows += len(documents) - len(rejects)
+                rejected_rows += len(rejects)
+        finally:
+            if writer is not None:
+                writer.close()
+            if rejects_file is not None:
+                rejects_file.close()
+
+        if parquet_path and writer is not None:
+            os.replace(temp_path, parquet_path)
+        if rejects_file is not None:
+            os.replace(rejects_temp_path, rejects_path)
+        return rows, rejected_rows
+    except Exception as e:
+        raise RuntimeError(f"{type(e).__name__}: {e}")
+
+
+def _write_rejects(rejects: pd.DataFrame, rejects_path: str, rejects_file):
+    if len(rejects) == 0:
+        return rejects_file
+    if rejects_file is None:
+        rejects_file = open(rejects_path, "w")
+    for record in rejects.to_dict("records"):
+        rejects_file.write(json_util.dumps(record) + "\n")
+    return rejects_file
+
+
+def _write_results(documents: List[Dict], batch_scoring_config: BatchScoringConfig, run_id: str,
+                   parquet_path: Optional[str], writer):
+    df = pd.DataFrame(documents).replace({"na": np.nan})
+    results, rejects = _worker_scorer.score_valid_rows(df)
+    if len(rejects):
+        logging.warning(f"Skipped {len(rejects)} of {len(df)} documents with invalid fields")
+    if len(results) == 0:
+        return writer, rejects
+
+    if batch_scoring_config.output_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({"_id": results["_id"].astype(str).to_numpy(),
+                          "prediction": results["prediction"].to_numpy(),
+                          "probability": results["probability"].to_numpy()})
+        if writer is None:
+            writer = pq.ParquetWriter(parquet_path, table.schema)
+        writer.write_table(table)
+        return writer, rejects
+
+    # UPSERTS KEYED ON _id ARE IDEMPOTENT, SO A PARTITION INTERRUPTED MID-WAY CAN SIMPLY BE RESCORED
+    scored_at = datetime.now()
+    collection = MongoDBClient().database[batch_scoring_config.output_collection_name]
+    operations = [UpdateOne({"_id": document_id},
+                            {"$set": {"prediction": int(prediction),
+                                      "probability": float(probability),
+                                      "model_version": _worker_model_version,
+                                      "run_id": run_id,
+                                      "scored_at": scored_at}},
+                            upsert=True)
+                  for document_id, prediction, probability in
+                  zip(results["_id"], results["prediction"], results["probability"])]
+    for start in range(0, len(operations), batch_scoring_config.write_batch_size):
+        collection.bulk_write(operations[start:start + batch_scoring_config.write_batch_size], ordered=False)
+    return writer, rejects
+
+
+class BatchScoringJob:
+    """
+    Offline scoring of a whole MongoDB collection with the production model.
+
+    The collection is split into n_partitions contiguous _id ranges whose boundaries are
+    stored in a manifest under artifact/batch_scoring/<run_id>. Partitions are scored on a
+    process pool, each worker loading the model once, and results are upserted into the
+    output collection with unordered bulk writes or written to one Parquet file per
+    partition. A checkpoint file is written for every finished partition, so running the
+    job again with the same run_id only scores the partitions that did not complete.
+
+    Documents with invalid fields are skipped rather than failing their partition; they are
+    counted in the checkpoints and the artifact and listed under <run_dir>/rejects.
+    """
+
+    def __init__(self,
+                 batch_scoring_config: BatchScoringConfig = BatchScoringConfig(),
+                 prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),
+                 run_id: Optional[str] = None):
+        try:
+            if batch_scoring_config.output_format not in ("mongo", "parquet"):
+                raise ValueError(f"Unsupported output format: {batch_scoring_config.output_format}")
+            self.batch_scoring_config = batch_scoring_config
+            self.prediction_pipeline_config = prediction_pipeline_config
+            self.run_id = run_id or f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}_{uuid.uuid4().hex[:8]}"
+            self.run_dir = os.path.join(batch_scoring_config.batch_scoring_dir, self.run_id)
+            self.manifest_file_path = os.path.join(self.run_dir, "manifest.json")
+            self.checkpoint_dir = os.path.join(self.run_dir, "checkpoints")
+            self.predictions_dir = os.path.join(self.run_dir, "predictions")
+            self.rejects_dir = os.path.join(self.run_dir, "rejects")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_projection(self) -> List[str]:
+        """
+        Raw fields read from the collection: the schema columns without the target.
+        """
+        schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+        columns = [name for column in schema_config["columns"] for name in column if name != TARGET_COLUMN]
+        return ["_id"] + columns
+
+    def compute_partitions(self) -> List[Dict]:
+        """
+        Splits the collection into contiguous _id ranges of roughly equal size, see
+        ProjectData.get_id_partitions.
+        """
+        try:
+            return ProjectData().get_id_partitions(collection_name=self.batch_scoring_config.collection_name,
+                                                   n_partitions=max(1, self.batch_scoring_config.n_partitions))
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def load_or_create_manifest(self) -> List[Dict]:
+        """
+        Reuses the partition boundaries of an earlier attempt of this run, so checkpoints stay valid.
+        """
+        if os.path.exists(self.manifest_file_path):
+            with open(self.manifest_file_path, "r") as manifest_file:
+                manifest = json_util.loads(manifest_file.read())
+            logging.info(f"Resuming batch scoring run {self.run_id} with {len(manifest['partitions'])} partitions")
+            return manifest["partitions"]
+
+        partitions = self.compute_partitions()
+        os.makedirs(self.run_dir, exist_ok=True)
+        self._write_json(self.manifest_file_path, {
+            "run_id": self.run_id,
+            "collection_name": self.batch_scoring_config.collection_name,
+            "output_format": self.batch_scoring_config.output_format,
+            "partitions": partitions,
+        })
+        logging.info(f"Created batch scoring run {self.run_id} with {len(partitions)} partitions")
+        return partitions
+
+    @staticmethod
+    def _write_json(file_path: str, content: Dict) -> None:
+        # WRITE-THEN-RENAME SO A CRASH NEVER LEAVES A HALF WRITTEN MANIFEST OR CHECKPOINT
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, "w") as json_file:
+            json_file.write(json_util.dumps(content))
+        os.replace(temp_path, file_path)
+
+    def _checkpoint_path(self, partition: Dict) -> str:
+        return os.path.join(self.checkpoint_dir, f"partition_{partition['index']:05d}.json")
+
+    def _parquet_path(self, partition: Dict) -> Optional[str]:
+        if self.batch_scoring_config.output_format != "parquet":
+            return None
+        return os.path.join(self.predictions_dir, f"part-{partition['index']:05d}.parquet")
+
+    def _rejects_path(self, partition: Dict) -> str:
+        return os.path.join(self.rejects_dir, f"part-{partition['index']:05d}.jsonl")
+
+    def run(self) -> BatchScoringArtifact:
+        """
+        Method Name :   run
+        Description :   Scores every partition that has no checkpoint yet across the process pool
+
+        Output      :   Returns BatchScoringArtifact with partition and row counts
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            partitions = self.load_or_create_manifest()
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            os.makedirs(self.rejects_dir, exist_ok=True)
+            if self.batch_scoring_config.output_format == "parquet":
+                os.makedirs(self.predictions_dir, exist_ok=True)
+
+            pending = [partition for partition in partitions if not os.path.exists(self._checkpoint_path(partition))]
+            logging.info(f"{len(partitions) - len(pending)} partitions already scored, {len(pending)} to go")
+
+            scored_rows, rejected_rows = 0, 0
+            if pending:
+                projection = self.get_projection()
+                # SPAWNED WORKERS OPEN THEIR OWN MONGO CLIENTS; PYMONGO CLIENTS ARE NOT FORK SAFE
+                with ProcessPoolExecutor(max_workers=min(self.batch_scoring_config.n_workers, len(pending)),
+                                         mp_context=get_context("spawn"),
+                                         initializer=_init_worker,
+                                         initargs=(self.prediction_pipeline_config,)) as executor:
+                    futures = {executor.submit(_score_partition, partition, self.batch_scoring_config,
+                                               self.run_id, projection, self._parquet_path(partition),
+                                               self._rejects_path(partition)): partition
+                               for partition in pending}
+                    failed_partitions = []
+                    for future in as_completed(futures):
+                        partition = futures[future]
+                        try:
+                            rows, rejected = future.result()
+                        except Exception as e:
+                            # THE OTHER PARTITIONS KEEP RUNNING AND ARE CHECKPOINTED; A RERUN RETRIES THIS ONE
+                            logging.error(f"{MyException(e, sys)} (partition {partition['index']})")
+                            failed_partitions.append(partition["index"])
+                            continue
+                        scored_rows += rows
+                        rejected_rows += rejected
+                        self._write_json(self._checkpoint_path(partition),
+                                         {"index": partition["index"], "rows": rows, "rejected_rows": rejected,
+                                          "finished_at": datetime.now().isoformat()})
+                        logging.info(f"Partition {partition['index']} scored: {rows} rows, {rejected} rejected")
+
+                if failed_partitions:
+                    raise RuntimeError(f"Partitions {sorted(failed_partitions)} failed, run the job again with "
+                                       f"run_id {self.run_id} to score them")
+
+            output_location = self.predictions_dir if self.batch_scoring_config.output_format == "parquet" \
+                else self.batch_scoring_config.output_collection_name
+            batch_scoring_artifact = BatchScoringArtifact(run_id=self.run_id,
+                                                          run_dir=self.run_dir,
+                                                          output_location=output_location,
+                                                          total_partitions=len(partitions),
+                                                          scored_partitions=len(pending),
+                                                          skipped_partitions=len(partitions) - len(pending),
+                                                          scored_rows=scored_rows,
+                                                          rejected_rows=rejected_rows)
+            logging.info(f"Batch scoring artifact: {batch_scoring_artifact}")
+            return batch_scoring_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
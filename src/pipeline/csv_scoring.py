@@ -0,0 +1,183 @@
+import sys
+from io import StringIO
+from typing import IO, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.input_schema import InputValidationError, VehicleInputSchema
+from src.exception import MyException
+from src.logger import logging
+from src.pipeline.prediction_pipeline import VEHICLE_DATA_COLUMNS, VehicleDataClassifier
+
+# RAW CATEGORY VALUES BEHIND THE DUMMY COLUMNS CREATED BY DataTransformation
+DUMMY_COLUMNS = {
+    "Vehicle_Age_lt_1_Year": ("Vehicle_Age", "< 1 Year"),
+    "Vehicle_Age_gt_2_Years": ("Vehicle_Age", "> 2 Years"),
+    "Vehicle_Damage_Yes": ("Vehicle_Damage", "Yes"),
+}
+ID_COLUMNS = ["id", "_id"]
+
+
+class CsvBatchScorer:
+    """
+    Scores CSV files of raw vehicle records chunk by chunk.
+
+    The file is parsed chunk_size rows at a time, each chunk goes through the same Gender /
+    dummy / rename transformations as DataTransformation and one vectorized model call, and
+    the results are yielded as CSV text, so memory use depends on the chunk size only.
+    """
+
+    def __init__(self,
+                 prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),
+                 chunk_size: Optional[int] = None):
+        try:
+            self.prediction_pipeline_config = prediction_pipeline_config
+            self.chunk_size = chunk_size or prediction_pipeline_config.csv_chunk_size
+            self.classifier = VehicleDataClassifier(prediction_pipeline_config)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def transform_chunk(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Applies the DataTransformation feature mapping to one chunk of raw records.
+
+        pd.get_dummies(drop_first=True) depends on which categories appear in the frame it is
+        given, so it cannot be used chunk by chunk; the dummy columns are built explicitly from
+        the categories the trained model expects. Already transformed files are passed through.
+        """
+        if "Gender" not in df.columns:
+            raise ValueError("Missing column 'Gender' in CSV input")
+        features = pd.DataFrame(index=df.index)
+        gender = df["Gender"]
+        if gender.dtype == object or pd.api.types.is_string_dtype(gender):
+            gender = gender.map({'Female': 0, 'Male': 1})
+        features["Gender"] = gender
+
+        for column in VEHICLE_DATA_COLUMNS:
+            if column == "Gender":
+                continue
+            if column in df.columns:
+                features[column] = df[column]
+            elif column in DUMMY_COLUMNS:
+                source_column, category = DUMMY_COLUMNS[column]
+                features[column] = (df[source_column] == category).astype(int)
+            else:
+                raise ValueError(f"Missing column '{column}' in CSV input")
+        return features[VEHICLE_DATA_COLUMNS]
+
+    def score_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns the id column (if any), prediction and probability of every row of a raw chunk.
+        """
+        features = self.transform_chunk(df)
+        predictions, probabilities = self.classifier.predict_records(
+            {column: features[column].to_numpy() for column in VEHICLE_DATA_COLUMNS},
+            return_probabilities=True)
+
+        result = pd.DataFrame(index=df.index)
+        for column in ID_COLUMNS:
+            if column in df.columns:
+                result[column] = df[column]
+        result["prediction"] = predictions.astype(int)
+        result["probability"] = probabilities
+        return result
+
+    def score_valid_rows(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Scores a raw chunk like score_chunk, but rows with invalid values are set aside instead
+        of failing the whole chunk. A chunk without a required column still raises.
+
+        :return: (results of the valid rows, rejected rows: their id columns and an "errors"
+                 list of {"field", "message", "value"})
+        """
+        id_columns = [column for column in ID_COLUMNS if column in df.columns]
+        try:
+            return self.score_chunk(df), pd.DataFrame(columns=id_columns + ["errors"])
+        except InputValidationError:
+            features = self.transform_chunk(df)
+            invalid_rows = VehicleInputSchema.get_default().find_invalid_rows(
+                {column: features[column].to_numpy() for column in VEHICLE_DATA_COLUMNS})
+            if not invalid_rows:
+                raise
+
+        valid = np.ones(len(df), dtype=bool)
+        valid[list(invalid_rows)] = False
+        if valid.any():
+            results = self.score_chunk(df[valid])
+        else:
+            results = pd.DataFrame({**{column: df[column].iloc[:0] for column in id_columns},
+                                    "prediction": pd.Series(dtype=int), "probability": pd.Series(dtype=float)})
+        rejects = df.iloc[sorted(invalid_rows)][id_columns].copy()
+        rejects["errors"] = [invalid_rows[row] for row in sorted(invalid_rows)]
+        return results, rejects
+
+    @staticmethod
+    def _to_csv(result: pd.DataFrame, header: bool) -> str:
+        buffer = StringIO()
+        result.to_csv(buffer, index=False, header=header)
+        return buffer.getvalue()
+
+    def score_chunks(self, chunks: Iterable[pd.DataFrame]) -> Iterator[str]:
+        """
+        Scores an iterable of raw DataFrame chunks and returns the results as an iterator of
+        CSV text, starting with the header.
+
+        The first chunk is read and scored before this returns, so input that is not a CSV,
+        lacks a column or holds invalid values fails here, before any output is sent; the
+        following chunks are scored lazily as the iterator is consumed.
+        """
+        try:
+            chunks = iter(chunks)
+            first_chunk = next(chunks, None)
+            first_text = self._to_csv(self.score_chunk(first_chunk), header=True) if first_chunk is not None else ""
+            first_rows = len(first_chunk) if first_chunk is not None else 0
+        except InputValidationError:
+            raise
+        except Exception as e:
+            raise MyException(e, sys)
+        return self._score_remaining_chunks(first_text, first_rows, chunks)
+
+    def _score_remaining_chunks(self, first_text: str, first_rows: int,
+                                chunks: Iterator[pd.DataFrame]) -> Iterator[str]:
+        try:
+            rows = first_rows
+            yield first_text
+            for chunk in chunks:
+                text = self._to_csv(self.score_chunk(chunk), header=False)
+                rows += len(chunk)
+                yield text
+            logging.info(f"Scored {rows} CSV rows in chunks of {self.chunk_size}")
+        except Exception as e:
+            # THE RESPONSE IS ALREADY UNDER WAY: THE CLIENT SEES A TRUNCATED BODY
+            logging.error(f"CSV scoring failed after {rows} rows: {e}")
+            raise MyException(e, sys)
+
+    def read_chunks(self, file_obj: IO) -> Iterator[pd.DataFrame]:
+        return pd.read_csv(file_obj, chunksize=self.chunk_size, na_values="na")
+
+    def score_file(self, file_obj: IO) -> Iterator[str]:
+        """
+        Scores a CSV file-like object (local file, upload or S3 stream) chunk by chunk, the first
+        chunk eagerly (see score_chunks).
+        """
+        try:
+            chunks = self.read_chunks(file_obj)
+        except Exception as e:
+            raise MyException(e, sys)
+        return self.score_chunks(chunks)
+
+    def score_s3_object(self, s3_key: str, bucket_name: str) -> Iterator[str]:
+        """
+        Streams a CSV object from S3 and scores it chunk by chunk, without downloading it first.
+        """
+        try:
+            from src.cloud_storage.aws_storage import SimpleStorageService
+
+            stream = SimpleStorageService().get_object_stream(bucket_name=bucket_name, s3_key=s3_key)
+            logging.info(f"Scoring CSV from s3://{bucket_name}/{s3_key}")
+            return self.score_file(stream)
+        except Exception as e:
+            raise MyException(e, sys)
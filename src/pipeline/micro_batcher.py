@@ -0,0 +1,168 @@
+import asyncio
+import sys
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.exception import MyException
+from src.logger import logging
+from src.metrics import STAGE_LATENCY
+from src.pipeline.prediction_pipeline import VehicleDataClassifier
+from src.pipeline.serving_executor import InferenceExecutor, ServerBusyError
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_DELAY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250]
+
+
+class MicroBatcherStats:
+    """
+    Counters and histograms describing how the micro-batcher groups requests.
+    """
+
+    def __init__(self):
+        self.batches = 0
+        self.items = 0
+        self.rows = 0
+        self.max_batch_size = 0
+        self.queue_delay_ms_total = 0.0
+        self.queue_delay_ms_max = 0.0
+        self.cache_hits = 0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.queue_delay_counts = [0] * (len(QUEUE_DELAY_BUCKETS_MS) + 1)
+
+    def record_batch(self, batch_size: int, rows: int, queue_delays_ms: List[float]) -> None:
+        self.batches += 1
+        self.items += batch_size
+        self.rows += rows
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.batch_size_counts[bisect_left(BATCH_SIZE_BUCKETS, batch_size)] += 1
+        queue_wait = STAGE_LATENCY.labels("queue_wait")
+        for delay in queue_delays_ms:
+            queue_wait.observe(delay / 1000.0)
+            self.queue_delay_ms_total += delay
+            self.queue_delay_ms_max = max(self.queue_delay_ms_max, delay)
+            self.queue_delay_counts[bisect_left(QUEUE_DELAY_BUCKETS_MS, delay)] += 1
+
+    def as_dict(self) -> dict:
+        def histogram(buckets, counts):
+            labels = [f"le_{bound}" for bound in buckets] + ["le_inf"]
+            return dict(zip(labels, counts))
+
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "rows": self.rows,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "mean_queue_delay_ms": self.queue_delay_ms_total / self.items if self.items else 0.0,
+            "max_queue_delay_ms": self.queue_delay_ms_max,
+            "cache_hits": self.cache_hits,
+            "batch_size_histogram": histogram(BATCH_SIZE_BUCKETS, self.batch_size_counts),
+            "queue_delay_ms_histogram": histogram(QUEUE_DELAY_BUCKETS_MS, self.queue_delay_counts),
+        }
+
+
+class PredictionMicroBatcher:
+    """
+    Groups concurrent prediction requests into a single vectorized VehicleDataClassifier call.
+
+    Each request is queued with a future. A background task takes the first waiting request,
+    keeps collecting for at most max_wait_ms or until max_batch_size requests are queued, runs
+    one prediction over the concatenated records on the inference executor and hands each
+    caller back its own rows. While a batch is being scored new requests keep queuing, so
+    batches grow with load; once the queue holds inference_max_in_flight requests new ones
+    are rejected with ServerBusyError.
+    """
+
+    def __init__(self,
+                 classifier: Optional[VehicleDataClassifier] = None,
+                 executor: Optional[InferenceExecutor] = None,
+                 prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()):
+        try:
+            self.classifier = classifier if classifier is not None else VehicleDataClassifier(prediction_pipeline_config)
+            self.executor = executor if executor is not None else InferenceExecutor(prediction_pipeline_config)
+            self.max_batch_size = prediction_pipeline_config.micro_batch_max_size
+            self.max_wait_seconds = prediction_pipeline_config.micro_batch_max_wait_ms / 1000.0
+            self.stats = MicroBatcherStats()
+            self._queue: Optional[asyncio.Queue] = None
+            self._worker: Optional[asyncio.Task] = None
+            self._loop: Optional[asyncio.AbstractEventLoop] = None
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def predict(self, records: List[Dict]):
+        """
+        Queues the records for the next batch and returns their predictions. Records that are
+        all in the prediction cache are answered straight away without queuing.
+        """
+        cached = self.classifier.get_cached_predictions(records)
+        if cached is not None:
+            self.stats.cache_hits += 1
+            return cached
+
+        self._ensure_worker()
+        if self._queue.qsize() >= self.executor.max_in_flight:
+            raise ServerBusyError(f"Prediction queue is full ({self.executor.max_in_flight} requests waiting)")
+        future = self._loop.create_future()
+        await self._queue.put((records, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[List[Dict], asyncio.Future, float]]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    def _predict_batch(self, record_lists: List[List[Dict]]):
+        combined = [record for records in record_lists for record in records]
+        return self.classifier.predict_records(combined)
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            started = time.perf_counter()
+            record_lists = [records for records, _, _ in batch]
+            row_counts = [len(records) for records in record_lists]
+            self.stats.record_batch(batch_size=len(batch),
+                                    rows=sum(row_counts),
+                                    queue_delays_ms=[(started - enqueued) * 1000.0 for _, _, enqueued in batch])
+            try:
+                predictions = await self.executor.run(self._predict_batch, record_lists)
+            except Exception as e:
+                logging.error(f"Micro-batch of {len(batch)} requests failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for (_, future, _), row_count in zip(batch, row_counts):
+                if not future.done():
+                    future.set_result(predictions[offset:offset + row_count])
+                offset += row_count
+
+    def get_metrics(self) -> dict:
+        metrics = self.stats.as_dict()
+        metrics.update({
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch_size_limit": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000.0,
+        })
+        return metrics
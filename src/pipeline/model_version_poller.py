@@ -0,0 +1,77 @@
+import asyncio
+import random
+from datetime import datetime
+from typing import Optional
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.model_cache import ModelCache
+from src.logger import logging
+from src.pipeline.prediction_pipeline import VehicleDataClassifier
+
+
+class ModelVersionPoller:
+    """
+    Rolls the replica forward to a newly pushed model without a restart.
+
+    Every version_poll_seconds (with +/-10% jitter, so pre-fork workers do not poll in step) a
+    worker thread sends one HEAD request for the model object and compares its ETag/VersionId
+    with the cached model. On a change the new model is downloaded and warmed up on that
+    thread, then swapped into the ModelCache atomically, see ModelCache.refresh. Requests
+    keep being served by the old model until the swap and never wait for the load. Polling
+    starts once the initial warm-up has loaded a model; errors are logged and retried on the
+    next poll.
+    """
+
+    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()):
+        self.prediction_pipeline_config = prediction_pipeline_config
+        self.classifier = VehicleDataClassifier(prediction_pipeline_config)
+        self.checks = 0
+        self.swaps = 0
+        self.last_checked_at: Optional[datetime] = None
+        self.last_swapped_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Schedules the polling loop on the running event loop, unless polling is disabled.
+        """
+        if self.prediction_pipeline_config.version_poll_seconds <= 0:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _current_version(self) -> Optional[str]:
+        return ModelCache.get_version(bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                                      model_path=self.prediction_pipeline_config.model_file_path)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.prediction_pipeline_config.version_poll_seconds * random.uniform(0.9, 1.1))
+            if self._current_version() is None:
+                continue
+            self.checks += 1
+            self.last_checked_at = datetime.now()
+            try:
+                if await loop.run_in_executor(None, self.classifier.refresh):
+                    self.swaps += 1
+                    self.last_swapped_at = datetime.now()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{e}"
+                logging.error(f"Model version check failed, keeping version [{self._current_version()}]: {e}")
+
+    def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def as_dict(self) -> dict:
+        return {
+            "model_version": self._current_version(),
+            "poll_seconds": self.prediction_pipeline_config.version_poll_seconds,
+            "checks": self.checks,
+            "swaps": self.swaps,
+            "last_checked_at": self.last_checked_at.isoformat() if self.last_checked_at else None,
+            "last_swapped_at": self.last_swapped_at.isoformat() if self.last_swapped_at else None,
+            "last_error": self.last_error,
+        }
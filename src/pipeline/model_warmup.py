@@ -0,0 +1,72 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.logger import logging
+from src.pipeline.prediction_pipeline import VehicleDataClassifier
+
+
+class ModelWarmup:
+    """
+    Loads and warms the production model in the background when the server starts and
+    tracks whether the replica is ready to take prediction traffic.
+
+    The download and the warm-up prediction run on a worker thread, so the event loop keeps
+    answering liveness checks meanwhile. A failed attempt (e.g. S3 unreachable) is retried
+    every preload_retry_seconds until it succeeds.
+    """
+
+    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()):
+        self.prediction_pipeline_config = prediction_pipeline_config
+        self.classifier = VehicleDataClassifier(prediction_pipeline_config)
+        self.ready = False
+        self.attempts = 0
+        self.model_version: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.warm_up_seconds: Optional[float] = None
+        self.ready_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Schedules the warm-up on the running event loop, or marks the replica ready straight
+        away when preloading is disabled.
+        """
+        if not self.prediction_pipeline_config.preload_model:
+            self.ready = True
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self.ready:
+            self.attempts += 1
+            started = time.perf_counter()
+            try:
+                self.model_version = await loop.run_in_executor(None, self.classifier.warm_up)
+                self.warm_up_seconds = time.perf_counter() - started
+                self.ready_at = datetime.now()
+                self.last_error = None
+                self.ready = True
+                logging.info(f"Replica ready after {self.warm_up_seconds:.2f}s ({self.attempts} attempt(s))")
+            except Exception as e:
+                self.last_error = f"{e}"
+                logging.error(f"Model warm-up attempt {self.attempts} failed, retrying in "
+                              f"{self.prediction_pipeline_config.preload_retry_seconds}s: {e}")
+                await asyncio.sleep(self.prediction_pipeline_config.preload_retry_seconds)
+
+    def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "model_version": self.model_version,
+            "attempts": self.attempts,
+            "warm_up_seconds": self.warm_up_seconds,
+            "ready_at": self.ready_at.isoformat() if self.ready_at else None,
+            "last_error": self.last_error,
+        }
@@ -1,9 +1,49 @@
 import sys
+import threading
+import numpy as np
 from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.input_schema import InputValidationError, VehicleInputSchema
 from src.entity.s3_estimator import Proj1Estimator
+from src.entity.model_cache import ModelCache
 from src.exception import MyException
 from src.logger import logging
+from src.metrics import stage_timer
+from src.pipeline.prediction_cache import PredictionCache
 from pandas import DataFrame
+from typing import Dict, List, Optional, Tuple, Union
+
+VEHICLE_DATA_COLUMNS = [
+    "Gender",
+    "Age",
+    "Driving_License",
+    "Region_Code",
+    "Previously_Insured",
+    "Annual_Premium",
+    "Policy_Sales_Channel",
+    "Vintage",
+    "Vehicle_Age_lt_1_Year",
+    "Vehicle_Age_gt_2_Years",
+    "Vehicle_Damage_Yes"
+]
+
+# REPRESENTATIVE FORM INPUT USED TO WARM UP A FRESHLY LOADED MODEL
+WARM_UP_RECORD = {
+    "Gender": 1, "Age": 44, "Driving_License": 1, "Region_Code": 28.0, "Previously_Insured": 0,
+    "Annual_Premium": 40454.0, "Policy_Sales_Channel": 26.0, "Vintage": 217, "Vehicle_Age_lt_1_Year": 0,
+    "Vehicle_Age_gt_2_Years": 1, "Vehicle_Damage_Yes": 1,
+}
+
+
+def canonical_vehicle_key(record: Dict) -> Optional[Tuple[float, ...]]:
+    """
+    Normalizes a raw record into a hashable tuple of floats in VEHICLE_DATA_COLUMNS order, so
+    "44", 44 and "44.0" share a cache entry. Returns None for records that do not parse; those
+    are left to predict_records, which rejects them with per-field errors.
+    """
+    try:
+        return tuple(float(record[column]) for column in VEHICLE_DATA_COLUMNS)
+    except (KeyError, TypeError, ValueError):
+        return None
 
 class VehicleData:
     def __init__(self,
@@ -37,11 +77,22 @@ class VehicleData:
     def get_vehicle_input_data_frame(self) -> DataFrame:
 
         try:
-            vehicle_input_dict = self.get_vehicle_data_as_dict()
-            return DataFrame(vehicle_input_dict)
+            with stage_timer("build_dataframe"):
+                vehicle_input_dict = self.get_vehicle_data_as_dict()
+                # TYPED int64/float64 COLUMNS, SO THE PREPROCESSOR NEVER SEES AN OBJECT-DTYPE FRAME
+                input_schema = VehicleInputSchema.get_default()
+                return input_schema.to_dataframe(input_schema.coerce_columns(vehicle_input_dict))
+        except InputValidationError:
+            raise
         except Exception as e:
             raise MyException(e, sys)
 
+    def get_vehicle_record(self) -> Dict:
+        """
+        Returns the raw field values as a flat dict for the pandas-free prediction path.
+        """
+        return {column: getattr(self, column) for column in VEHICLE_DATA_COLUMNS}
+
     def get_vehicle_data_as_dict(self):
 
         logging.info("Entered get_vehicle_data_as_dict method a VehicleData class")
@@ -68,7 +119,42 @@ class VehicleData:
             raise MyException(e, sys)
 
 
+class VehicleDataBatch:
+    """
+    Many vehicle records scored together, given either row-wise as a list of dicts
+    or column-wise as a dict of equally long lists keyed by column name.
+    """
+    def __init__(self, records: Union[List[Dict], Dict[str, List]]):
+        try:
+            if isinstance(records, dict):
+                lengths = {len(values) for values in records.values()}
+                if len(lengths) > 1:
+                    raise ValueError("All columns of a columnar batch must have the same length")
+                self.size = lengths.pop() if lengths else 0
+            else:
+                self.size = len(records)
+            self.records = records
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_vehicle_input_data_frame(self) -> DataFrame:
+        """
+        Builds a single DataFrame for the whole batch, preserving input order.
+        """
+        try:
+            input_schema = VehicleInputSchema.get_default()
+            return input_schema.to_dataframe(input_schema.coerce(self.records))[VEHICLE_DATA_COLUMNS]
+        except InputValidationError:
+            raise
+        except Exception as e:
+            raise MyException(e, sys)
+
+
 class VehicleDataClassifier:
+    # PREDICTION CACHES ARE SHARED BY ALL INSTANCES, ONE PER (BUCKET, MODEL PATH)
+    _prediction_caches: Dict[Tuple[str, str], PredictionCache] = {}
+    _prediction_caches_lock = threading.Lock()
+
     def __init__(self,
                  prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()) -> None:
         try:
@@ -76,6 +162,18 @@ class VehicleDataClassifier:
         except Exception as e:
             raise MyException(e, sys)
 
+    def get_prediction_cache(self) -> PredictionCache:
+        """
+        Returns the process-wide prediction cache of the configured production model.
+        """
+        key = (self.prediction_pipeline_config.model_bucket_name, self.prediction_pipeline_config.model_file_path)
+        with self._prediction_caches_lock:
+            if key not in self._prediction_caches:
+                self._prediction_caches[key] = PredictionCache(
+                    max_size=self.prediction_pipeline_config.prediction_cache_max_size,
+                    ttl_seconds=self.prediction_pipeline_config.prediction_cache_ttl_seconds)
+            return self._prediction_caches[key]
+
     def predict(self, dataframe) -> str:
         try:
             logging.info("Entered predict method of VehicleDataClassifier class")
@@ -89,3 +187,123 @@ class VehicleDataClassifier:
 
         except Exception as e:
             raise MyException(e, sys)
+
+    def predict_records(self, records: Union[List[Dict], Dict[str, List]], return_probabilities: bool = False):
+        """
+        Scores raw records without building a DataFrame, see MyModel.predict_records.
+
+        Records are first coerced into typed columns by the schema; invalid input raises an
+        InputValidationError with per-field errors and never reaches the cache or the model.
+        Row-wise records are then looked up in the prediction cache under the version of the
+        model that will score them; only the misses reach the model, and their results are
+        cached. Column-wise batches are bulk scoring and bypass the cache.
+        """
+        try:
+            with stage_timer("validate"):
+                columns = VehicleInputSchema.get_default().coerce(records)
+            entry = ModelCache.get_entry(bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                                         model_path=self.prediction_pipeline_config.model_file_path)
+            cache = self.get_prediction_cache()
+            if isinstance(records, dict) or not cache.enabled:
+                return entry.model.predict_records(columns, return_probabilities=return_probabilities)
+
+            # SAME KEYS AS canonical_vehicle_key, BUILT FROM THE TYPED COLUMNS
+            keys = list(zip(*(columns[column].astype(np.float64).tolist() for column in VEHICLE_DATA_COLUMNS)))
+            results = [cache.get(entry.version, key) for key in keys]
+
+            missing = [row for row, result in enumerate(results) if result is None]
+            if missing:
+                # ALWAYS SCORE WITH PROBABILITIES SO A CACHED RESULT SERVES EITHER KIND OF REQUEST
+                predictions, probabilities = entry.model.predict_records(
+                    {column: values[missing] for column, values in columns.items()}, return_probabilities=True)
+                for row, prediction, probability in zip(missing, predictions, probabilities):
+                    results[row] = (prediction, probability)
+                    cache.put(entry.version, keys[row], results[row])
+
+            predictions = np.array([prediction for prediction, _ in results])
+            if return_probabilities:
+                return predictions, np.array([probability for _, probability in results], dtype=np.float64)
+            return predictions
+
+        except InputValidationError:
+            raise
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_cached_predictions(self, records: List[Dict]) -> Optional[np.ndarray]:
+        """
+        Returns predictions for the records if all of them are cached for the loaded model,
+        otherwise None. Never loads the model or runs it, so it is safe on the event loop.
+        """
+        cache = self.get_prediction_cache()
+        version = ModelCache.get_version(bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                                         model_path=self.prediction_pipeline_config.model_file_path)
+        if version is None or not cache.enabled:
+            return None
+
+        predictions = []
+        for record in records:
+            key = canonical_vehicle_key(record)
+            result = cache.get(version, key, count_miss=False) if key is not None else None
+            if result is None:
+                return None
+            predictions.append(result[0])
+        return np.array(predictions)
+
+    def predict_with_proba(self, dataframe):
+        try:
+            logging.info("Entered predict_with_proba method of VehicleDataClassifier class")
+            model = Proj1Estimator(
+                bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                model_path=self.prediction_pipeline_config.model_file_path
+            )
+            return model.predict_with_proba(dataframe)
+
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def warm_up(self) -> str:
+        """
+        Loads the production model into the process-wide cache and runs a prediction through
+        both the record and the DataFrame paths, so the first real request finds the model,
+        the feature encoder and the preprocessing code paths ready.
+
+        :return: Version of the warmed model.
+        """
+        try:
+            entry = ModelCache.get_entry(bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                                         model_path=self.prediction_pipeline_config.model_file_path)
+            self.warm_up_model(entry.model)
+            logging.info(f"Warmed up production model version [{entry.version}]")
+            return entry.version
+        except Exception as e:
+            raise MyException(e, sys)
+
+    @staticmethod
+    def warm_up_model(model) -> None:
+        """
+        Runs WARM_UP_RECORD through the record and DataFrame prediction paths of a model.
+        """
+        model.predict_records([WARM_UP_RECORD], return_probabilities=True)
+        model.predict(VehicleData(**WARM_UP_RECORD).get_vehicle_input_data_frame())
+
+    def refresh(self) -> bool:
+        """
+        Reloads the cached production model if the S3 object changed since it was loaded; the
+        new model is warmed up before it replaces the old one.
+        """
+        try:
+            return ModelCache.refresh(bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                                      model_path=self.prediction_pipeline_config.model_file_path,
+                                      warm_up=self.warm_up_model)
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached production model and its cached predictions, so the next prediction
+        loads the model from S3 again.
+        """
+        ModelCache.invalidate(bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                              model_path=self.prediction_pipeline_config.model_file_path)
+        self.get_prediction_cache().clear()
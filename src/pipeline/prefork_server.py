@@ -0,0 +1,188 @@
+import gc
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+from src.entity.config_entity import ServerConfig, VehiclePredictorConfig
+from src.exception import MyException
+from src.logger import logging, stop_log_listener
+from src.pipeline.prediction_pipeline import VehicleDataClassifier
+from src.pipeline.training_jobs import TrainingJobServer
+
+
+class PreforkServer:
+    """
+    Pre-fork server for the FastAPI app that shares one copy of the model across workers.
+
+    The master process imports the app, loads and warms the production model, moves every
+    object it created to the permanent GC generation (gc.freeze) and binds the listening
+    socket. Then it forks the workers, and each one runs uvicorn on the inherited socket. The
+    forest's numpy arrays are never written after the fork, so their pages stay shared
+    copy-on-write between all workers. Total memory stays close to a single replica's,
+    while inference runs on as many cores as there are workers.
+
+    Each worker exits gracefully after max_requests (plus a random jitter, so they don't all
+    restart together) and the master forks a replacement from its warm state. SIGHUP recycles
+    all workers one at a time; SIGTERM/SIGINT drains them and shuts the server down.
+
+    Each worker has its own micro-batcher, prediction cache and metrics (labelled with its pid).
+    Training jobs belong to a TrainingJobServer process started by the master before the fork,
+    so every worker sees the same jobs and only one training run happens at a time.
+    """
+
+    def __init__(self, app, server_config: ServerConfig = ServerConfig(),
+                 prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()):
+        try:
+            self.app = app
+            self.server_config = server_config
+            self.prediction_pipeline_config = prediction_pipeline_config
+            self.workers: Dict[int, int] = {}  # PID -> WORKER SLOT
+            self.socket: Optional[socket.socket] = None
+            self.training_job_server: Optional[TrainingJobServer] = None
+            self._stopping = False
+            self._recycle_requested = False
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def preload(self) -> None:
+        """
+        Loads and warms the model in the master so every forked worker inherits it.
+        """
+        try:
+            VehicleDataClassifier(self.prediction_pipeline_config).warm_up()
+        except Exception as e:
+            # WORKERS FALL BACK TO LOADING THE MODEL THEMSELVES THROUGH THE STARTUP WARM-UP
+            logging.error(f"Model preload in the master failed, workers will load it on startup: {e}")
+        gc.collect()
+        gc.freeze()
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.server_config.host, self.server_config.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, slot: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            # CHILD: UVICORN HANDLES SIGTERM/SIGINT WHILE SERVING AND RE-RAISES THEM AFTER ITS GRACEFUL
+            # SHUTDOWN; IGNORING THEM HERE LETS THE WORKER FALL THROUGH TO A CLEAN EXIT INSTEAD
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                self._serve()
+            except BaseException:
+                logging.exception(f"Worker {slot} crashed")
+                exit_code = 1
+            finally:
+                stop_log_listener()
+                logging.shutdown()
+                os._exit(exit_code)
+
+        self.workers[pid] = slot
+        logging.info(f"Started worker {slot} with pid {pid}")
+        return pid
+
+    def _serve(self) -> None:
+        import uvicorn
+
+        jitter = random.randint(0, self.server_config.max_requests_jitter) \
+            if self.server_config.max_requests_jitter > 0 else 0
+        config = uvicorn.Config(self.app,
+                                limit_max_requests=self.server_config.max_requests + jitter
+                                if self.server_config.max_requests > 0 else None,
+                                timeout_graceful_shutdown=self.server_config.graceful_timeout_seconds,
+                                log_config=None)
+        uvicorn.Server(config).run(sockets=[self.socket])
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handle_recycle(self, signum, frame) -> None:
+        self._recycle_requested = True
+
+    def _reap(self) -> None:
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            slot = self.workers.pop(pid, None)
+            if slot is None:
+                continue
+            logging.info(f"Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}")
+            if not self._stopping:
+                self._spawn(slot)
+
+    def _recycle_all(self) -> None:
+        """
+        Rolling restart: replaces workers one at a time so capacity never drops by more than one.
+        """
+        for pid in list(self.workers):
+            if self._stopping:
+                return
+            slot = self.workers[pid]
+            os.kill(pid, signal.SIGTERM)
+            deadline = time.monotonic() + self.server_config.graceful_timeout_seconds
+            while pid in self.workers and time.monotonic() < deadline and not self._stopping:
+                self._reap()
+                time.sleep(0.1)
+            logging.info(f"Recycled worker {slot}")
+
+    def _shutdown(self) -> None:
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.server_config.graceful_timeout_seconds
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.workers.pop(pid, None)
+        self.socket.close()
+        if self.training_job_server is not None:
+            self.training_job_server.stop_server()
+        logging.info("Pre-fork server stopped")
+
+    def run(self) -> None:
+        """
+        Method Name :   run
+        Description :   Preloads the model, forks the workers and supervises them until stopped
+
+        Output      :   None
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            self.preload()
+            self.socket = self.bind()
+            self.training_job_server = TrainingJobServer(ctx=multiprocessing.get_context("spawn"))
+            self.training_job_server.start_server()
+            logging.info(f"Pre-fork server listening on {self.server_config.host}:{self.server_config.port} "
+                         f"with {self.server_config.workers} workers")
+
+            signal.signal(signal.SIGTERM, self._handle_stop)
+            signal.signal(signal.SIGINT, self._handle_stop)
+            signal.signal(signal.SIGHUP, self._handle_recycle)
+
+            for slot in range(self.server_config.workers):
+                self._spawn(slot)
+
+            while not self._stopping:
+                self._reap()
+                if self._recycle_requested:
+                    self._recycle_requested = False
+                    self._recycle_all()
+                time.sleep(0.2)
+
+            self._shutdown()
+        except Exception as e:
+            raise MyException(e, sys) from e
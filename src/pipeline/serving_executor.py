@@ -0,0 +1,43 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.exception import MyException
+
+
+class ServerBusyError(Exception):
+    """
+    Raised when a request is rejected by admission control instead of being queued.
+    """
+
+
+class InferenceExecutor:
+    """
+    Runs blocking inference on a bounded thread pool so the event loop stays free.
+
+    At most inference_max_in_flight calls may be queued or running at once; further calls are
+    rejected immediately with ServerBusyError rather than piling up behind the pool.
+    """
+
+    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()):
+        try:
+            self.max_workers = prediction_pipeline_config.inference_max_workers
+            self.max_in_flight = prediction_pipeline_config.inference_max_in_flight
+            self.in_flight = 0
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        except Exception as e:
+            raise MyException(e, sys)
+
+    async def run(self, func: Callable, *args):
+        if self.in_flight >= self.max_in_flight:
+            raise ServerBusyError(f"Inference queue is full ({self.max_in_flight} requests in flight)")
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,336 @@
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, is_dataclass
+from datetime import datetime
+from multiprocessing.managers import BaseManager
+from typing import Dict, List, Optional, Tuple
+
+from src.constants import ARTIFACT_DIR, TRAINING_JOBS_ADDRESS_ENV_KEY
+from src.exception import MyException
+from src.logger import logging
+
+TRAINING_STAGES = [
+    "data_ingestion",
+    "data_validation",
+    "data_transformation",
+    "model_trainer",
+    "model_evaluation",
+    "model_pusher",
+]
+
+
+@dataclass
+class TrainingStageStatus:
+    name: str
+    status: str = "pending"
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    artifact: Optional[dict] = None
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    artifact_dir: str
+    refresh_data: bool = False
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    stages: Dict[str, TrainingStageStatus] = field(
+        default_factory=lambda: {name: TrainingStageStatus(name=name) for name in TRAINING_STAGES})
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def as_dict(self) -> dict:
+        job = asdict(self)
+        job["stages"] = list(job["stages"].values())
+        job["duration_seconds"] = (self.finished_at - self.started_at
+                                   if self.started_at is not None and self.finished_at is not None else None)
+        return job
+
+
+def _training_worker(job_queue, event_queue) -> None:
+    """
+    Entry point of the background training process: runs queued jobs one after another and
+    reports job and stage progress back to the web process through event_queue.
+    """
+    # Imported here so the training stack is only loaded inside the training worker process
+    from src.pipeline.training_pipeline import TrainPipeline
+
+    while True:
+        job = job_queue.get()
+        if job is None:
+            return
+        job_id, artifact_dir, refresh_data = job
+
+        def progress_callback(stage_name, status, artifact):
+            artifact_dict = asdict(artifact) if is_dataclass(artifact) else None
+            event_queue.put(("stage", job_id, stage_name, status, time.time(), artifact_dict))
+
+        event_queue.put(("started", job_id, time.time()))
+        try:
+            TrainPipeline(artifact_dir=artifact_dir, refresh_data=refresh_data) \
+                .run_pipeline(progress_callback=progress_callback)
+            event_queue.put(("finished", job_id, "succeeded", time.time(), None))
+        except Exception as e:
+            logging.exception(f"Training job {job_id} failed")
+            event_queue.put(("finished", job_id, "failed", time.time(), f"{e}"))
+
+
+class TrainingJobManager:
+    """
+    Queues training runs for a persistent background worker process and tracks their progress.
+
+    Submitting while a job is queued or running returns that job instead of starting another,
+    so retried or concurrent /train calls coalesce into a single run. A request to refresh the
+    data only coalesces with a job that refreshes it too.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, TrainingJob] = {}
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+        self._job_queue = None
+        self._event_queue = None
+        self._worker = None
+        self._listener: Optional[threading.Thread] = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        if self._worker is not None:
+            self._fail_active_jobs(f"Training worker exited with code {self._worker.exitcode}")
+
+        self._job_queue = self._context.Queue()
+        self._event_queue = self._context.Queue()
+        self._worker = self._context.Process(target=_training_worker,
+                                             args=(self._job_queue, self._event_queue),
+                                             name="training-worker",
+                                             daemon=True)
+        self._worker.start()
+        self._listener = threading.Thread(target=self._listen, args=(self._event_queue,),
+                                          name="training-events", daemon=True)
+        self._listener.start()
+        logging.info(f"Started training worker process with pid {self._worker.pid}")
+
+    def _fail_active_jobs(self, error: str) -> None:
+        for job in self.jobs.values():
+            if job.is_active:
+                job.status = "failed"
+                job.error = error
+                job.finished_at = time.time()
+
+    def _listen(self, event_queue) -> None:
+        while True:
+            event = event_queue.get()
+            if event is None:
+                return
+            with self._lock:
+                self._apply_event(event)
+
+    def _apply_event(self, event: Tuple) -> None:
+        kind, job_id = event[0], event[1]
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+
+        if kind == "started":
+            job.status = "running"
+            job.started_at = event[2]
+        elif kind == "stage":
+            _, _, stage_name, status, timestamp, artifact = event
+            stage = job.stages[stage_name]
+            stage.status = status
+            if status == "running":
+                stage.started_at = timestamp
+            else:
+                stage.finished_at = timestamp
+                if stage.started_at is not None:
+                    stage.duration_seconds = timestamp - stage.started_at
+                stage.artifact = artifact
+        elif kind == "finished":
+            _, _, status, timestamp, error = event
+            job.status = status
+            job.finished_at = timestamp
+            job.error = error
+            logging.info(f"Training job {job_id} finished with status [{status}]")
+
+    def submit(self, refresh_data: bool = False) -> Tuple[TrainingJob, bool]:
+        """
+        Enqueues a training run unless one is already queued or running.
+
+        :param refresh_data: Re-export the data from MongoDB even if the ingestion cache holds
+                             a split of an unchanged collection
+        :return: The job that will serve this request and whether it was newly created.
+        """
+        try:
+            with self._lock:
+                self._ensure_worker()
+                for job in self.jobs.values():
+                    if job.is_active and (job.refresh_data or not refresh_data):
+                        return job, False
+
+                timestamp = datetime.now().strftime("%m_%d_%Y_%H_%M_%S")
+                job_id = uuid.uuid4().hex
+                job = TrainingJob(job_id=job_id, artifact_dir=os.path.join(ARTIFACT_DIR, f"{timestamp}_{job_id[:8]}"),
+                                  refresh_data=refresh_data)
+                self.jobs[job_id] = job
+                self._job_queue.put((job_id, job.artifact_dir, job.refresh_data))
+                logging.info(f"Queued training job {job_id}")
+                return job, True
+        except Exception as e:
+            raise MyException(e, sys)
+
+    def get_job(self, job_id: str) -> Optional[TrainingJob]:
+        with self._lock:
+            if self._worker is not None and not self._worker.is_alive():
+                self._fail_active_jobs(f"Training worker exited with code {self._worker.exitcode}")
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[TrainingJob]:
+        with self._lock:
+            return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def has_active_job(self) -> bool:
+        with self._lock:
+            return any(job.is_active for job in self.jobs.values())
+
+    @property
+    def is_running(self) -> bool:
+        return self.has_active_job()
+
+    def shutdown(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            self._job_queue.put(None)
+            self._worker.join(timeout=1)
+            if self._worker.is_alive():
+                self._worker.terminate()
+        if self._event_queue is not None:
+            self._event_queue.put(None)
+
+
+# TRAINING JOB MANAGER OWNED BY THE TRAINING JOB SERVER PROCESS
+_served_training_jobs: Optional[TrainingJobManager] = None
+
+
+def _get_served_training_jobs() -> TrainingJobManager:
+    global _served_training_jobs
+    if _served_training_jobs is None:
+        _served_training_jobs = TrainingJobManager()
+    return _served_training_jobs
+
+
+def _init_training_job_server() -> None:
+    # A CTRL-C REACHES THE WHOLE PROCESS GROUP; THE MASTER STOPS THIS SERVER ITSELF ONCE ITS
+    # WORKERS HAVE DRAINED
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class TrainingJobServer(BaseManager):
+    """
+    Process owning the one TrainingJobManager of the pre-fork server, shared by all its workers
+    over a Unix socket. Started by the master before it forks (see PreforkServer), it keeps job
+    state and the training worker process alive across worker restarts.
+    """
+
+    def start_server(self) -> str:
+        """
+        Starts the server process and returns its address, exported to the workers through
+        the TRAINING_JOBS_ADDRESS environment variable.
+        """
+        self.start(initializer=_init_training_job_server)
+        os.environ[TRAINING_JOBS_ADDRESS_ENV_KEY] = self.address
+        logging.info(f"Training job server listening on {self.address}")
+        return self.address
+
+    def stop_server(self) -> None:
+        try:
+            self.training_jobs().shutdown()
+        finally:
+            self.shutdown()
+            os.environ.pop(TRAINING_JOBS_ADDRESS_ENV_KEY, None)
+
+
+TrainingJobServer.register("training_jobs", callable=_get_served_training_jobs,
+                           exposed=("submit", "get_job", "list_jobs", "has_active_job", "shutdown"))
+
+
+class TrainingJobServerUnavailable(Exception):
+    """
+    Raised when the TrainingJobServer of the pre-fork master cannot be reached.
+    """
+
+
+class SharedTrainingJobManager:
+    """
+    Training job manager of the web app, with the TrainingJobManager interface.
+
+    Under the pre-fork server (serve.py) every worker forwards calls to the master's
+    TrainingJobServer, found through TRAINING_JOBS_ADDRESS, so /train coalesces across workers,
+    GET /train/{job_id} answers from any worker and only one training run happens at a time.
+    A single-process server (python app.py) owns its TrainingJobManager. Resolved on first use,
+    so a worker connects after the fork.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local: Optional[TrainingJobManager] = None
+        self._proxy = None
+        self._proxy_pid: Optional[int] = None
+
+    @property
+    def is_shared(self) -> bool:
+        return TRAINING_JOBS_ADDRESS_ENV_KEY in os.environ
+
+    def _get_manager(self):
+        with self._lock:
+            address = os.environ.get(TRAINING_JOBS_ADDRESS_ENV_KEY)
+            if address is None:
+                if self._local is None:
+                    self._local = TrainingJobManager()
+                return self._local
+            if self._proxy is None or self._proxy_pid != os.getpid():
+                server = TrainingJobServer(address=address)
+                server.connect()
+                self._proxy = server.training_jobs()
+                self._proxy_pid = os.getpid()
+            return self._proxy
+
+    def _call(self, method_name: str, *args):
+        try:
+            return getattr(self._get_manager(), method_name)(*args)
+        except (OSError, EOFError) as e:
+            if not self.is_shared:
+                raise
+            # RECONNECT ON THE NEXT CALL, E.G. ONCE THE SERVER IS BACK
+            with self._lock:
+                self._proxy = None
+            raise TrainingJobServerUnavailable(f"Training job server unreachable: {type(e).__name__}: {e}") from e
+
+    def submit(self, refresh_data: bool = False) -> Tuple[TrainingJob, bool]:
+        return self._call("submit", refresh_data)
+
+    def get_job(self, job_id: str) -> Optional[TrainingJob]:
+        return self._call("get_job", job_id)
+
+    def list_jobs(self) -> List[TrainingJob]:
+        return self._call("list_jobs")
+
+    @property
+    def is_running(self) -> bool:
+        return self._call("has_active_job")
+
+    def shutdown(self) -> None:
+        # SHARED JOBS OUTLIVE THIS WORKER: THE MASTER STOPS THE TRAINING JOB SERVER
+        if not self.is_shared and self._local is not None:
+            self._local.shutdown()
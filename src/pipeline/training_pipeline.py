@@ -1,4 +1,7 @@
 import sys
+from dataclasses import replace
+from typing import Callable, Optional
+
 from src.exception import MyException
 from src.logger import logging
 
@@ -14,7 +17,8 @@ from src.entity.config_entity import (DataIngestionConfig,
                                       DataTransformationConfig,
                                       ModelTrainerConfig,
                                       ModelEvaluationConfig,
-                                      ModelPusherConfig)
+                                      ModelPusherConfig,
+                                      with_artifact_dir)
 
 from src.entity.artifact_entity import (DataIngestionArtifact,
                                         DataValidationArtifact,
@@ -24,8 +28,18 @@ from src.entity.artifact_entity import (DataIngestionArtifact,
                                         ModelPusherArtifact)
 
 
+# Progress callback signature: (stage_name, status, artifact) with status one of
+# "running", "succeeded", "failed" or "skipped"
+ProgressCallback = Callable[[str, str, Optional[object]], None]
+
+
 class TrainPipeline:
-    def __init__(self):
+    def __init__(self, artifact_dir: Optional[str] = None, refresh_data: bool = False):
+        """
+        :param artifact_dir: Directory for this run's artifacts, defaults to the timestamped
+                             directory of the current process
+        :param refresh_data: Bypass the ingestion cache and export the data from MongoDB again
+        """
         self.data_ingestion_config = DataIngestionConfig()
         self.data_validation_config = DataValidationConfig()
         self.data_transformation_config = DataTransformationConfig()
@@ -33,6 +47,14 @@ class TrainPipeline:
         self.model_evaluation_config = ModelEvaluationConfig()
         self.model_pusher_config = ModelPusherConfig()
 
+        if artifact_dir is not None:
+            self.data_ingestion_config = with_artifact_dir(self.data_ingestion_config, artifact_dir)
+            self.data_validation_config = with_artifact_dir(self.data_validation_config, artifact_dir)
+            self.data_transformation_config = with_artifact_dir(self.data_transformation_config, artifact_dir)
+            self.model_trainer_config = with_artifact_dir(self.model_trainer_config, artifact_dir)
+        if refresh_data:
+            self.data_ingestion_config = replace(self.data_ingestion_config, use_cache=False)
+
     def start_data_ingestion(self) -> DataIngestionArtifact:
         """
         This method of TrainPipeline class is responsible for starting data ingestion component
@@ -122,22 +144,54 @@ class TrainPipeline:
             raise MyException(e, sys)
 
 
-    def run_pipeline(self, ) -> None:
+    @staticmethod
+    def _run_stage(stage_name: str, progress_callback: Optional[ProgressCallback], stage: Callable, **kwargs):
+        """
+        Runs one pipeline stage, reporting its start and outcome to progress_callback if given
+        """
+        if progress_callback is None:
+            return stage(**kwargs)
+
+        progress_callback(stage_name, "running", None)
+        try:
+            artifact = stage(**kwargs)
+        except Exception:
+            progress_callback(stage_name, "failed", None)
+            raise
+        progress_callback(stage_name, "succeeded", artifact)
+        return artifact
+
+    def run_pipeline(self, progress_callback: Optional[ProgressCallback] = None) -> None:
         """
         This method of TrainPipeline class is responsible for running complete pipeline
+
+        :param progress_callback: Optional callable notified when each stage starts and finishes
         """
         try:
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact = self.start_data_transformation(
-                data_ingestion_artifact=data_ingestion_artifact, data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
-            model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
-                                                                    model_trainer_artifact=model_trainer_artifact)
+            data_ingestion_artifact = self._run_stage("data_ingestion", progress_callback,
+                                                      self.start_data_ingestion)
+            data_validation_artifact = self._run_stage("data_validation", progress_callback,
+                                                       self.start_data_validation,
+                                                       data_ingestion_artifact=data_ingestion_artifact)
+            data_transformation_artifact = self._run_stage("data_transformation", progress_callback,
+                                                           self.start_data_transformation,
+                                                           data_ingestion_artifact=data_ingestion_artifact,
+                                                           data_validation_artifact=data_validation_artifact)
+            model_trainer_artifact = self._run_stage("model_trainer", progress_callback,
+                                                     self.start_model_trainer,
+                                                     data_transformation_artifact=data_transformation_artifact)
+            model_evaluation_artifact = self._run_stage("model_evaluation", progress_callback,
+                                                        self.start_model_evaluation,
+                                                        data_ingestion_artifact=data_ingestion_artifact,
+                                                        model_trainer_artifact=model_trainer_artifact)
             if not model_evaluation_artifact.is_model_accepted:
                 logging.info(f"Model not accepted.")
+                if progress_callback is not None:
+                    progress_callback("model_pusher", "skipped", None)
                 return None
-            model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+            model_pusher_artifact = self._run_stage("model_pusher", progress_callback,
+                                                    self.start_model_pusher,
+                                                    model_evaluation_artifact=model_evaluation_artifact)
 
         except Exception as e:
             raise MyException(e, sys)
\ No newline at end of file
@@ -0,0 +1,216 @@
+import math
+import os
+import sys
+from typing import Iterator, List, Optional
+
+import pandas as pd
+from pandas import DataFrame
+
+from src.constants import DATA_FILE_COMPRESSION, DATA_FILE_ROW_GROUP_SIZE
+from src.exception import MyException
+
+# PYARROW IS IMPORTED INSIDE THE FUNCTIONS: THE SERVING PATH IMPORTS src.utils BUT NEVER READS DATASETS
+
+# ARROW TYPE OF EACH COLUMN TYPE OF config/schema.yaml; CATEGORIES ARE DICTIONARY ENCODED, SO EACH
+# DISTINCT VALUE IS STORED ONCE PER COLUMN CHUNK AND ROWS ONLY HOLD SMALL INTEGER CODES
+SCHEMA_ARROW_TYPES = {"int": "int64", "float": "float64", "category": "dictionary"}
+
+
+def is_parquet_file(file_path: str) -> bool:
+    return file_path.endswith(".parquet")
+
+
+def temp_file_path(file_path: str) -> str:
+    """
+    Name to write a dataset file under before renaming it into place; it keeps the extension,
+    which selects the format.
+    """
+    return os.path.join(os.path.dirname(file_path), f".tmp-{os.path.basename(file_path)}")
+
+
+def get_arrow_schema(schema_config: dict, columns: List[str]):
+    """
+    Arrow schema of a dataset file holding `columns`, typed from the `columns` section of
+    config/schema.yaml. Columns the schema does not list (such as the Mongo _id) are strings.
+    """
+    import pyarrow as pa
+
+    column_types = {}
+    for column in schema_config["columns"]:
+        column_types.update(column)
+
+    fields = []
+    for name in columns:
+        arrow_type = SCHEMA_ARROW_TYPES.get(column_types.get(name), "string")
+        if arrow_type == "dictionary":
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(name, getattr(pa, arrow_type)()))
+    return pa.schema(fields)
+
+
+def _to_arrow_array(values: pd.Series, arrow_type):
+    import pyarrow as pa
+
+    if pa.types.is_integer(arrow_type):
+        return pa.array(pd.to_numeric(values).astype("Int64"), type=arrow_type)
+    if pa.types.is_floating(arrow_type):
+        return pa.array(pd.to_numeric(values).astype("float64"), type=arrow_type)
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return pa.array(values).cast(arrow_type if pa.types.is_dictionary(arrow_type) else pa.string())
+    if values.dtype != object:
+        strings = pa.array(values.astype(str) if not pd.api.types.is_string_dtype(values) else values,
+                           type=pa.string())
+    else:
+        # MONGO VALUES SUCH AS ObjectId ARE STORED AS THEIR STRING FORM, LIKE to_csv DOES
+        strings = pa.array([None if value is None or (isinstance(value, float) and math.isnan(value))
+                            else str(value) for value in values], type=pa.string())
+    if pa.types.is_dictionary(arrow_type):
+        return strings.dictionary_encode().cast(arrow_type)
+    return strings
+
+
+def dataframe_to_arrow(dataframe: DataFrame, arrow_schema):
+    """
+    Converts a DataFrame to an Arrow table with exactly the columns and types of arrow_schema.
+    """
+    import pyarrow as pa
+
+    return pa.Table.from_arrays([_to_arrow_array(dataframe[field.name], field.type) for field in arrow_schema],
+                                schema=arrow_schema)
+
+
+def _sort_categories(dataframe: DataFrame) -> DataFrame:
+    # DICTIONARIES KEEP THE ORDER VALUES FIRST APPEARED IN; SORTED CATEGORIES GIVE THE SAME
+    # pd.get_dummies COLUMNS (AND drop_first CHOICE) AS THE STRINGS READ FROM A CSV
+    for column in dataframe.columns:
+        if isinstance(dataframe[column].dtype, pd.CategoricalDtype):
+            dataframe[column] = dataframe[column].cat.reorder_categories(
+                sorted(dataframe[column].cat.categories))
+    return dataframe
+
+
+def read_dataframe(file_path: str, columns: Optional[List[str]] = None) -> DataFrame:
+    """
+    Reads a Parquet or CSV dataset file, only the given columns if any. Parquet files are read
+    column by column with their stored types; categories come back as pandas categoricals.
+    """
+    try:
+        if is_parquet_file(file_path):
+            return _sort_categories(pd.read_parquet(file_path, columns=columns))
+        return pd.read_csv(file_path, usecols=columns)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def iter_dataframe_batches(file_path: str, batch_size: int, columns: Optional[List[str]] = None) -> Iterator[DataFrame]:
+    """
+    Reads a dataset file in DataFrames of at most batch_size rows. CSV batches are read as text,
+    so writing them back reproduces the original values exactly; Parquet batches keep their types.
+    """
+    try:
+        if is_parquet_file(file_path):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(file_path).iter_batches(batch_size=batch_size, columns=columns):
+                yield _sort_categories(batch.to_pandas())
+        else:
+            yield from pd.read_csv(file_path, usecols=columns, dtype=str, keep_default_na=False, chunksize=batch_size)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def read_arrow_schema(file_path: str):
+    import pyarrow.parquet as pq
+
+    return pq.read_schema(file_path).remove_metadata()
+
+
+class DataFrameWriter:
+    """
+    Writes a dataset file from a sequence of DataFrames, as CSV or, for a .parquet path, as a
+    compressed Parquet file typed by arrow_schema.
+
+    Parquet rows are buffered up to row_group_size before each row group is written, so a file
+    written from small batches still reads back efficiently. Without arrow_schema, the schema
+    is taken from the first DataFrame.
+    """
+
+    def __init__(self, file_path: str, arrow_schema=None, row_group_size: int = DATA_FILE_ROW_GROUP_SIZE,
+                 compression: str = DATA_FILE_COMPRESSION):
+        self.file_path = file_path
+        self.arrow_schema = arrow_schema
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.n_rows = 0
+        self._file = None
+        self._writer = None
+        self._buffer = []
+        self._buffered_rows = 0
+
+    def __enter__(self) -> "DataFrameWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, dataframe: DataFrame) -> None:
+        if is_parquet_file(self.file_path):
+            import pyarrow as pa
+
+            if self.arrow_schema is None:
+                self.arrow_schema = pa.Schema.from_pandas(dataframe.astype(
+                    {column: str for column in dataframe.columns if dataframe[column].dtype == object}),
+                    preserve_index=False).remove_metadata()
+            self._buffer.append(dataframe_to_arrow(dataframe, self.arrow_schema))
+            self._buffered_rows += len(dataframe)
+            if self._buffered_rows >= self.row_group_size:
+                self._flush()
+        else:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+                self._file = open(self.file_path, "w", newline="")
+            dataframe.to_csv(self._file, index=False, header=self._file.tell() == 0)
+        self.n_rows += len(dataframe)
+
+    def _flush(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+            self._writer = pq.ParquetWriter(self.file_path, self.arrow_schema, compression=self.compression)
+        if self._buffer:
+            self._writer.write_table(pa.concat_tables(self._buffer).combine_chunks(),
+                                     row_group_size=self.row_group_size)
+        self._buffer, self._buffered_rows = [], 0
+
+    def close(self) -> None:
+        """
+        Finishes the file. A file that received no rows still gets its header (CSV) or schema
+        (Parquet) when they are known.
+        """
+        if is_parquet_file(self.file_path):
+            if self._writer is not None or self.arrow_schema is not None:
+                self._flush()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        elif self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self.arrow_schema is not None:
+            os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+            DataFrame(columns=self.arrow_schema.names).to_csv(self.file_path, index=False)
+
+
+def write_dataframe(dataframe: DataFrame, file_path: str, arrow_schema=None) -> None:
+    """
+    Writes a whole DataFrame to a Parquet or CSV dataset file, see DataFrameWriter.
+    """
+    try:
+        with DataFrameWriter(file_path, arrow_schema) as writer:
+            writer.write(dataframe)
+    except Exception as e:
+        raise MyException(e, sys) from e
@@ -2,7 +2,6 @@ import os
 import sys
 
 import numpy as np
-import dill
 import yaml
 from pandas import DataFrame
 
@@ -38,6 +37,9 @@ def load_object(file_path: str) -> object:
         return: Model/Obj
     """
     try:
+        # DILL IS ONLY NEEDED FOR PICKLED ARTIFACTS, NOT TO IMPORT THE SERVING PATH
+        import dill
+
         with open(file_path, "rb") as file_obj:
             obj = dill.load(file_obj)
         return obj
@@ -77,6 +79,8 @@ def save_object(file_path: str, obj: object) -> None:
     logging.info("Entered the save_object method of utils")
 
     try:
+        import dill
+
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         with open(file_path, "wb") as file_obj:
             dill.dump(obj, file_obj)